@@ -12,15 +12,73 @@ def create_polygon_from_line(start_x: int, start_y: int, end_x:int, end_y:int, h
     return (start_x - half_width_x, start_y - half_width_y), (end_x - half_width_x, end_y - half_width_y), (end_x + half_width_x, end_y + half_width_y), (start_x + half_width_x, start_y + half_width_y)
 
 
-if True:
-    import json
-
-    with open("example.json", "r") as read_file:
-        print("Starting to convert json decoding")
-        test_as_dict = json.load(read_file)
-        test_as_object: Final[Optional[stage.Hall]] = stage.Hall.from_dict(test_as_dict)
-        if test_as_object is not None:
-            test_as_object.draw()
+def main() -> None:
+    import argparse
+    import logging
+    import time
+    from pathlib import Path
+
+    import batch
+    import layout_cache
+    import render
+
+    parser = argparse.ArgumentParser(description="Draw the stage plot of halls described in json files.")
+    parser.add_argument("halls", nargs="*", default=["example.json"],
+                        help="hall json files, directories or glob patterns (default: example.json)")
+    parser.add_argument("--distancing", type=int, nargs="+",
+                        help="distancing values to render, instead of the one of the hall")
+    parser.add_argument("--row-distancing", type=int, nargs="+",
+                        help="row distancing values to render, instead of the one of the hall")
+    parser.add_argument("--jobs", type=int, default=None, help="number of processes (default: number of cores)")
+    parser.add_argument("--cache-dir", type=Path, default=layout_cache.DEFAULT_PATH,
+                        help=f"directory of the layout cache (default: {layout_cache.DEFAULT_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="always compute the layout, bypassing the cache")
+    parser.add_argument("--format", choices=list(render.RENDERERS), default=render.RasterRenderer.extension,
+                        help="output format, svg embeds each instrument image once (default: png)")
+    parser.add_argument("--scale", type=float, default=1.0, help="pixels per centimeter of the stage (default: 1)")
+    parser.add_argument("--strip-height", type=int,
+                        help="draw and write the png in strips of this many pixels, to bound the memory used")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="write a Chrome trace (chrome://tracing, Perfetto) of the rendering to PATH")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and render each hall again when its file is saved")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="seconds between two checks of the files in watch mode (default: 0.2)")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("-v", "--verbose", action="store_true", help="log the layout of each row")
+    verbosity.add_argument("-q", "--quiet", action="store_true", help="only log warnings and errors")
+    args = parser.parse_args()
+    # A watch never ends, its trace would never be written.
+    if args.watch and args.profile is not None:
+        parser.error("--profile cannot be used with --watch")
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING if args.quiet else logging.INFO,
+                        format="%(levelname)s %(name)s: %(message)s")
+
+    jobs = batch.create_jobs(batch.collect_files(args.halls), args.distancing, args.row_distancing)
+    start = time.perf_counter()
+    options = render.Options(args.format, args.scale, args.strip_height)
+    if args.watch:
+        import watch
+
+        watcher = watch.Watcher(jobs, options, watch.DEFAULT_INTERVAL if args.interval is None else args.interval,
+                                None if args.no_cache else args.cache_dir)
+        print(f"Watching {len(jobs)} jobs, press Ctrl+C to stop.")
+        try:
+            watcher.run(lambda results: batch.print_summary(results, sum(result.seconds for result in results)))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    results = batch.run(jobs, args.jobs, None if args.no_cache else args.cache_dir, args.profile is not None,
+                        options)
+    batch.print_summary(results, time.perf_counter() - start)
+    if args.profile is not None:
+        batch.write_trace(results, args.profile)
+
+
+if __name__ == "__main__":
+    main()
 
     # test_stage: Final[geometry.Dimension] = geometry.Dimension(1300, 900)
     # test_hidden_areas: Final[Sequence[List[Tuple[float, float]]]] = []
@@ -0,0 +1,214 @@
+import copy
+import glob
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Final, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+import layout_cache
+import profiling
+import render
+import stage
+
+logger = logging.getLogger(__name__)
+
+EXPORT_PATH: Final[Path] = Path("export")
+# Below this number of items, starting the worker processes takes longer than processing the items in this process (a
+# hall file is validated in about 0.2 ms, a point of a sweep laid out in about 0.3 ms), see map_chunks.
+PARALLEL_MIN_ITEMS: Final[int] = 256
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class Job:
+    """One hall file to render, optionally overriding its distancing values."""
+    def __init__(self, path: Path, distancing: Optional[int], row_distancing: Optional[int]) -> None:
+        self.path: Final[Path] = path
+        self.distancing: Final[Optional[int]] = distancing
+        self.row_distancing: Final[Optional[int]] = row_distancing
+
+    def apply(self, dct: dict) -> dict:
+        """Return a copy of the hall dictionary with the distancing values of the job."""
+        new_dct: Final[dict] = copy.deepcopy(dct)
+        if self.distancing is not None:
+            new_dct["distancing"] = self.distancing
+        if self.row_distancing is not None and isinstance(new_dct.get("rows"), dict):
+            new_dct["rows"]["distancing"] = self.row_distancing
+
+        return new_dct
+
+
+class JobResult:
+    def __init__(self, job: Job, output: Optional[str], seconds: float, error: Optional[str],
+                 trace: Optional[dict] = None) -> None:
+        self.job: Final[Job] = job
+        self.output: Final[Optional[str]] = output
+        self.seconds: Final[float] = seconds
+        self.error: Final[Optional[str]] = error
+        # Chrome trace of the job (see profiling.Profiler.to_dict) if it was profiled.
+        self.trace: Final[Optional[dict]] = trace
+
+
+def collect_files(patterns: Sequence[str]) -> List[Path]:
+    """Expand directories (all their *.json files) and glob patterns into a sorted list of hall files."""
+    files: List[Path] = []
+    for pattern in patterns:
+        path: Path = Path(pattern)
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.json")))
+        else:
+            matches: List[str] = sorted(glob.glob(pattern))
+            if len(matches) == 0:
+                logger.warning(f"No hall file matches {pattern}.")
+            files.extend(Path(match) for match in matches)
+
+    return list(dict.fromkeys(files))
+
+
+def parse_values(text: str) -> List[int]:
+    """A value, or an inclusive range start:stop:step (step 1 if omitted), for example 50:150:25."""
+    parts: Final[List[int]] = [int(part) for part in text.split(":")]
+    if len(parts) == 1:
+        return parts
+    if len(parts) > 3 or (len(parts) == 3 and parts[2] <= 0):
+        raise ValueError(f"invalid range {text}")
+
+    return list(range(parts[0], parts[1] + 1, parts[2] if len(parts) == 3 else 1))
+
+
+class HallFiles:
+    """Hall files read one after the other, the files which cannot be read or are invalid are reported and counted.
+
+    report prints an error, for example print or logger.error."""
+    def __init__(self, paths: Sequence[Path], report: Callable[[str], None] = logger.error) -> None:
+        self.paths: Final[Sequence[Path]] = paths
+        self.report: Final[Callable[[str], None]] = report
+        self.n_failed: int = 0
+
+    def fail(self, path: Path, error: object) -> None:
+        self.report(f"{path}: {error}")
+        self.n_failed = self.n_failed + 1
+
+    def dicts(self) -> Iterator[Tuple[Path, dict]]:
+        """Dictionary of each file which can be read, the hall is not parsed."""
+        for path in self.paths:
+            try:
+                with open(path, "r", encoding="utf-8") as read_file:
+                    dct: object = json.load(read_file)
+            except (OSError, ValueError) as error:
+                self.fail(path, error)
+                continue
+            if not isinstance(dct, dict):
+                self.fail(path, "invalid hall")
+                continue
+
+            yield path, dct
+
+    def halls(self) -> Iterator[Tuple[Path, stage.Hall]]:
+        """Hall of each valid file."""
+        for path, dct in self.dicts():
+            hall: Optional[stage.Hall] = stage.Hall.from_dict(dct)
+            if hall is None:
+                self.fail(path, "invalid hall")
+                continue
+
+            yield path, hall
+
+    def summary(self, seconds: float, failed: str = "failed") -> str:
+        return f"{len(self.paths)} halls ({self.n_failed} {failed}) in {seconds * 1000:.1f} ms."
+
+
+def create_jobs(files: Sequence[Path], distancings: Optional[Sequence[int]],
+                row_distancings: Optional[Sequence[int]]) -> List[Job]:
+    """Create one job per file and per combination of the given distancing values (None keeps the file value)."""
+    jobs: List[Job] = []
+    for path in files:
+        for distancing in distancings if distancings else [None]:
+            for row_distancing in row_distancings if row_distancings else [None]:
+                jobs.append(Job(path, distancing, row_distancing))
+
+    return jobs
+
+
+def run_job(job: Job, cache_path: Optional[Path] = None, profile: bool = False, process_id: int = 0,
+            options: Optional[render.Options] = None) -> JobResult:
+    """Render the job, the layout is cached in cache_path if given and the job is traced if profile is set."""
+    render_options: Final[render.Options] = options if options is not None else render.Options()
+    if not profile:
+        return _run_job(job, cache_path, render_options)
+
+    with profiling.profile() as profiler:
+        result: Final[JobResult] = _run_job(job, cache_path, render_options)
+    return JobResult(job, result.output, result.seconds, result.error, profiler.to_dict(process_id))
+
+
+def _run_job(job: Job, cache_path: Optional[Path], options: render.Options) -> JobResult:
+    start: Final[float] = time.perf_counter()
+    try:
+        with open(job.path, "r") as read_file:
+            hall: Optional[stage.Hall] = stage.Hall.from_dict(job.apply(json.load(read_file)))
+        if hall is None:
+            return JobResult(job, None, time.perf_counter() - start, "invalid hall")
+
+        EXPORT_PATH.mkdir(exist_ok=True)
+        hall.draw(cache=layout_cache.LayoutCache(cache_path) if cache_path is not None else None,
+                  options=options)
+        return JobResult(job, hall.get_export_path(options.output_format), time.perf_counter() - start, None)
+    except Exception as error:
+        return JobResult(job, None, time.perf_counter() - start, f"{type(error).__name__}: {error}")
+
+
+def run(jobs: Sequence[Job], n_processes: Optional[int] = None, cache_path: Optional[Path] = None,
+        profile: bool = False, options: Optional[render.Options] = None) -> List[JobResult]:
+    """Render all jobs in a process pool, the results are in the order of the jobs.
+
+    If profile is set, each job is traced with the job index as process id so that the traces can be merged."""
+    if len(jobs) == 1 or n_processes == 1:
+        return [run_job(job, cache_path, profile, process_id, options) for process_id, job in enumerate(jobs)]
+
+    with ProcessPoolExecutor(max_workers=n_processes) as executor:
+        return list(executor.map(run_job, jobs, [cache_path] * len(jobs), [profile] * len(jobs), range(len(jobs)),
+                                 [options] * len(jobs)))
+
+
+def map_chunks(function: Callable[[Sequence[T]], List[R]], items: Sequence[T], n_processes: Optional[int] = None,
+               min_parallel_items: int = PARALLEL_MIN_ITEMS) -> List[R]:
+    """Apply the function to contiguous chunks of the items, one per process, in a process pool if there are at least
+    min_parallel_items, else to all items in this process. The results are in the order of the items.
+
+    A chunk is sent to a process at once, and a process can reuse what it computed for the previous items."""
+    n_workers: Final[int] = min(n_processes if n_processes is not None else os.cpu_count() or 1, len(items))
+    if len(items) < min_parallel_items or n_workers <= 1:
+        return function(items)
+
+    chunk_size: Final[int] = -(-len(items) // n_workers)
+    chunks: Final[List[Sequence[T]]] = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        return [result for results in executor.map(function, chunks) for result in results]
+
+
+def print_summary(results: Sequence[JobResult], seconds: float) -> None:
+    for result in results:
+        s_job: str = f"{result.job.path} distancing={result.job.distancing} " \
+                     f"row_distancing={result.job.row_distancing}"
+        if result.error is None:
+            print(f"{result.seconds:8.3f}s  {s_job} -> {result.output}")
+        else:
+            print(f"{result.seconds:8.3f}s  {s_job} FAILED ({result.error})")
+
+    n_failed: Final[int] = sum(1 for result in results if result.error is not None)
+    print(f"{len(results)} jobs ({n_failed} failed) in {seconds:.3f}s.")
+
+
+def write_trace(results: Sequence[JobResult], path: str) -> None:
+    """Merge the traces of the profiled jobs into one Chrome trace file and log the slowest spans."""
+    trace: Final[dict] = profiling.merge([result.trace for result in results if result.trace is not None])
+    profiling.write(trace, path)
+    for name, entry in sorted(trace["otherData"]["summary"].items(), key=lambda item: -item[1]["seconds"]):
+        logger.info(f"{name:24} {entry['calls']:6} calls {entry['seconds'] * 1000:10.3f} ms")
+    for name, n in sorted(trace["otherData"]["counters"].items()):
+        logger.info(f"{name:24} {n:6}")
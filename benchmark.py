@@ -0,0 +1,280 @@
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Final, List, Optional, Sequence, Tuple, TypedDict
+
+import float_geometry
+import geometry
+import layout_cache
+import render
+import stage
+
+# name: (number of rows, seats per row, number of hidden polygons)
+SCENARIOS: Final[Dict[str, Tuple[int, int, int]]] = {
+    "small": (3, 8, 0),
+    "medium": (10, 40, 10),
+    "large": (40, 150, 40),
+    "huge": (150, 400, 200),
+}
+# name: python code run by a new interpreter in the directory of the package, see run_startup.
+STARTUP_COMMANDS: Final[Dict[str, str]] = {
+    "python": "pass",
+    "import_stage": "import stage",
+    "import_cli": "import batch, solver, watch",
+    "layout": "import json, stage; stage.Hall.from_dict(json.load(open('example.json'))).compute_layout()",
+    "import_exact_geometry": "import geometry; geometry.Circle",
+}
+STARTUP: Final[str] = "startup"
+# Modules which are slow to import and should only be imported when they are used.
+HEAVY_MODULES: Final[Tuple[str, ...]] = ("sympy", "PIL")
+MAX_DRAW_PIXELS: Final[int] = 30_000_000
+ROW_DISTANCING: Final[int] = 100
+FIRST_RADIUS: Final[int] = 200
+
+
+class BenchmarkResult(TypedDict, total=False):
+    """Measures of one benchmark, only error is set when it failed."""
+    seconds: float
+    peak_memory_bytes: int
+    throughput: float
+    throughput_unit: str
+    # Only for the startup commands.
+    heavy_modules: List[str]
+    error: str
+
+
+def generate_hall(n_rows: int, n_seats_per_row: int, n_hidden: int, seed: int = 0) -> dict:
+    """Hall json with n_rows rows of about n_seats_per_row seats and n_hidden square pillars on the stage."""
+    max_radius: Final[int] = FIRST_RADIUS + ROW_DISTANCING * n_rows
+    middle_radius: Final[float] = (FIRST_RADIUS + max_radius) / 2
+    perimeter: Final[float] = 2 * math.pi * middle_radius * (stage.DEFAULT_ANGLES.end_angle
+                                                             - stage.DEFAULT_ANGLES.start_angle) / 360
+    distancing: Final[int] = max(stage.RADIUS_SEAT * 2, math.floor(perimeter / n_seats_per_row))
+    size_x: Final[int] = 2 * max_radius + 2 * ROW_DISTANCING
+    size_y: Final[int] = max_radius + ROW_DISTANCING
+
+    generator: Final[random.Random] = random.Random(seed)
+    hidden: List[dict] = []
+    for _ in range(n_hidden):
+        x: int = generator.randint(0, size_x - 40)
+        y: int = generator.randint(0, size_y - 40)
+        hidden.append({"polygon": [{"x": x, "y": y}, {"x": x + 40, "y": y},
+                                   {"x": x + 40, "y": y + 40}, {"x": x, "y": y + 40}]})
+
+    return {
+        "name": f"Synthetic_{n_rows}_{n_seats_per_row}_{n_hidden}",
+        "stage": {"x": size_x, "y": size_y},
+        "rows": {"list": [{} for _ in range(n_rows)], "distancing": ROW_DISTANCING,
+                 "distancingFirstRow": FIRST_RADIUS - ROW_DISTANCING,
+                 "center": {"x": size_x // 2, "y": size_y}},
+        "distancing": distancing,
+        "percussion": [],
+        "hidden": hidden,
+        "legend": {"x": 10, "y": 10},
+    }
+
+
+def measure(function: Callable[[], object], n_repeats: int) -> BenchmarkResult:
+    """Best time of n_repeats calls and peak memory allocated during one call."""
+    best: float = math.inf
+    for _ in range(n_repeats):
+        start: float = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": best, "peak_memory_bytes": peak}
+
+
+def run_scenario(name: str, n_repeats: int) -> Dict[str, BenchmarkResult]:
+    n_rows, n_seats_per_row, n_hidden = SCENARIOS[name]
+    dct: Final[dict] = generate_hall(n_rows, n_seats_per_row, n_hidden)
+    results: Dict[str, BenchmarkResult] = {}
+
+    def prepared_hall() -> stage.Hall:
+        hall: stage.Hall = stage.Hall.from_dict(dct)
+        _ = hall.float_stage_for_seats, hall.hidden_areas_index
+        return hall
+
+    def add(benchmark: str, function: Callable[[], object], n_operations: int, unit: str) -> None:
+        try:
+            result: BenchmarkResult = measure(function, n_repeats)
+        except Exception as error:
+            # For example the font or the instrument images are not available.
+            results[benchmark] = {"error": f"{type(error).__name__}: {error}"}
+            return
+        result["throughput"] = n_operations / result["seconds"] if result["seconds"] > 0 else math.inf
+        result["throughput_unit"] = unit
+        results[benchmark] = result
+
+    hall: Final[stage.Hall] = prepared_hall()
+    float_geometry.ARC_ANGLES_CACHE.clear()
+    plan = hall.compute_layout()
+    n_seats: Final[int] = plan.n_seats
+    circles: Final[List[float_geometry.Circle]] = [float_geometry.Circle(row.center, row.radius)
+                                                   for row in plan.rows]
+
+    add("from_dict", lambda: stage.Hall.from_dict(dct), 1, "halls/s")
+    add("enlarge", prepared_hall, 1, "halls/s")
+
+    arcs: Final[List[geometry.ArcAngles]] = [geometry.ArcAngles(180 + i * 0.2, 180 + i * 0.2 + 0.1)
+                                             for i in range(900)]
+    other_arcs: Final[List[geometry.ArcAngles]] = [geometry.ArcAngles(180 + i * 1.8, 180 + i * 1.8 + 0.9)
+                                                   for i in range(100)]
+    add("reduce_to", lambda: geometry.ArcAngles.reduce_to(arcs, other_arcs), len(arcs), "arcs/s")
+    add("exclude", lambda: geometry.ArcAngles.exclude(arcs, other_arcs), len(arcs), "arcs/s")
+    array_arcs: Final[geometry.ArcArray] = geometry.ArcArray.from_arcs(arcs)
+    other_array_arcs: Final[geometry.ArcArray] = geometry.ArcArray.from_arcs(other_arcs)
+    add("reduce_to_array", lambda: array_arcs.reduce_to(other_array_arcs), len(arcs), "arcs/s")
+    add("exclude_array", lambda: array_arcs.exclude(other_array_arcs), len(arcs), "arcs/s")
+
+    polygons: Final[List[float_geometry.Polygon]] = [hall.float_stage_for_seats] + hall.float_hidden_areas_for_seats
+    add("intersection_arc_angles",
+        lambda: [circle.compute_union_arc_angles([polygon]) for circle in circles for polygon in polygons],
+        len(circles) * len(polygons), "clips/s")
+
+    def compute_layout() -> None:
+        float_geometry.ARC_ANGLES_CACHE.clear()
+        hall.compute_layout()
+
+    add("compute_layout", compute_layout, n_seats, "seats/s")
+    add("seat_array", plan.to_array, n_seats, "seats/s")
+
+    bounds: Final[Tuple[float, ...]] = hall.stage.bounds
+    n_pixels: Final[int] = int(bounds[2]) * int(bounds[3])
+    if n_pixels <= MAX_DRAW_PIXELS:
+        add("draw_rows", lambda: hall.draw_rows(render.RasterRenderer(int(bounds[2]), int(bounds[3])), plan),
+            n_seats, "seats/s")
+        with tempfile.TemporaryDirectory() as directory:
+            current_directory: str = os.getcwd()
+            os.chdir(directory)
+            os.mkdir("export")
+            try:
+                add("draw", compute_layout_and_draw(hall), n_seats, "seats/s")
+                add("draw_tiled", compute_layout_and_draw(hall, "png", render.DEFAULT_STRIP_HEIGHT), n_seats,
+                    "seats/s")
+            finally:
+                os.chdir(current_directory)
+
+    add("draw_rows_svg", lambda: hall.draw_rows(render.SvgRenderer(int(bounds[2]), int(bounds[3])), plan),
+        n_seats, "seats/s")
+    with tempfile.TemporaryDirectory() as directory:
+        current_directory = os.getcwd()
+        os.chdir(directory)
+        os.mkdir("export")
+        try:
+            add("draw_svg", compute_layout_and_draw(hall, "svg"), n_seats, "seats/s")
+        finally:
+            os.chdir(current_directory)
+
+    return results
+
+
+def run_startup(n_repeats: int) -> Dict[str, BenchmarkResult]:
+    """Best wall time of a new interpreter running each startup command, and the heavy modules it imported."""
+    results: Dict[str, BenchmarkResult] = {}
+    for name, command in STARTUP_COMMANDS.items():
+        code: str = f"{command}\nimport sys\nprint(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        best: float = math.inf
+        output: str = ""
+        for _ in range(n_repeats):
+            start: float = time.perf_counter()
+            process: subprocess.CompletedProcess = subprocess.run(
+                [sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True,
+                text=True)
+            best = min(best, time.perf_counter() - start)
+            if process.returncode != 0:
+                results[name] = {"error": process.stderr.strip().splitlines()[-1]}
+                break
+            output = process.stdout.strip()
+        else:
+            results[name] = {"seconds": best, "throughput": 1 / best, "throughput_unit": "starts/s",
+                             "heavy_modules": output.split()}
+
+    return results
+
+
+def compute_layout_and_draw(hall: stage.Hall, output_format: str = "png", strip_height: Optional[int] = None) \
+        -> Callable[[], None]:
+    def draw() -> None:
+        float_geometry.ARC_ANGLES_CACHE.clear()
+        hall.draw(options=render.Options(output_format, strip_height=strip_height))
+
+    return draw
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Benchmarks which are slower than the baseline by more than the threshold factor."""
+    regressions: List[str] = []
+    for scenario, benchmarks in results["scenarios"].items():
+        for benchmark, result in benchmarks.items():
+            old_result: Optional[dict] = baseline.get("scenarios", {}).get(scenario, {}).get(benchmark)
+            if "seconds" not in result or old_result is None or old_result.get("seconds", 0) <= 0:
+                continue
+            ratio: float = result["seconds"] / old_result["seconds"]
+            if ratio > threshold:
+                regressions.append(f"{scenario}/{benchmark}: {ratio:.2f}x slower "
+                                   f"({old_result['seconds']:.6f}s -> {result['seconds']:.6f}s)")
+
+    return regressions
+
+
+def main(arguments: Sequence[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark parsing, layout and rendering on synthetic halls, "
+                                                 "the results can be stored and compared between versions.")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS) + [STARTUP],
+                        default=["small", "medium", "large", STARTUP],
+                        help=f"synthetic halls, {STARTUP} measures new interpreters importing the modules")
+    parser.add_argument("--repeats", type=int, default=3, help="number of timed runs, the best one is kept")
+    parser.add_argument("--output", help="json file to store the results in")
+    parser.add_argument("--compare", help="json file of previous results, regressions make the exit code 1")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown factor counted as regression")
+    args = parser.parse_args(arguments)
+
+    results: dict = {"python": platform.python_version(), "layout_version": layout_cache.VERSION,
+                     "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "scenarios": {}}
+    for name in args.scenarios:
+        with contextlib.redirect_stdout(io.StringIO()):
+            scenario_results: Dict[str, BenchmarkResult] = run_startup(args.repeats) if name == STARTUP \
+                else run_scenario(name, args.repeats)
+        results["scenarios"][name] = scenario_results
+        for benchmark, result in scenario_results.items():
+            if "error" in result:
+                print(f"{name:8} {benchmark:24} failed: {result['error']}")
+                continue
+            s_extra: str = f"{result['peak_memory_bytes'] / 1024:10.1f} KiB peak" if "peak_memory_bytes" in result \
+                else f"imports {', '.join(result['heavy_modules']) or 'no heavy module'}"
+            print(f"{name:8} {benchmark:24} {result['seconds'] * 1000:10.3f} ms "
+                  f"{result['throughput']:14.1f} {result['throughput_unit']:9} {s_extra}")
+
+    if args.output is not None:
+        with open(args.output, "w") as write_file:
+            json.dump(results, write_file, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare, "r") as read_file:
+            regressions: List[str] = compare(results, json.load(read_file), args.threshold)
+        for regression in regressions:
+            print(f"Regression {regression}")
+        return 1 if len(regressions) > 0 else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
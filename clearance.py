@@ -0,0 +1,187 @@
+import collections
+import logging
+import math
+import sys
+import time
+from typing import DefaultDict, Dict, Final, List, Optional, Sequence, Tuple, Union
+
+import batch
+import float_geometry
+import geometry
+import layout
+import stage
+
+Cell = Tuple[int, int]
+
+
+class SeatConflict:
+    """Two seats closer than the distancing of the hall."""
+    def __init__(self, first: layout.Seat, second: layout.Seat, distance: float) -> None:
+        self.first: Final[layout.Seat] = first
+        self.second: Final[layout.Seat] = second
+        self.distance: Final[float] = distance
+
+    def __str__(self) -> str:
+        return f"{describe(self.first)} and {describe(self.second)} are {self.distance:.1f} cm apart"
+
+
+class AreaOverlap:
+    """Seat overlapping the podium or a percussion area, distance is the one of its center to the area."""
+    def __init__(self, seat: layout.Seat, area: str, distance: float) -> None:
+        self.seat: Final[layout.Seat] = seat
+        self.area: Final[str] = area
+        self.distance: Final[float] = distance
+
+    def __str__(self) -> str:
+        return f"{describe(self.seat)} overlaps the {self.area}" + \
+            (" (inside)" if self.distance == 0 else f" ({self.distance:.1f} cm from its center)")
+
+
+class ClearanceReport:
+    def __init__(self, conflicts: List[SeatConflict], overlaps: List[AreaOverlap]) -> None:
+        self.conflicts: Final[List[SeatConflict]] = conflicts
+        self.overlaps: Final[List[AreaOverlap]] = overlaps
+
+    @property
+    def is_clear(self) -> bool:
+        return len(self.conflicts) == 0 and len(self.overlaps) == 0
+
+
+class SeatGrid:
+    """Uniform grid over seat centers with cells of the size of the distance looked for, a spatial hash.
+
+    The seats closer than this distance to a seat are in its cell or in the 8 cells around it.
+    """
+    def __init__(self, cell_size: float) -> None:
+        if cell_size <= 0:
+            raise ValueError(f"The cell size has to be positive ({cell_size}).")
+        self.cell_size: Final[float] = cell_size
+        self._cells: Final[DefaultDict[Cell, List[layout.Seat]]] = collections.defaultdict(list)
+
+    def cell(self, seat: layout.Seat) -> Cell:
+        return math.floor(seat.x / self.cell_size), math.floor(seat.y / self.cell_size)
+
+    def add(self, seat: layout.Seat) -> None:
+        self._cells[self.cell(seat)].append(seat)
+
+    def near(self, seat: layout.Seat) -> List[layout.Seat]:
+        """Seats added before in the 9 cells around the one of the seat."""
+        c_x, c_y = self.cell(seat)
+        return [other for d_x in (-1, 0, 1) for d_y in (-1, 0, 1)
+                for other in self._cells.get((c_x + d_x, c_y + d_y), ())]
+
+
+def describe(seat: layout.Seat) -> str:
+    return f"seat ({seat.x:.0f}, {seat.y:.0f}) of row {seat.row_index} arc {seat.arc_index}"
+
+
+def same_arc(first: layout.Seat, second: layout.Seat) -> bool:
+    return first.row_index == second.row_index and first.arc_index == second.arc_index
+
+
+def seat_distance(first: layout.Seat, second: layout.Seat, radii: Dict[int, float], along_arcs: bool = True) \
+        -> float:
+    """Distance between two seats, along the arc for the seats of an arc if along_arcs is set, else in a straight
+    line."""
+    if along_arcs and same_arc(first, second):
+        return math.radians(abs(first.angle - second.angle)) * radii[first.row_index]
+
+    return math.hypot(first.x - second.x, first.y - second.y)
+
+
+def find_conflicts(plan: layout.SeatPlan, distancing: float, arc_tolerance: Optional[float] = None) \
+        -> List[SeatConflict]:
+    """Every pair of seats closer than the distancing, in expected linear time in the number of seats.
+
+    The seats of an arc are spaced by the distancing along the arc, so by default their distance is measured along
+    the arc. With arc_tolerance, it is measured in a straight line and may be shorter than the distancing by
+    arc_tolerance. Raise ValueError if the distancing is not positive."""
+    if distancing <= 0:
+        raise ValueError(f"The distancing has to be positive ({distancing}).")
+
+    radii: Final[Dict[int, float]] = {row.index: row.radius for row in plan.rows}
+    grid: Final[SeatGrid] = SeatGrid(distancing)
+    conflicts: List[SeatConflict] = []
+    for seat in plan.seats:
+        for other in grid.near(seat):
+            distance: float = seat_distance(other, seat, radii, arc_tolerance is None)
+            min_distance: float = distancing - arc_tolerance if arc_tolerance is not None and same_arc(other, seat) \
+                else distancing
+            if distance < min_distance - float_geometry.EPSILON:
+                conflicts.append(SeatConflict(other, seat, distance))
+        grid.add(seat)
+
+    return conflicts
+
+
+def area_distance(area: Union[float_geometry.Polygon, geometry.Arc], pos: float_geometry.Point) -> float:
+    """Distance of the point to the area, 0 inside a polygon. An arc is a line, for example a step."""
+    if isinstance(area, float_geometry.Polygon):
+        return 0 if area.encloses_point(pos) else area.distance(pos)
+
+    center: Final[float_geometry.Point] = float_geometry.Point.from_any(area.center)
+    angle: Final[float] = math.degrees(math.atan2(pos.y - center.y, pos.x - center.x))
+    if (angle - area.angles.start_angle) % 360 <= area.angles.end_angle - area.angles.start_angle:
+        return abs(pos.distance(center) - float(area.radius))
+
+    circle: Final[float_geometry.Circle] = float_geometry.Circle(center, area.radius)
+    return min(pos.distance(end) for end in circle.seat_positions([area.angles.start_angle,
+                                                                   area.angles.end_angle]))
+
+
+def find_overlaps(hall: stage.Hall, plan: layout.SeatPlan) -> List[AreaOverlap]:
+    """Every seat closer than its radius to the podium or to a percussion area."""
+    areas: Final[List[Tuple[str, Union[float_geometry.Polygon, geometry.Arc]]]] = \
+        [("podium", float_geometry.Polygon.from_polygon(hall.rows.podium))] + \
+        [(f"percussion area {i}", float_geometry.Polygon.from_polygon(area) if isinstance(area, geometry.Polygon)
+          else area) for i, area in enumerate(hall.percussion_areas)]
+    index: Final[float_geometry.BoundsIndex[Tuple[str, Union[float_geometry.Polygon, geometry.Arc]]]] = \
+        float_geometry.BoundsIndex([(float_geometry.area_bounds(area), (name, area)) for name, area in areas])
+
+    overlaps: List[AreaOverlap] = []
+    for seat in plan.seats:
+        pos: float_geometry.Point = float_geometry.Point(seat.x, seat.y)
+        for name, area in index.query((seat.x - stage.RADIUS_SEAT, seat.y - stage.RADIUS_SEAT,
+                                       seat.x + stage.RADIUS_SEAT, seat.y + stage.RADIUS_SEAT)):
+            distance: float = area_distance(area, pos)
+            if distance < stage.RADIUS_SEAT - float_geometry.EPSILON:
+                overlaps.append(AreaOverlap(seat, name, distance))
+
+    return overlaps
+
+
+def check(hall: stage.Hall, plan: Optional[layout.SeatPlan] = None, arc_tolerance: Optional[float] = None) \
+        -> ClearanceReport:
+    """Check the seats of the plan of the hall (laid out if not given) against each other and the areas, see
+    find_conflicts for arc_tolerance."""
+    seat_plan: Final[layout.SeatPlan] = plan if plan is not None else hall.compute_layout()
+    return ClearanceReport(find_conflicts(seat_plan, hall.distancing, arc_tolerance), find_overlaps(hall, seat_plan))
+
+
+def main(arguments: Sequence[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Lay out halls and report the seats closer than the distancing and "
+                                                 "the seats overlapping the podium or a percussion area.")
+    parser.add_argument("halls", nargs="+", help="hall json files, directories or glob patterns")
+    parser.add_argument("--arc-tolerance", type=float, metavar="CM",
+                        help="measure the distance of the seats of an arc in a straight line, allowing it to be "
+                             "shorter than the distancing by CM (default: measured along the arc)")
+    args = parser.parse_args(arguments)
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    start: Final[float] = time.perf_counter()
+    files: Final[batch.HallFiles] = batch.HallFiles(batch.collect_files(args.halls), print)
+    for path, hall in files.halls():
+        report: ClearanceReport = check(hall, arc_tolerance=args.arc_tolerance)
+        for problem in report.conflicts + report.overlaps:
+            print(f"{path}: {problem}")
+        if not report.is_clear:
+            files.n_failed = files.n_failed + 1
+
+    print(files.summary(time.perf_counter() - start, "not clear"), file=sys.stderr)
+    return 1 if files.n_failed > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,588 @@
+import functools
+import math
+from collections import OrderedDict
+from typing import Final, Generic, List, NamedTuple, Optional, Sequence, Tuple, TypeVar, Union
+
+import geometry
+import profiling
+
+EPSILON: Final[float] = 1e-9
+# A corner of an enlarged polygon is cut if its tip would be farther than this many times the offset from the vertex.
+MITER_LIMIT: Final[float] = 2.0
+# Largest angle between two vertices of the polygon around an arc (see Polygon.around_arc).
+ARC_STEP_DEGREES: Final[float] = 5.0
+
+Bounds = Tuple[float, float, float, float]
+T = TypeVar("T")
+# An area which has bounds, see area_bounds.
+A = TypeVar("A", bound="Union[Polygon, geometry.Polygon, geometry.Arc]")
+
+
+class Point(NamedTuple):
+    """Representation of a point with plain float coordinates."""
+    x: float
+    y: float
+
+    @staticmethod
+    def from_any(pos: Union[geometry.PointLike, Tuple[float, float]]) -> "Point":
+        """Convert a sympy point, a point of this module or of geometry, or a (x, y) tuple."""
+        if isinstance(pos, tuple):
+            x, y = pos
+            return Point(float(x), float(y))
+
+        return Point(float(pos.x), float(pos.y))
+
+    @staticmethod
+    def round_point(point: "Point") -> "Point":
+        return Point(round(point.x), round(point.y))
+
+    def distance(self, other: geometry.PointLike) -> float:
+        return math.hypot(self.x - other.x, self.y - other.y)
+
+
+class Polygon:
+    """Representation of a polygon with plain float vertices, same API as the sympy polygon used in geometry."""
+    def __init__(self, *args) -> None:
+        self.vertices: Final[Tuple[Point, ...]] = tuple(Point.from_any(pos) for pos in args)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Polygon) and self.vertices == other.vertices
+
+    def __hash__(self) -> int:
+        return hash(self.vertices)
+
+    @staticmethod
+    def from_polygon(polygon: geometry.Polygon) -> "Polygon":
+        return Polygon(*polygon.get_points())
+
+    @property
+    def sides(self) -> List[Tuple[Point, Point]]:
+        n_vertices: Final[int] = len(self.vertices)
+        if n_vertices == 2:
+            return [(self.vertices[0], self.vertices[1])]
+
+        return [(self.vertices[i], self.vertices[(i + 1) % n_vertices]) for i in range(n_vertices)]
+
+    @functools.cached_property
+    def edges(self) -> List[Tuple[float, float, float, float, float, float]]:
+        """Start and direction of each side, with the direction of the previous side: (x, y, dx, dy, pdx, pdy)."""
+        directions: Final[List[Tuple[float, float]]] = [(end.x - start.x, end.y - start.y) for start, end in self.sides]
+        return [(start.x, start.y, d_x, d_y) + directions[i - 1]
+                for i, ((start, _), (d_x, d_y)) in enumerate(zip(self.sides, directions))]
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """Return (x_min, y_min, x_max, y_max)."""
+        xs: Final[List[float]] = [pos.x for pos in self.vertices]
+        ys: Final[List[float]] = [pos.y for pos in self.vertices]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    @property
+    def area(self) -> float:
+        """Signed area, positive for counterclockwise vertices."""
+        area: float = 0
+        for start, end in self.sides:
+            area += start.x * end.y - end.x * start.y
+        return area / 2
+
+    @property
+    def centroid(self) -> Point:
+        area: Final[float] = self.area
+        if abs(area) < EPSILON:
+            return Point(sum(pos.x for pos in self.vertices) / len(self.vertices),
+                         sum(pos.y for pos in self.vertices) / len(self.vertices))
+
+        c_x: float = 0
+        c_y: float = 0
+        for start, end in self.sides:
+            cross: float = start.x * end.y - end.x * start.y
+            c_x += (start.x + end.x) * cross
+            c_y += (start.y + end.y) * cross
+
+        return Point(c_x / (6 * area), c_y / (6 * area))
+
+    def enlarge(self, extra: float, miter_limit: float = MITER_LIMIT) -> "Polygon":
+        """Offset of the polygon: each side is moved by extra away from the inside (towards it if extra < 0).
+
+        The moved sides are joined where they intersect, a corner sharper than miter_limit is cut at miter_limit *
+        extra from the vertex. Where the sides are too short to meet, they are joined by a loop: the result may
+        intersect itself, the points inside are the ones it winds around (see winding_number). A polygon without area
+        is enlarged to a rectangle around it. A shrunk polygon is only exact where it is wider than 2 * -extra.
+        """
+        reduced_vertices: Final[Tuple[Point, ...]] = geometry.Polygon.reduce_vertices(list(self.vertices))
+        if reduced_vertices != self.vertices:
+            return Polygon(*reduced_vertices).enlarge(extra, miter_limit)
+
+        area: Final[float] = self.area
+        if len(self.vertices) < 3 or abs(area) < EPSILON:
+            return self._enlarge_segment(extra)
+
+        orientation: Final[float] = 1 if area > 0 else -1
+        lengths: Final[List[float]] = [start.distance(end) for start, end in self.sides]
+        directions: Final[List[Tuple[float, float]]] = [((end.x - start.x) / length, (end.y - start.y) / length)
+                                                        for (start, end), length in zip(self.sides, lengths)]
+        new_vertices: List[Point] = []
+        for i, pos in enumerate(self.vertices):
+            new_vertices.extend(_offset_corner(pos, directions[i - 1], directions[i], orientation, extra,
+                                               miter_limit, min(lengths[i - 1], lengths[i]) / 2))
+
+        return Polygon(*geometry.Polygon.reduce_vertices(new_vertices))
+
+    def _enlarge_segment(self, extra: float) -> "Polygon":
+        """Rectangle around the segment (or the point) of a polygon without area, the segment cannot be shrunk."""
+        if extra <= 0 or len(self.vertices) == 0:
+            return self
+
+        start: Final[Point] = self.vertices[0]
+        end: Final[Point] = max(self.vertices, key=start.distance)
+        length: Final[float] = start.distance(end)
+        u_x, u_y = ((end.x - start.x) / length, (end.y - start.y) / length) if length > EPSILON else (1.0, 0.0)
+        return Polygon((start.x - extra * (u_x + u_y), start.y - extra * (u_y - u_x)),
+                       (end.x + extra * (u_x - u_y), end.y + extra * (u_y + u_x)),
+                       (end.x + extra * (u_x + u_y), end.y + extra * (u_y - u_x)),
+                       (start.x - extra * (u_x - u_y), start.y - extra * (u_y + u_x)))
+
+    @staticmethod
+    def around_arc(arc: geometry.Arc, extra: float) -> "Polygon":
+        """Polygon containing the points closer than extra to the arc: a ring sector, longer by extra at both ends
+        (a disk if extra is not smaller than the radius).
+
+        The outer sides are tangent to the circle of radius arc.radius + extra, so that no point of the ring is
+        outside of the polygon.
+        """
+        radius: Final[float] = float(arc.radius)
+        center: Final[Point] = Point.from_any(arc.center)
+        extension: Final[float] = 180 if extra >= radius else math.degrees(math.asin(extra / radius))
+        start_angle: Final[float] = arc.angles.start_angle - extension
+        span: Final[float] = min(360.0, arc.angles.end_angle + extension - start_angle)
+        n_steps: Final[int] = max(1, math.ceil(span / ARC_STEP_DEGREES))
+        step: Final[float] = span / n_steps
+        outer_radius: Final[float] = (radius + extra) / math.cos(math.radians(step / 2))
+        inner_radius: Final[float] = max(0.0, radius - extra)
+
+        angles: Final[List[float]] = [math.radians(start_angle + i * step) for i in range(n_steps + 1)]
+        vertices: List[Point] = [Point(center.x + outer_radius * math.cos(angle),
+                                       center.y + outer_radius * math.sin(angle)) for angle in angles]
+        if inner_radius == 0:
+            vertices.append(center)
+        else:
+            vertices.extend(Point(center.x + inner_radius * math.cos(angle), center.y + inner_radius * math.sin(angle))
+                            for angle in reversed(angles))
+
+        return Polygon(*vertices)
+
+    def distance(self, pos: geometry.PointLike) -> float:
+        """Shortest distance between the given point and the sides of the polygon."""
+        return min(_segment_distance(Point.from_any(pos), start, end) for start, end in self.sides)
+
+    def encloses_point(self, pos: geometry.PointLike) -> bool:
+        """Return True if the point is strictly inside the polygon (points on the sides are not enclosed)."""
+        return self.winding_number(pos) > 0
+
+    def winding_number(self, pos: geometry.PointLike) -> int:
+        """Number of turns of the polygon around the point in the direction of the polygon, 0 on the sides.
+
+        The polygon may intersect itself (see enlarge), the points inside are the ones with a positive number, the
+        same rule as Circle.compute_union_arc_angles."""
+        if len(self.vertices) < 3:
+            return 0
+
+        point: Final[Point] = Point.from_any(pos)
+        if self.distance(point) < EPSILON:
+            return 0
+
+        winding: int = 0
+        for start, end in self.sides:
+            if (start.y > point.y) != (end.y > point.y):
+                x_crossing: float = start.x + (point.y - start.y) * (end.x - start.x) / (end.y - start.y)
+                if point.x < x_crossing:
+                    winding = winding + (1 if end.y > start.y else -1)
+
+        return winding if self.area > 0 else -winding
+
+    def intersection(self, other: "Circle") -> List[Point]:
+        return other.intersection(self)
+
+
+class Circle:
+    """Representation of a circle with plain float values, same API as geometry.Circle."""
+    def __init__(self, center: geometry.PointLike, radius: float) -> None:
+        self.center: Final[Point] = Point.from_any(center)
+        self.radius: Final[float] = float(radius)
+
+    @property
+    def circumference(self) -> float:
+        return 2 * math.pi * self.radius
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """Return (x_min, y_min, x_max, y_max)."""
+        return (self.center.x - self.radius, self.center.y - self.radius,
+                self.center.x + self.radius, self.center.y + self.radius)
+
+    def encloses_point(self, pos: geometry.PointLike) -> bool:
+        return self.center.distance(Point.from_any(pos)) < self.radius - EPSILON
+
+    def intersection(self, other: Union["Circle", Polygon]) -> List[Point]:
+        if isinstance(other, Circle):
+            return self._intersection_circle(other)
+
+        intersections: List[Point] = []
+        for start, end in other.sides:
+            for pos in self._intersection_segment(start, end):
+                if all(pos.distance(known) > 1e-6 for known in intersections):
+                    intersections.append(pos)
+
+        return intersections
+
+    def _intersection_circle(self, other: "Circle") -> List[Point]:
+        d_x: Final[float] = other.center.x - self.center.x
+        d_y: Final[float] = other.center.y - self.center.y
+        distance: Final[float] = math.hypot(d_x, d_y)
+        if distance < EPSILON or distance > self.radius + other.radius + EPSILON \
+                or distance < abs(self.radius - other.radius) - EPSILON:
+            return []
+
+        along: Final[float] = (distance ** 2 + self.radius ** 2 - other.radius ** 2) / (2 * distance)
+        height: Final[float] = math.sqrt(max(0.0, self.radius ** 2 - along ** 2))
+        base: Final[Point] = Point(self.center.x + along * d_x / distance, self.center.y + along * d_y / distance)
+        if height < EPSILON:
+            return [base]
+
+        return [Point(base.x + height * d_y / distance, base.y - height * d_x / distance),
+                Point(base.x - height * d_y / distance, base.y + height * d_x / distance)]
+
+    def _intersection_segment(self, start: Point, end: Point) -> List[Point]:
+        d_x: Final[float] = end.x - start.x
+        d_y: Final[float] = end.y - start.y
+        f_x: Final[float] = start.x - self.center.x
+        f_y: Final[float] = start.y - self.center.y
+        a: Final[float] = d_x * d_x + d_y * d_y
+        if a < EPSILON:
+            return []
+
+        b: Final[float] = 2 * (f_x * d_x + f_y * d_y)
+        c: Final[float] = f_x * f_x + f_y * f_y - self.radius * self.radius
+        discriminant: Final[float] = b * b - 4 * a * c
+        if discriminant < 0:
+            return []
+
+        root: Final[float] = math.sqrt(discriminant)
+        params: Final[List[float]] = [(-b - root) / (2 * a)] if root == 0 \
+            else [(-b - root) / (2 * a), (-b + root) / (2 * a)]
+
+        return [Point(start.x + t * d_x, start.y + t * d_y) for t in params if -EPSILON <= t <= 1 + EPSILON]
+
+    def sort_points(self, points: Sequence[Point], clockwise: bool) -> List[Point]:
+        return sorted(points, key=self.angle, reverse=clockwise)
+
+    def get_first_intersection(self, intersections: List[Point], clockwise: bool) -> Optional[Point]:
+        """Get the first intersection from the given points in clockwise direction."""
+        if len(intersections) == 0:
+            return None
+        elif len(intersections) == 1:
+            return Point.round_point(intersections[0])
+
+        sorted_intersections: Final[List[Point]] = self.sort_points(intersections, clockwise)
+        return Point.round_point(sorted_intersections[0])
+
+    def intersection_arc_angles(self, polygon: Polygon) -> List[geometry.ArcAngles]:
+        """Arcs of the circle inside the polygon, memoized in ARC_ANGLES_CACHE."""
+        return self.union_arc_angles((polygon,))
+
+    def union_arc_angles(self, polygons: Sequence[Polygon]) -> List[geometry.ArcAngles]:
+        """Arcs of the circle inside at least one of the polygons, memoized in ARC_ANGLES_CACHE."""
+        profiling.count("intersection_calls")
+        key: Final[Tuple[Point, float, Tuple[Polygon, ...]]] = (self.center, self.radius, tuple(polygons))
+        cached_angles: Final[Optional[List[geometry.ArcAngles]]] = ARC_ANGLES_CACHE.get(key)
+        if cached_angles is not None:
+            return list(cached_angles)
+
+        angles: Final[List[geometry.ArcAngles]] = self.compute_union_arc_angles(polygons)
+        ARC_ANGLES_CACHE.put(key, angles)
+        return list(angles)
+
+    def compute_union_arc_angles(self, polygons: Sequence[Polygon]) -> List[geometry.ArcAngles]:
+        """Clip the circle against all sides of all polygons in a single pass.
+
+        Every crossing of a side enters (+1) or leaves (-1) a polygon, depending on which side of it the circle
+        continues counterclockwise, the circle is inside the union while the count is positive. The count starts
+        at the angle 90, the returned angles are in the range of angle(), ]90, 450].
+        """
+        profiling.count("intersection_misses")
+        c_x: Final[float] = self.center.x
+        c_y: Final[float] = self.center.y
+        radius_squared: Final[float] = self.radius * self.radius
+        reference: Final[Point] = Point(c_x, c_y + self.radius)
+
+        events: List[Tuple[float, int]] = []
+        n_inside: int = 0
+        for polygon in polygons:
+            if len(polygon.vertices) < 3 or abs(polygon.area) < EPSILON:
+                continue
+            n_inside = n_inside + polygon.winding_number(reference)
+
+            orientation: float = 1 if polygon.area > 0 else -1
+            for p_x, p_y, d_x, d_y, previous_d_x, previous_d_y in polygon.edges:
+                f_x: float = p_x - c_x
+                f_y: float = p_y - c_y
+                a: float = d_x * d_x + d_y * d_y
+                b: float = 2 * (f_x * d_x + f_y * d_y)
+                discriminant: float = b * b - 4 * a * (f_x * f_x + f_y * f_y - radius_squared)
+                # A side touching the circle does not change whether the circle is inside.
+                if discriminant <= 0:
+                    continue
+
+                root: float = math.sqrt(discriminant)
+                for t in ((-b - root) / (2 * a), (-b + root) / (2 * a)):
+                    # The end of a side is handled as start of the next one.
+                    if t < -EPSILON or t > 1 - EPSILON:
+                        continue
+
+                    x: float = f_x + t * d_x
+                    y: float = f_y + t * d_y
+                    delta: int
+                    if t <= EPSILON:
+                        # The circle goes through a vertex, (-y, x) is its direction.
+                        delta = int(_in_corner(-y, x, previous_d_x, previous_d_y, d_x, d_y, orientation)) \
+                            - int(_in_corner(y, -x, previous_d_x, previous_d_y, d_x, d_y, orientation))
+                    else:
+                        delta = 1 if orientation * (d_x * x + d_y * y) > 0 else -1
+
+                    if delta != 0:
+                        angle_in_degrees: float = math.degrees(math.atan2(y, x))
+                        events.append((angle_in_degrees if angle_in_degrees > 90 else 360 + angle_in_degrees, delta))
+
+        angles: List[geometry.ArcAngles] = []
+        start_angle: float = 90
+        for angle_in_degrees, delta in sorted(events):
+            was_inside: bool = n_inside > 0
+            n_inside = n_inside + delta
+            if not was_inside and n_inside > 0:
+                start_angle = angle_in_degrees
+            elif was_inside and n_inside <= 0 and angle_in_degrees > start_angle:
+                angles.append(geometry.ArcAngles(start_angle, angle_in_degrees))
+
+        if n_inside > 0:
+            angles.append(geometry.ArcAngles(start_angle, 450))
+
+        return angles
+
+    def point(self, angle_in_degrees: float) -> Point:
+        """Calculate the point of the circle corresponding to the given angle."""
+        angle_in_radians: Final[float] = math.radians(angle_in_degrees)
+        return Point(round(self.center.x + (self.radius * math.cos(angle_in_radians))),
+                     round(self.center.y + (self.radius * math.sin(angle_in_radians))))
+
+    def seat_positions(self, angles_in_degrees: Sequence[float]) -> List[Point]:
+        """Calculate the points of the circle corresponding to all given angles, in one pass and without rounding."""
+        c_x: Final[float] = self.center.x
+        c_y: Final[float] = self.center.y
+        radius: Final[float] = self.radius
+        radians: Final[List[float]] = [math.radians(angle) for angle in angles_in_degrees]
+        return [Point(c_x + radius * math.cos(angle), c_y + radius * math.sin(angle)) for angle in radians]
+
+    def angle(self, pos: geometry.PointLike) -> float:
+        """Calculate the angle corresponding to the given point."""
+        angle_in_degrees: Final[float] = math.degrees(math.atan2(float(pos.y) - self.center.y,
+                                                                 float(pos.x) - self.center.x))
+        if angle_in_degrees > 90:
+            return angle_in_degrees
+        else:
+            return 360 + angle_in_degrees
+
+    def perimeter(self, angles: geometry.ArcAngles) -> float:
+        percent: Final[float] = (abs(angles.end_angle - angles.start_angle)) / 360
+
+        return self.circumference * percent
+
+
+class ArcAnglesCache:
+    """Arcs of circles inside polygons, keyed by (center, radius, polygons), evicted least recently used first.
+
+    The cache is shared by all halls of the process, rows with the same circle are only clipped once, for example
+    when the same hall is laid out with several distancing values.
+    """
+    def __init__(self, max_entries: int = 65536) -> None:
+        self.max_entries: Final[int] = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self._angles: Final[OrderedDict[Tuple[Point, float, Tuple[Polygon, ...]], List[geometry.ArcAngles]]] = \
+            OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._angles)
+
+    def get(self, key: Tuple[Point, float, Tuple[Polygon, ...]]) -> Optional[List[geometry.ArcAngles]]:
+        angles: Final[Optional[List[geometry.ArcAngles]]] = self._angles.get(key)
+        if angles is None:
+            self.misses = self.misses + 1
+            return None
+
+        self.hits = self.hits + 1
+        self._angles.move_to_end(key)
+        return angles
+
+    def put(self, key: Tuple[Point, float, Tuple[Polygon, ...]], angles: List[geometry.ArcAngles]) -> None:
+        self._angles[key] = angles
+        if len(self._angles) > self.max_entries:
+            self._angles.popitem(last=False)
+
+    def clear(self) -> None:
+        self._angles.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+ARC_ANGLES_CACHE: Final[ArcAnglesCache] = ArcAnglesCache()
+
+
+class BoundsIndex(Generic[T]):
+    """Packed R-tree (sort tile recursive) over the bounds (x_min, y_min, x_max, y_max) of items.
+
+    The tree is built once, queries return the items in the order they were given.
+    """
+    def __init__(self, items: Sequence[Tuple[Bounds, T]], node_size: int = 8) -> None:
+        self.items: Final[List[Tuple[Bounds, T]]] = list(items)
+        self.node_size: Final[int] = max(2, node_size)
+        # A node is (bounds, children, is_leaf), the children of a leaf are indices in items.
+        self.root: Final[Optional[Tuple[Bounds, list, bool]]] = self._build()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @staticmethod
+    def from_areas(areas: Sequence[A]) -> "BoundsIndex[A]":
+        return BoundsIndex([(area_bounds(area), area) for area in areas])
+
+    def query(self, bounds: Bounds) -> List[T]:
+        """Items whose bounds intersect the given bounds."""
+        x_min, y_min, x_max, y_max = bounds
+        return self._search(lambda b: b[0] <= x_max and b[2] >= x_min and b[1] <= y_max and b[3] >= y_min)
+
+    def query_ring(self, center: geometry.PointLike, inner_radius: float, outer_radius: float) -> List[T]:
+        """Items whose bounds intersect the ring between both radii around the center."""
+        c_x: Final[float] = float(center.x)
+        c_y: Final[float] = float(center.y)
+
+        def intersects(b: Bounds) -> bool:
+            d_x_min: float = max(b[0] - c_x, 0, c_x - b[2])
+            d_y_min: float = max(b[1] - c_y, 0, c_y - b[3])
+            if d_x_min * d_x_min + d_y_min * d_y_min > outer_radius * outer_radius:
+                return False
+            d_x_max: float = max(abs(b[0] - c_x), abs(b[2] - c_x))
+            d_y_max: float = max(abs(b[1] - c_y), abs(b[3] - c_y))
+            return d_x_max * d_x_max + d_y_max * d_y_max >= inner_radius * max(inner_radius, 0)
+
+        return self._search(intersects)
+
+    def _search(self, intersects) -> List[T]:
+        if self.root is None:
+            return []
+
+        found: List[int] = []
+        stack: List[Tuple[Bounds, list, bool]] = [self.root]
+        while len(stack) > 0:
+            bounds, children, is_leaf = stack.pop()
+            if not intersects(bounds):
+                continue
+            if is_leaf:
+                found.extend(i for i in children if intersects(self.items[i][0]))
+            else:
+                stack.extend(children)
+
+        return [self.items[i][1] for i in sorted(found)]
+
+    def _build(self) -> Optional[Tuple[Bounds, list, bool]]:
+        if len(self.items) == 0:
+            return None
+
+        leaves: Final[List[Tuple[Bounds, list, bool]]] = [
+            (_union_bounds([self.items[i][0] for i in group]), group, True)
+            for group in self._tiles(list(range(len(self.items))), lambda i: self.items[i][0])]
+        nodes: List[Tuple[Bounds, list, bool]] = leaves
+        while len(nodes) > 1:
+            nodes = [(_union_bounds([node[0] for node in group]), group, False)
+                     for group in self._tiles(nodes, lambda node: node[0])]
+
+        return nodes[0]
+
+    def _tiles(self, entries: list, get_bounds) -> List[list]:
+        """Group the entries in vertical slices sorted by x, then in runs of node_size sorted by y."""
+        n_groups: Final[int] = math.ceil(len(entries) / self.node_size)
+        n_slices: Final[int] = math.ceil(math.sqrt(n_groups))
+        slice_size: Final[int] = n_slices * self.node_size
+        by_x: Final[list] = sorted(entries, key=lambda entry: get_bounds(entry)[0] + get_bounds(entry)[2])
+        groups: List[list] = []
+        for i in range(0, len(by_x), slice_size):
+            by_y: list = sorted(by_x[i:i + slice_size], key=lambda entry: get_bounds(entry)[1] + get_bounds(entry)[3])
+            groups.extend(by_y[j:j + self.node_size] for j in range(0, len(by_y), self.node_size))
+
+        return groups
+
+
+def area_bounds(area: Union[Polygon, Circle, geometry.Polygon, geometry.Arc]) -> Bounds:
+    """Bounds of a float polygon or circle, or of an area of geometry (the whole circle for an arc)."""
+    if isinstance(area, (geometry.Polygon, geometry.Arc)):
+        x_min, y_min, x_max, y_max = area.bounds
+        return float(x_min), float(y_min), float(x_max), float(y_max)
+
+    return area.bounds
+
+
+def _union_bounds(list_bounds: Sequence[Bounds]) -> Bounds:
+    return (min(bounds[0] for bounds in list_bounds), min(bounds[1] for bounds in list_bounds),
+            max(bounds[2] for bounds in list_bounds), max(bounds[3] for bounds in list_bounds))
+
+
+def _offset_corner(pos: Point, previous_direction: Tuple[float, float], direction: Tuple[float, float],
+                   orientation: float, extra: float, miter_limit: float, max_trim: float) -> List[Point]:
+    """Vertices of the enlarged polygon at the vertex pos, between the previous side and the next one.
+
+    The moved sides meeting at the vertex are shortened by at most max_trim, else they are both kept whole."""
+    p_x, p_y = previous_direction
+    d_x, d_y = direction
+    # Outer normals of the sides, they are on the right of counterclockwise sides.
+    n1_x, n1_y = orientation * p_y, -orientation * p_x
+    n2_x, n2_y = orientation * d_y, -orientation * d_x
+    cosine: Final[float] = 1 + n1_x * n2_x + n1_y * n2_y
+    # The moved sides do not meet at a convex vertex of the offset (the polygon turns away from the offset).
+    opened: Final[bool] = orientation * (p_x * d_y - p_y * d_x) * extra > 0
+    if not opened and (cosine < EPSILON or abs(extra) * math.sqrt((2 - cosine) / cosine) > max_trim):
+        return [Point(pos.x + extra * n1_x, pos.y + extra * n1_y), Point(pos.x + extra * n2_x, pos.y + extra * n2_y)]
+    if not opened or cosine * miter_limit * miter_limit >= 2:
+        return [Point(pos.x + extra * (n1_x + n2_x) / cosine, pos.y + extra * (n1_y + n2_y) / cosine)]
+
+    # The corner is cut by a line perpendicular to its bisector m, at miter_limit * extra from the vertex.
+    bisector_length: Final[float] = math.hypot(n1_x + n2_x, n1_y + n2_y)
+    sign: Final[float] = 1 if extra > 0 else -1
+    m_x, m_y = (p_x, p_y) if bisector_length < EPSILON \
+        else (sign * (n1_x + n2_x) / bisector_length, sign * (n1_y + n2_y) / bisector_length)
+    cut: Final[float] = abs(extra) * miter_limit
+    corner: List[Point] = []
+    for n_x, n_y, u_x, u_y in ((n1_x, n1_y, p_x, p_y), (n2_x, n2_y, d_x, d_y)):
+        along: float = (cut - extra * (n_x * m_x + n_y * m_y)) / (u_x * m_x + u_y * m_y)
+        corner.append(Point(pos.x + extra * n_x + along * u_x, pos.y + extra * n_y + along * u_y))
+
+    return corner
+
+
+def _in_corner(v_x: float, v_y: float, previous_d_x: float, previous_d_y: float, d_x: float, d_y: float,
+               orientation: float) -> bool:
+    """Return True if the direction v points inside the polygon at the vertex between the previous side and d."""
+    left_of_previous: Final[bool] = orientation * (previous_d_x * v_y - previous_d_y * v_x) > 0
+    left_of_next: Final[bool] = orientation * (d_x * v_y - d_y * v_x) > 0
+    if orientation * (previous_d_x * d_y - previous_d_y * d_x) > 0:
+        return left_of_previous and left_of_next
+    return left_of_previous or left_of_next
+
+
+def _segment_distance(pos: Point, start: Point, end: Point) -> float:
+    d_x: Final[float] = end.x - start.x
+    d_y: Final[float] = end.y - start.y
+    length_squared: Final[float] = d_x * d_x + d_y * d_y
+    if length_squared < EPSILON:
+        return pos.distance(start)
+
+    t: Final[float] = max(0.0, min(1.0, ((pos.x - start.x) * d_x + (pos.y - start.y) * d_y) / length_squared))
+    return math.hypot(pos.x - (start.x + t * d_x), pos.y - (start.y + t * d_y))
@@ -1,35 +1,106 @@
-from typing import Final, List, Sequence, Tuple, Union, Optional
-import sympy
+from __future__ import annotations
 
+import array
+import bisect
+import functools
+import logging
+from typing import TYPE_CHECKING, Final, Iterable, List, NamedTuple, Protocol, Sequence, Tuple, TypeVar, Union, Optional
+
+# sympy is slow to import, it is only imported by the exact geometry (see the Polygon.polygon and Arc.circle
+# properties and the Circle class at the end of the module). The type checkers see the Circle as the one of
+# sympy_geometry.
+if TYPE_CHECKING:
+    import sympy
+    from sympy_geometry import Circle
+
+logger = logging.getLogger(__name__)
+
+
+class PointLike(Protocol):
+    """Point of this module or of float_geometry, whose helpers apply to both."""
+    @property
+    def x(self) -> float: ...
+
+    @property
+    def y(self) -> float: ...
+
+
+P = TypeVar("P", bound=PointLike)
+
+
+class Point(NamedTuple):
+    """Point with the coordinates as given (int or float), sympy converts it exactly when needed."""
+    x: float
+    y: float
 
-class Point:
     @staticmethod
     def round_point(point: sympy.Point) -> sympy.Point:
+        import sympy
+
         return sympy.Point(round(point.x), round(point.y))
 
     @staticmethod
-    def from_dict(dct: dict) -> Optional[sympy.Point]:
+    def from_dict(dct: dict) -> Optional[Point]:
         x: Optional[float] = dct.get("x")
         y: Optional[float] = dct.get("y")
         if x is None or y is None:
-            print(f"A point is not valid {dct}.")
+            logger.warning(f"A point is not valid {dct}.")
             return None
 
-        return sympy.Point(x, y)
+        return Point(x, y)
 
 
 class Polygon:
-    """Representation of a polygon."""
+    """Representation of a polygon.
+
+    The vertices are reduced like the ones of sympy.Polygon (no repeated point, no point in the middle of a side),
+    the sympy polygon itself is only created for the exact geometry.
+    """
     def __init__(self, *args) -> None:
-        self.polygon: Final[sympy.Polygon] = sympy.Polygon(*args)
+        self.vertices: Final[Tuple[Point, ...]] = Polygon.reduce_vertices(
+            [Point(pos.x, pos.y) if hasattr(pos, "x") else Point(*pos) for pos in args])
+
+    @functools.cached_property
+    def polygon(self) -> Union[sympy.Polygon, sympy.Segment]:
+        import sympy
+
+        return sympy.Polygon(*self.vertices)
+
+    @staticmethod
+    def reduce_vertices(points: List[P]) -> Tuple[P, ...]:
+        """Remove the repeated points and the points in the middle of a side, as sympy.Polygon does."""
+        vertices: List[P] = []
+        for pos in points:
+            if len(vertices) == 0 or pos != vertices[-1]:
+                vertices.append(pos)
+        if len(vertices) > 1 and vertices[-1] == vertices[0]:
+            vertices.pop()
+
+        i: int = -3
+        while i < len(vertices) - 3 and len(vertices) > 2:
+            a, b, c = vertices[i], vertices[i + 1], vertices[i + 2]
+            if (b.x - a.x) * (c.y - a.y) - (b.y - a.y) * (c.x - a.x) == 0:
+                vertices.pop(i + 1)
+                if a == c:
+                    vertices.pop(i)
+            else:
+                i = i + 1
+
+        return tuple(vertices)
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """Return (x_min, y_min, x_max, y_max)."""
+        return (min(pos.x for pos in self.vertices), min(pos.y for pos in self.vertices),
+                max(pos.x for pos in self.vertices), max(pos.y for pos in self.vertices))
 
     @staticmethod
     def from_dict(dct: dict) -> Optional["Polygon"]:
         list_polygon: Optional[List[dict]] = dct.get("polygon")
         if list_polygon is not None:
-            points: List[sympy.Point] = []
+            points: List[Point] = []
             for pos in list_polygon:
-                new_pos: Optional[sympy.Point] = Point.from_dict(pos)
+                new_pos: Optional[Point] = Point.from_dict(pos)
 
                 if new_pos is not None:
                     points.append(new_pos)
@@ -38,39 +109,33 @@ class Polygon:
 
         return None
 
-    def get_points(self) -> List[sympy.Point]:
-        if isinstance(self.polygon, sympy.Segment):
-            return self.polygon.points
-        else:
-            return self.polygon.vertices
+    def get_points(self) -> List[Point]:
+        return list(self.vertices)
 
-    def get_as_sequence(self) -> Sequence[Tuple[int, int]]:
-        seq: List[Tuple[int, int]] = []
+    def get_as_sequence(self) -> Sequence[Tuple[float, float]]:
+        seq: List[Tuple[float, float]] = []
         for pos in self.get_points():
             seq.append((pos.x, pos.y))
 
         return seq
 
-    def enlarge(self, extra: int) -> "Polygon":
-        new_vertices: List[sympy.Point] = []
+    def enlarge(self, extra: float) -> "Polygon":
+        """Offset of the polygon by extra, see float_geometry.Polygon.enlarge, the integer coordinates stay exact."""
+        import float_geometry
 
-        for point in self.get_points():
-            extended_points: List[sympy.Point] = [sympy.Point(point.x + extra, point.y + extra),
-                                                  sympy.Point(point.x + extra, point.y - extra),
-                                                  sympy.Point(point.x - extra, point.y + extra),
-                                                  sympy.Point(point.x - extra, point.y - extra)]
-            sorted_points = sorted(extended_points, key=self.polygon.distance, reverse=True)
-            new_vertices.append(sorted_points[0])
-            # TODO understand why this code deos not work
-            # for extended_point in extended_points:
-            #     if self.polygon.distance(extended_point) >= extra:
-            #         new_vertices.append(extended_point)
+        return Polygon(*[Polygon.exact_point(pos)
+                         for pos in float_geometry.Polygon.from_polygon(self).enlarge(extra).vertices])
 
-        return Polygon(*new_vertices)
+    @staticmethod
+    def exact_point(pos: PointLike) -> Point:
+        return Point(int(pos.x) if float(pos.x).is_integer() else pos.x,
+                     int(pos.y) if float(pos.y).is_integer() else pos.y)
 
 
 class ArcAngles:
     """Define begin and end angles of an arc."""
+    __slots__ = ("start_angle", "end_angle")
+
     def __init__(self, start_angle: float, end_angle: float) -> None:
         self.start_angle: Final[float] = start_angle
         self.end_angle: Final[float] = end_angle
@@ -84,11 +149,21 @@ class ArcAngles:
         end: Optional[int] = dct.get("end")
 
         if start is None or end is None:
-            print(f"An arc angles is not valid {dct}.")
+            logger.warning(f"An arc angles is not valid {dct}.")
             return None
 
         return ArcAngles(start_angle=start, end_angle=end)
 
+    def seat_angles(self, n_seats: int) -> List[float]:
+        """Angles of n_seats evenly spread on the arc, a single seat is placed in the middle."""
+        if n_seats < 1:
+            return []
+        elif n_seats == 1:
+            return [(self.start_angle + self.end_angle) / 2]
+
+        step: Final[float] = (self.end_angle - self.start_angle) / (n_seats - 1)
+        return [self.start_angle + i * step for i in range(n_seats)]
+
     @staticmethod
     def from_list(list_angles: Optional[List[Optional[dict]]]) -> Optional[List[Optional["ArcAngles"]]]:
         if list_angles is None:
@@ -144,41 +219,131 @@ class ArcAngles:
         return current_arcs
 
 
+class ArcArray:
+    """Sorted and disjoint arcs stored in two arrays of floats, 16 bytes per arc instead of about 100 for ArcAngles.
+
+    reduce_to and exclude give the same arcs as the ArcAngles methods, they copy the arcs which are not changed as
+    slices of the arrays and find the changed ones by bisection.
+    """
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, starts: Iterable[float] = (), ends: Iterable[float] = ()) -> None:
+        self.starts: Final[array.array] = array.array("d", starts)
+        self.ends: Final[array.array] = array.array("d", ends)
+
+    @staticmethod
+    def from_arcs(arcs: Iterable[ArcAngles]) -> ArcArray:
+        array_arcs: Final[ArcArray] = ArcArray()
+        for arc in arcs:
+            array_arcs.append(arc.start_angle, arc.end_angle)
+        return array_arcs
+
+    def to_arcs(self) -> List[ArcAngles]:
+        return [ArcAngles(start, end) for start, end in zip(self.starts, self.ends)]
+
+    def append(self, start_angle: float, end_angle: float) -> None:
+        self.starts.append(start_angle)
+        self.ends.append(end_angle)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> ArcAngles:
+        return ArcAngles(self.starts[index], self.ends[index])
+
+    def reduce_to(self, sorted_allowed_arcs: ArcArray) -> ArcArray:
+        """Parts of the arcs inside the allowed arcs, see ArcAngles.reduce_to."""
+        if len(sorted_allowed_arcs) == 0:
+            return ArcArray(self.starts, self.ends)
+
+        allowed_starts: Final[array.array] = sorted_allowed_arcs.starts
+        allowed_ends: Final[array.array] = sorted_allowed_arcs.ends
+        new_arcs: Final[ArcArray] = ArcArray()
+        for start, end in zip(self.starts, self.ends):
+            # First allowed arc ending after the start of the arc.
+            i: int = bisect.bisect_right(allowed_ends, start)
+            while i < len(allowed_starts) and allowed_starts[i] < end:
+                new_arcs.append(max(start, allowed_starts[i]), min(end, allowed_ends[i]))
+                i = i + 1
+
+        return new_arcs
+
+    def exclude(self, sorted_excluded_arcs: ArcArray) -> ArcArray:
+        """Parts of the arcs outside the excluded arcs, see ArcAngles.exclude."""
+        starts: array.array = self.starts
+        ends: array.array = self.ends
+        for excluded_start, excluded_end in zip(sorted_excluded_arcs.starts, sorted_excluded_arcs.ends):
+            # Only the arcs from first to last overlap the excluded arc.
+            first: int = bisect.bisect_right(ends, excluded_start)
+            last: int = bisect.bisect_left(starts, excluded_end, first)
+            if first >= last:
+                continue
+
+            new_starts: array.array = starts[:first]
+            new_ends: array.array = ends[:first]
+            for start, end in zip(starts[first:last], ends[first:last]):
+                if excluded_start <= start:
+                    new_starts.append(excluded_end)
+                    new_ends.append(end)
+                elif excluded_end >= end:
+                    new_starts.append(start)
+                    new_ends.append(excluded_start)
+                else:
+                    new_starts.extend((start, excluded_end))
+                    new_ends.extend((excluded_start, end))
+            new_starts.extend(starts[last:])
+            new_ends.extend(ends[last:])
+            starts, ends = new_starts, new_ends
+
+        return ArcArray(starts, ends)
+
+
 class Arc:
     """Representation of an arc, for example a step on the stage."""
-    def __init__(self, circle: sympy.Circle, angles: ArcAngles) -> None:
-        self.circle: Final[sympy.Circle] = circle
+    def __init__(self, center: Point, radius: float, angles: ArcAngles) -> None:
+        self.center: Final[Point] = center
+        self.radius: Final[float] = radius
         self.angles: Final[ArcAngles] = angles
 
+    @functools.cached_property
+    def circle(self) -> sympy.Circle:
+        import sympy
+
+        return sympy.Circle(self.center, self.radius)
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """Bounds of the whole circle (x_min, y_min, x_max, y_max)."""
+        return (self.center.x - self.radius, self.center.y - self.radius, self.center.x + self.radius,
+                self.center.y + self.radius)
+
+    def enlarge(self, extra: float) -> Polygon:
+        """Polygon containing the points closer than extra to the arc, see float_geometry.Polygon.around_arc."""
+        import float_geometry
+
+        return Polygon(*[Polygon.exact_point(pos) for pos in float_geometry.Polygon.around_arc(self, extra).vertices])
+
     @staticmethod
-    def from_dict(dct: dict, stage_center: sympy.Point) -> Optional["Arc"]:
+    def from_dict(dct: dict, stage_center: Point) -> Optional["Arc"]:
         arc: Optional[dict] = dct.get("arc")
         if arc is None:
             return None
 
         radius: Final[Optional[int]] = arc.get("radius")
         if radius is None:
-            print(f"An arc has to contain a radius ({dct})")
+            logger.warning(f"An arc has to contain a radius ({dct})")
             return None
 
         angles: Final[Optional[ArcAngles]] = ArcAngles.from_dict(arc.get("angles"))
         if angles is None:
-            print(f"An arc has to contain angles ({dct})")
+            logger.warning(f"An arc has to contain angles ({dct})")
             return None
 
         dct_center: Optional[dict] = arc.get("center")
         center_from_dict: Final[Optional[Point]] = Point.from_dict(dct_center) if dct_center is not None else None
         center: Final[Point] = center_from_dict if center_from_dict is not None else stage_center
 
-        return Arc(sympy.Circle(center, radius), angles)
-
-    def get_bounds_as_sequence(self) -> Sequence[Tuple[int, int]]:
-        seq: List[Tuple[int, int]] = []
-        print(f"bounds = {self.circle.bounds}")
-        for pos in self.circle.bounds:
-            seq.append((pos.x, pos.y))
-
-        return seq
+        return Arc(center, radius, angles)
 
 
 class Dimension:
@@ -186,22 +351,22 @@ class Dimension:
     @staticmethod
     def from_dict(dct: dict) -> Optional["Polygon"]:
         if dct is None or "x" not in dct or "y" not in dct:
-            print(f"A dimension is not valid {dct}.")
+            logger.warning(f"A dimension is not valid {dct}.")
             return None
 
         x_max: Final[int] = dct["x"]
         y_max: Final[int] = dct["y"]
-        p0: Final[sympy.Point] = sympy.Point(0, 0)
-        p1: Final[sympy.Point] = sympy.Point(0, y_max)
-        p2: Final[sympy.Point] = sympy.Point(x_max, y_max)
-        p3: Final[sympy.Point] = sympy.Point(x_max, 0)
+        p0: Final[Point] = Point(0, 0)
+        p1: Final[Point] = Point(0, y_max)
+        p2: Final[Point] = Point(x_max, y_max)
+        p3: Final[Point] = Point(x_max, 0)
 
         return Polygon(p0, p1, p2, p3)
 
 
 class Areas(List[Union[Polygon, Arc]]):
     @staticmethod
-    def from_dict(list_areas: List[dict], stage_center: sympy.Point) -> "Areas":
+    def from_dict(list_areas: List[dict], stage_center: Point) -> "Areas":
         areas: List[Union[Polygon, Arc]] = list()
         for dict_area in list_areas:
             new_area: Optional[Union[Polygon, Arc]] = None
@@ -215,78 +380,15 @@ class Areas(List[Union[Polygon, Arc]]):
 
         return Areas(areas)
 
-    def enlarge(self, extra: int) -> "Areas":
-        new_areas: List[Union[Polygon, Arc]] = []
-        for area in self:
-            if isinstance(area, Polygon):
-                new_areas.append(area.enlarge(extra))
-
-        return Areas(new_areas)
+    def enlarge(self, extra: float) -> "Areas":
+        """The areas enlarged by extra, the arcs become the polygons around them."""
+        return Areas([area.enlarge(extra) for area in self])
 
 
-class Circle(sympy.Circle):
-    """Representation of a circle."""
-    def sort_points(self, points: List[sympy.Point], clockwise: bool) -> List[sympy.Point]:
-        return sorted(points, key=self.angle, reverse=clockwise)
-    
-    def get_first_intersection(self, intersections: List[sympy.Point], clockwise: bool) -> Optional[sympy.Point]:
-        """Get the first intersection from the given points in clockwise direction."""
-        if len(intersections) == 0:
-            return None
-        elif len(intersections) == 1:
-            return Point.round_point(intersections[0])
-
-        sorted_intersections: Final[List[sympy.Point]] = self.sort_points(intersections, clockwise)
-        return Point.round_point(sorted_intersections[0])
-
-    def intersection_arc_angles(self, polygon: Polygon) -> List[ArcAngles]:
-        angles: List[ArcAngles] = []
-        intersections_with_stage = self.sort_points(self.intersection(polygon.polygon), False)
-        number_of_intersection: Final[int] = len(intersections_with_stage)
-        if number_of_intersection == 0:
-            return angles
-
-        i: int = 1
-        while i < number_of_intersection:
-            current_angle: float = self.angle(intersections_with_stage[i])
-            is_last: bool = i == number_of_intersection - 1
-            other_angle: float = self.angle(intersections_with_stage[i-1])  # start with i = 1
-            arc_middle: sympy.Point = self.point((other_angle + current_angle) / 2)
-            if polygon.polygon.encloses_point(arc_middle):
-                angles.append(ArcAngles(other_angle, current_angle))
-                i = i + 2
-            else:
-                i = i + 1
+def __getattr__(name: str) -> type:
+    # The circle of the exact geometry derives from sympy.Circle, so it is only defined when it is first used.
+    if name == "Circle":
+        import sympy_geometry
 
-            if is_last:
-                other_angle = 360
-                arc_middle = self.point((other_angle + current_angle) / 2)
-                if polygon.polygon.encloses_point(arc_middle):
-                    angles.append(ArcAngles(current_angle, 360))
-                break
-
-        return angles
-
-    def point(self, angle_in_degrees: float) -> sympy.Point:
-        """Calculate the point of the circle corresponding to the given angle."""
-        from math import cos, sin, pi
-        angle_in_radians = angle_in_degrees * pi / 180
-        x = self.center.x + (self.radius * cos(angle_in_radians))
-        y = self.center.y + (self.radius * sin(angle_in_radians))
-
-        return sympy.Point(round(x), round(y))
-
-    def angle(self, pos: sympy.Point) -> float:
-        """Calculate the angle corresponding to the given point."""
-        from math import atan2, degrees
-        angle_in_radius = atan2(-(self.center.y - pos.y), pos.x - self.center.x)
-        angle_in_degrees = degrees(angle_in_radius)
-        if angle_in_degrees > 90:
-            return angle_in_degrees
-        else:
-            return 360 + angle_in_degrees
-
-    def perimeter(self, angles: ArcAngles) -> float:
-        percent: Final[float] = (abs(angles.end_angle - angles.start_angle)) / 360
-
-        return self.circumference * percent
+        return sympy_geometry.Circle
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
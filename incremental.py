@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import collections
+import math
+from typing import TYPE_CHECKING, Counter, Dict, Final, List, Optional, Tuple
+
+import float_geometry
+import layout
+import layout_cache
+import profiling
+import render
+import stage
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Pixels (left, top, right, bottom), right and bottom excluded.
+Box = Tuple[int, int, int, int]
+
+
+class IncrementalDrawing:
+    """Image of a hall which is kept up to date while the hall is edited.
+
+    The rows are memoized in a row cache, and only the region of the image whose drawing calls changed is drawn
+    again. The drawing calls are recorded (see render.TiledRasterRenderer) and compared to the previous ones.
+    """
+    def __init__(self, scale: float = 1.0, row_cache: Optional[layout_cache.RowCache] = None,
+                 cache: Optional[layout_cache.LayoutCache] = None) -> None:
+        self.scale: Final[float] = scale
+        self.row_cache: Final[layout_cache.RowCache] = row_cache if row_cache is not None \
+            else layout_cache.RowCache()
+        self.cache: Final[Optional[layout_cache.LayoutCache]] = cache
+        self.image: Optional[Image.Image] = None
+        self.plan: Optional[layout.SeatPlan] = None
+        self._counts: Counter[str] = collections.Counter()
+        self._bounds: Dict[str, float_geometry.Bounds] = {}
+
+    def update(self, hall: stage.Hall) -> List[Box]:
+        """Lay out and draw the hall, return the boxes of the pixels drawn again (empty if nothing changed)."""
+        plan: Final[layout.SeatPlan] = hall.compute_layout(cache=self.cache, row_cache=self.row_cache)
+        recorder: Final[render.TiledRasterRenderer] = render.TiledRasterRenderer(
+            int(hall.stage.bounds[2]), int(hall.stage.bounds[3]), self.scale)
+        hall.draw_plan(recorder, plan)
+
+        counts: Final[Counter[str]] = collections.Counter()
+        bounds: Final[Dict[str, float_geometry.Bounds]] = {}
+        for operation_bounds, operation in recorder.operations:
+            key: str = render.TiledRasterRenderer.operation_key(operation)
+            counts[key] = counts[key] + 1
+            bounds[key] = operation_bounds
+
+        self.plan = plan
+        previous_counts: Final[Counter[str]] = self._counts
+        previous_bounds: Final[Dict[str, float_geometry.Bounds]] = self._bounds
+        self._counts = counts
+        self._bounds = bounds
+
+        # The whole image is drawn the first time and when the stage size changed.
+        image: Final[Optional[Image.Image]] = self.image
+        if image is None or image.size != (recorder.pixel_width, recorder.pixel_height):
+            with profiling.span("repaint"):
+                self.image = recorder.draw_region((0, 0, recorder.pixel_width, recorder.pixel_height))
+            return [(0, 0, recorder.pixel_width, recorder.pixel_height)]
+
+        changed: Final[Counter[str]] = (counts - previous_counts) + (previous_counts - counts)
+        boxes: Final[List[Box]] = IncrementalDrawing.dirty_boxes(
+            [bounds[key] if key in bounds else previous_bounds[key] for key in changed], image.size)
+        with profiling.span("repaint"):
+            for box in boxes:
+                image.paste(recorder.draw_region(box), box[:2])
+
+        return boxes
+
+    def save(self, path: str) -> None:
+        if self.image is None:
+            raise ValueError("The hall has not been drawn yet, see update.")
+
+        with profiling.span("encode_png"):
+            self.image.save(path)
+
+    @staticmethod
+    def dirty_boxes(changed_bounds: List[float_geometry.Bounds], size: Tuple[int, int]) -> List[Box]:
+        """Disjoint pixel boxes inside the image covering all the changed bounds, overlapping bounds are merged."""
+        boxes: List[Box] = []
+        for bounds in changed_bounds:
+            # One more pixel on each side, for the rounding of the drawing calls.
+            box: Box = (max(0, math.floor(bounds[0]) - 1), max(0, math.floor(bounds[1]) - 1),
+                        min(size[0], math.ceil(bounds[2]) + 2), min(size[1], math.ceil(bounds[3]) + 2))
+            if box[0] >= box[2] or box[1] >= box[3]:
+                continue
+
+            # Merge with all the boxes it overlaps, the merged box may then overlap other ones.
+            merged: bool = True
+            while merged:
+                merged = False
+                for i, other in enumerate(boxes):
+                    if box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]:
+                        box = (min(box[0], other[0]), min(box[1], other[1]), max(box[2], other[2]),
+                               max(box[3], other[3]))
+                        del boxes[i]
+                        merged = True
+                        break
+            boxes.append(box)
+
+        return boxes
@@ -0,0 +1,133 @@
+import array
+from typing import Dict, Final, Iterable, Iterator, List, Optional
+
+import float_geometry
+import geometry
+
+
+class Seat:
+    """Center of a seat and the name of the instrument placed on it."""
+    __slots__ = ("x", "y", "angle", "row_index", "arc_index", "instrument")
+
+    def __init__(self, x: float, y: float, angle: float, row_index: int, arc_index: int,
+                 instrument: Optional[str]) -> None:
+        self.x: Final[float] = x
+        self.y: Final[float] = y
+        self.angle: Final[float] = angle
+        self.row_index: Final[int] = row_index
+        self.arc_index: Final[int] = arc_index
+        self.instrument: Final[Optional[str]] = instrument
+
+
+class SeatArray:
+    """Seats stored column by column in arrays, about 34 bytes per seat instead of about 130 for Seat objects.
+
+    The instruments are stored as indices in the instruments list, for plans kept in memory in large numbers.
+    """
+    __slots__ = ("x", "y", "angle", "row_index", "arc_index", "instrument_index", "instruments", "_indices")
+
+    def __init__(self) -> None:
+        self.x: Final[array.array] = array.array("d")
+        self.y: Final[array.array] = array.array("d")
+        self.angle: Final[array.array] = array.array("d")
+        self.row_index: Final[array.array] = array.array("i")
+        self.arc_index: Final[array.array] = array.array("i")
+        self.instrument_index: Final[array.array] = array.array("H")
+        self.instruments: Final[List[Optional[str]]] = []
+        self._indices: Final[Dict[Optional[str], int]] = {}
+
+    @staticmethod
+    def from_seats(seats: Iterable[Seat]) -> "SeatArray":
+        seat_array: Final[SeatArray] = SeatArray()
+        for seat in seats:
+            seat_array.append(seat)
+        return seat_array
+
+    def append(self, seat: Seat) -> None:
+        index: Optional[int] = self._indices.get(seat.instrument)
+        if index is None:
+            index = len(self.instruments)
+            self._indices[seat.instrument] = index
+            self.instruments.append(seat.instrument)
+
+        self.x.append(seat.x)
+        self.y.append(seat.y)
+        self.angle.append(seat.angle)
+        self.row_index.append(seat.row_index)
+        self.arc_index.append(seat.arc_index)
+        self.instrument_index.append(index)
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __getitem__(self, index: int) -> Seat:
+        return Seat(self.x[index], self.y[index], self.angle[index], self.row_index[index], self.arc_index[index],
+                    self.instruments[self.instrument_index[index]])
+
+    def __iter__(self) -> Iterator[Seat]:
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def n_bytes(self) -> int:
+        """Size of the arrays, the instrument names are shared with the rest of the program."""
+        return sum(values.itemsize * len(values) for values in (self.x, self.y, self.angle, self.row_index,
+                                                                self.arc_index, self.instrument_index))
+
+
+class ArcLayout:
+    """Part of a row which is on the stage, with its seats."""
+    def __init__(self, angles: geometry.ArcAngles, seats: List[Seat]) -> None:
+        self.angles: Final[geometry.ArcAngles] = angles
+        self.seats: Final[List[Seat]] = seats
+
+
+class RowLayout:
+    def __init__(self, index: int, center: float_geometry.Point, radius: float, arcs: List[ArcLayout]) -> None:
+        self.index: Final[int] = index
+        self.center: Final[float_geometry.Point] = center
+        self.radius: Final[float] = radius
+        self.arcs: Final[List[ArcLayout]] = arcs
+
+    @property
+    def seats(self) -> List[Seat]:
+        return [seat for arc in self.arcs for seat in arc.seats]
+
+
+class SeatPlan:
+    """Result of the layout of a hall: rows, arcs and seats, independent of any rendering."""
+    def __init__(self, rows: List[RowLayout]) -> None:
+        self.rows: Final[List[RowLayout]] = rows
+
+    @staticmethod
+    def from_dict(dct: dict) -> "SeatPlan":
+        """Read the geometry written by to_dict, the seats do not have any instrument."""
+        rows: List[RowLayout] = []
+        for dct_row in dct["rows"]:
+            arcs: List[ArcLayout] = []
+            for arc_index, dct_arc in enumerate(dct_row["arcs"]):
+                seats: List[Seat] = [Seat(x, y, angle, dct_row["index"], arc_index, None)
+                                     for x, y, angle in dct_arc["seats"]]
+                arcs.append(ArcLayout(geometry.ArcAngles(*dct_arc["angles"]), seats))
+            rows.append(RowLayout(dct_row["index"], float_geometry.Point(*dct_row["center"]), dct_row["radius"], arcs))
+
+        return SeatPlan(rows)
+
+    def to_dict(self) -> dict:
+        """Geometry of the plan (rows, arcs and seat coordinates) as json compatible dictionary."""
+        return {"rows": [{"index": row.index, "center": [row.center.x, row.center.y], "radius": row.radius,
+                          "arcs": [{"angles": [arc.angles.start_angle, arc.angles.end_angle],
+                                    "seats": [[seat.x, seat.y, seat.angle] for seat in arc.seats]}
+                                   for arc in row.arcs]}
+                         for row in self.rows]}
+
+    @property
+    def seats(self) -> List[Seat]:
+        return [seat for row in self.rows for seat in row.seats]
+
+    def to_array(self) -> SeatArray:
+        """All the seats in compact arrays, see SeatArray."""
+        return SeatArray.from_seats(self.seats)
+
+    @property
+    def n_seats(self) -> int:
+        return sum(len(arc.seats) for row in self.rows for arc in row.arcs)
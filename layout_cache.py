@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Final, Hashable, List, Optional
+
+import layout
+
+# Increase when the layout algorithm changes, so that old entries are not used any more.
+VERSION: Final[int] = 3
+DEFAULT_PATH: Final[Path] = Path(".layout_cache")
+DEFAULT_MAX_ENTRIES: Final[int] = 512
+DEFAULT_MAX_ROWS: Final[int] = 4096
+
+
+def create_key(geometry: dict) -> str:
+    """Hash of the canonical json of the given geometry relevant inputs."""
+    canonical: Final[str] = json.dumps({"version": VERSION, "geometry": geometry}, sort_keys=True,
+                                       separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LayoutCache:
+    """On disk cache of seat plan geometries, one json file per key, evicted least recently used first."""
+    def __init__(self, path: Path = DEFAULT_PATH, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.path: Final[Path] = Path(path)
+        self.max_entries: Final[int] = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, key: str) -> Optional[layout.SeatPlan]:
+        file: Final[Path] = self._file(key)
+        try:
+            with open(file, "r") as read_file:
+                plan: layout.SeatPlan = layout.SeatPlan.from_dict(json.load(read_file))
+        except (OSError, ValueError, KeyError, TypeError):
+            self.misses = self.misses + 1
+            return None
+
+        # The modification time is the last use of the entry.
+        try:
+            os.utime(file)
+        except OSError:
+            pass
+
+        self.hits = self.hits + 1
+        return plan
+
+    def put(self, key: str, plan: layout.SeatPlan) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, other processes may read the same key concurrently.
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(file_descriptor, "w") as write_file:
+            json.dump(plan.to_dict(), write_file)
+        os.replace(temporary_path, self._file(key))
+        self._evict()
+
+    def clear(self) -> None:
+        for file in self._entries():
+            file.unlink(missing_ok=True)
+
+    def _file(self, key: str) -> Path:
+        return self.path / (key + ".json")
+
+    def _entries(self) -> List[Path]:
+        return list(self.path.glob("*.json")) if self.path.is_dir() else []
+
+    def _evict(self) -> None:
+        entries: Final[List[Path]] = self._entries()
+        if len(entries) <= self.max_entries:
+            return
+
+        def last_use(file: Path) -> float:
+            try:
+                return file.stat().st_mtime
+            except OSError:
+                return 0
+
+        for file in sorted(entries, key=last_use)[:len(entries) - self.max_entries]:
+            file.unlink(missing_ok=True)
+
+
+class RowCache:
+    """In memory layouts of single rows, evicted least recently used first.
+
+    A row only depends on its own definition, its radius and the hall geometry around it, so after an edit only the
+    changed rows and the following rows whose radius moved are computed again.
+    """
+    def __init__(self, max_entries: int = DEFAULT_MAX_ROWS) -> None:
+        self.max_entries: Final[int] = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self._rows: Final[OrderedDict[Hashable, layout.RowLayout]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, key: Hashable) -> Optional[layout.RowLayout]:
+        row: Final[Optional[layout.RowLayout]] = self._rows.get(key)
+        if row is None:
+            self.misses = self.misses + 1
+            return None
+
+        self.hits = self.hits + 1
+        self._rows.move_to_end(key)
+        return row
+
+    def put(self, key: Hashable, row: layout.RowLayout) -> None:
+        self._rows[key] = row
+        self._rows.move_to_end(key)
+        while len(self._rows) > self.max_entries:
+            self._rows.popitem(last=False)
+
+    def clear(self) -> None:
+        self._rows.clear()
@@ -0,0 +1,120 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from typing import Dict, Final, Iterator, List, Optional, Sequence
+
+
+class Span:
+    """Named duration, times are in seconds since the start of the profiler."""
+    def __init__(self, name: str, start: float, duration: float, thread_id: int, args: dict) -> None:
+        self.name: Final[str] = name
+        self.start: Final[float] = start
+        self.duration: Final[float] = duration
+        self.thread_id: Final[int] = thread_id
+        self.args: Final[dict] = args
+
+
+class Profiler:
+    """Record spans and counters of the code running while it is active, see profile()."""
+    def __init__(self) -> None:
+        self.origin: Final[float] = time.perf_counter()
+        self.spans: Final[List[Span]] = []
+        self.counters: Final[Dict[str, int]] = {}
+        self._lock: Final[threading.Lock] = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name: str, **args) -> Iterator[None]:
+        start: Final[float] = time.perf_counter()
+        try:
+            yield
+        finally:
+            end: float = time.perf_counter()
+            with self._lock:
+                self.spans.append(Span(name, start - self.origin, end - start, threading.get_ident(), args))
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Number of calls and total seconds per span name."""
+        summary: Dict[str, Dict[str, float]] = {}
+        for span in self.spans:
+            entry: Dict[str, float] = summary.setdefault(span.name, {"calls": 0, "seconds": 0.0})
+            entry["calls"] = entry["calls"] + 1
+            entry["seconds"] = entry["seconds"] + span.duration
+        return summary
+
+    def to_dict(self, process_id: Optional[int] = None) -> dict:
+        """Chrome trace (chrome://tracing, Perfetto) with the counters and the summary as additional data."""
+        pid: Final[int] = os.getpid() if process_id is None else process_id
+        events: Final[List[dict]] = [{"name": span.name, "ph": "X", "ts": span.start * 1e6, "dur": span.duration * 1e6,
+                                      "pid": pid, "tid": span.thread_id, "args": span.args}
+                                     for span in self.spans]
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"counters": dict(self.counters), "summary": self.summary()}}
+
+
+_active: Optional[Profiler] = None
+
+
+@contextlib.contextmanager
+def profile() -> Iterator[Profiler]:
+    """Activate a new profiler for the code run inside the with block (in all threads)."""
+    global _active
+    previous: Final[Optional[Profiler]] = _active
+    profiler: Final[Profiler] = Profiler()
+    _active = profiler
+    try:
+        yield profiler
+    finally:
+        _active = previous
+
+
+def span(name: str, **args) -> contextlib.AbstractContextManager:
+    """Span of the active profiler, nothing is recorded if no profiler is active."""
+    if _active is None:
+        return contextlib.nullcontext()
+    return _active.span(name, **args)
+
+
+def timed(name: str):
+    """Decorator recording a span for each call of the function while a profiler is active."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return function(*args, **kwargs)
+            with _active.span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name: str, n: int = 1) -> None:
+    if _active is not None:
+        _active.count(name, n)
+
+
+def merge(traces: Sequence[dict]) -> dict:
+    """Merge the dictionaries of Profiler.to_dict, for example of several processes."""
+    merged: Final[dict] = {"traceEvents": [], "displayTimeUnit": "ms", "otherData": {"counters": {}, "summary": {}}}
+    for trace in traces:
+        merged["traceEvents"].extend(trace["traceEvents"])
+        for name, n in trace["otherData"]["counters"].items():
+            merged["otherData"]["counters"][name] = merged["otherData"]["counters"].get(name, 0) + n
+        for name, entry in trace["otherData"]["summary"].items():
+            merged_entry: dict = merged["otherData"]["summary"].setdefault(name, {"calls": 0, "seconds": 0.0})
+            merged_entry["calls"] = merged_entry["calls"] + entry["calls"]
+            merged_entry["seconds"] = merged_entry["seconds"] + entry["seconds"]
+    return merged
+
+
+def write(trace: dict, path: str) -> None:
+    with open(path, "w") as write_file:
+        json.dump(trace, write_file)
@@ -0,0 +1,442 @@
+from __future__ import annotations
+
+import abc
+import base64
+import functools
+import io
+import logging
+import math
+import struct
+import zlib
+from html import escape
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Callable, Dict, Final, List, Optional, Sequence, Tuple, Type, Union
+
+import float_geometry
+import profiling
+import sprites
+
+# Pillow is only imported when something is drawn or a sprite is loaded, the layout does not need it.
+if TYPE_CHECKING:
+    from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+Color = Tuple[int, int, int]
+Points = Sequence[Tuple[float, float]]
+
+FONT_PATH: Final[str] = "arial.ttf"
+FONT_FAMILY: Final[str] = "Arial, Helvetica, sans-serif"
+LINE_HEIGHT: Final[float] = 1.2
+WHITE: Final[Tuple[int, int, int, int]] = (255, 255, 255, 255)
+DEFAULT_STRIP_HEIGHT: Final[int] = 256
+
+
+@functools.lru_cache(maxsize=None)
+def load_font(size: int) -> Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]:
+    """Arial if it is installed, else the default font of Pillow."""
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype(FONT_PATH, size)
+    except OSError:
+        logger.warning(f"The font {FONT_PATH} is not available, the default font is used.")
+        try:
+            return ImageFont.load_default(size)
+        except TypeError:
+            # Pillow older than 10.1, the default font has a fixed size.
+            return ImageFont.load_default()
+
+
+class Renderer(abc.ABC):
+    """Drawing primitives of a stage plot, coordinates are stage centimeters with y pointing down.
+
+    The output has scale pixels per centimeter, sizes (line widths, fonts, sprites) are scaled alike."""
+    extension: str = ""
+
+    def __init__(self, width: int, height: int, scale: float = 1.0) -> None:
+        self.width: Final[int] = width
+        self.height: Final[int] = height
+        self.scale: Final[float] = scale
+        self.pixel_width: Final[int] = Renderer.pixels(width, scale)
+        self.pixel_height: Final[int] = Renderer.pixels(height, scale)
+
+    @abc.abstractmethod
+    def polygon(self, points: Points, outline: Optional[Color], fill: Optional[Color]) -> None:
+        pass
+
+    @abc.abstractmethod
+    def arc(self, bounds: Tuple[float, float, float, float], start_angle: float, end_angle: float, color: Color,
+            width: int) -> None:
+        """Arc of the ellipse inside bounds, angles are in degrees clockwise from the x axis like in Pillow."""
+
+    @abc.abstractmethod
+    def circle(self, x: float, y: float, radius: float, color: Color, width: int) -> None:
+        pass
+
+    @abc.abstractmethod
+    def line(self, points: Points, color: Color, width: int) -> None:
+        pass
+
+    @abc.abstractmethod
+    def sprite(self, path: Path, x: float, y: float, size: int) -> None:
+        """Image of path scaled to about size, centered on (x, y)."""
+
+    @abc.abstractmethod
+    def text(self, x: float, y: float, text: str, size: int, color: Color) -> None:
+        """Text, possibly on several lines, with (x, y) as top left corner."""
+
+    @abc.abstractmethod
+    def save(self, path: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def to_bytes(self) -> bytes:
+        """Content of the file written by save."""
+
+    def scaled(self, length: float) -> int:
+        """Length in pixels, at least one, of a size given in centimeters."""
+        return max(1, round(float(length) * self.scale))
+
+    def sprite_top_left(self, sprite: Image.Image, x: float, y: float) -> Tuple[int, int]:
+        """Top left pixel of the sprite centered on (x, y), kept inside the image."""
+        return max(0, int(float(x) * self.scale - sprite.size[0] / 2)), \
+            max(0, int(float(y) * self.scale - sprite.size[1] / 2))
+
+    @staticmethod
+    def pixels(length: float, scale: float) -> int:
+        return max(1, math.ceil(float(length) * scale))
+
+
+class RasterRenderer(Renderer):
+    """Draw in a Pillow image, saved as PNG (or as a PDF containing the image)."""
+    extension = "png"
+
+    def __init__(self, width: int, height: int, scale: float = 1.0, image_height: Optional[int] = None) -> None:
+        """image_height is the number of pixel rows of the image, all of them if None."""
+        from PIL import Image, ImageDraw
+
+        super().__init__(width, height, scale)
+        # Pixel of the whole drawing which is the top left pixel of the image.
+        self.offset_x: int = 0
+        self.offset_y: int = 0
+        self.image: Image.Image = Image.new(
+            "RGBA", (self.pixel_width, self.pixel_height if image_height is None else image_height), WHITE)
+        self._draw: ImageDraw.ImageDraw = ImageDraw.Draw(self.image)
+
+    def polygon(self, points: Points, outline: Optional[Color], fill: Optional[Color]) -> None:
+        self._draw.polygon(self._points(points), outline=outline, fill=fill)
+
+    def arc(self, bounds: Tuple[float, float, float, float], start_angle: float, end_angle: float, color: Color,
+            width: int) -> None:
+        self._draw.arc(self._box(bounds[0], bounds[1], bounds[2], bounds[3]), start=start_angle, end=end_angle,
+                       fill=color, width=self.scaled(width))
+
+    def circle(self, x: float, y: float, radius: float, color: Color, width: int) -> None:
+        self._draw.ellipse(self._box(x - radius, y - radius, x + radius, y + radius), outline=color,
+                           width=self.scaled(width))
+
+    def line(self, points: Points, color: Color, width: int) -> None:
+        self._draw.line(self._points(points), fill=color, width=self.scaled(width))
+
+    def sprite(self, path: Path, x: float, y: float, size: int) -> None:
+        image: Final[Image.Image] = sprites.SPRITES.get(path, self.scaled(size))
+        left, top = self.sprite_top_left(image, x, y)
+        left = left - self.offset_x
+        top = top - self.offset_y
+        if left + image.size[0] > 0 and top + image.size[1] > 0:
+            # A sprite starting left or above the image is only partly drawn.
+            self.image.alpha_composite(image, (max(0, left), max(0, top)), (max(0, -left), max(0, -top)))
+
+    def text(self, x: float, y: float, text: str, size: int, color: Color) -> None:
+        self._draw.text(self._point(x, y), text, fill=color, font=load_font(self.scaled(size)))
+
+    def save(self, path: str) -> None:
+        with profiling.span("encode_png"):
+            self.image.save(path)
+
+    def to_bytes(self) -> bytes:
+        png: Final[io.BytesIO] = io.BytesIO()
+        with profiling.span("encode_png"):
+            self.image.save(png, "PNG")
+        return png.getvalue()
+
+    def _point(self, x: float, y: float) -> Tuple[float, float]:
+        return float(x) * self.scale - self.offset_x, float(y) * self.scale - self.offset_y
+
+    def _points(self, points: Points) -> List[Tuple[float, float]]:
+        return [self._point(x, y) for x, y in points]
+
+    def _box(self, x_min: float, y_min: float, x_max: float, y_max: float) -> Tuple[int, int, int, int]:
+        # Pillow draws ellipses with fractional bounds differently when they are cut by the top of the image.
+        return round(float(x_min) * self.scale) - self.offset_x, round(float(y_min) * self.scale) - self.offset_y, \
+            round(float(x_max) * self.scale) - self.offset_x, round(float(y_max) * self.scale) - self.offset_y
+
+
+class TiledRasterRenderer(RasterRenderer):
+    """PNG drawn and written strip by strip, the memory used does not depend on the height of the image.
+
+    The drawing calls are recorded with their bounds and replayed for each strip they intersect. Any other region
+    of the drawing can be drawn alike, see draw_region.
+    """
+    def __init__(self, width: int, height: int, scale: float = 1.0,
+                 strip_height: int = DEFAULT_STRIP_HEIGHT) -> None:
+        self.strip_height: Final[int] = max(1, min(strip_height, Renderer.pixels(height, scale)))
+        # The image is replaced by each drawn region.
+        super().__init__(width, height, scale, 1)
+        self.operations: Final[List[Tuple[float_geometry.Bounds, Tuple[Callable, tuple]]]] = []
+        self._index: Optional[float_geometry.BoundsIndex[Tuple[Callable, tuple]]] = None
+
+    def polygon(self, points: Points, outline: Optional[Color], fill: Optional[Color]) -> None:
+        self._record(self._bounds(points, 1), RasterRenderer.polygon, (points, outline, fill))
+
+    def arc(self, bounds: Tuple[float, float, float, float], start_angle: float, end_angle: float, color: Color,
+            width: int) -> None:
+        self._record(self._bounds(((bounds[0], bounds[1]), (bounds[2], bounds[3])), self.scaled(width)),
+                     RasterRenderer.arc, (bounds, start_angle, end_angle, color, width))
+
+    def circle(self, x: float, y: float, radius: float, color: Color, width: int) -> None:
+        self._record(self._bounds(((x - radius, y - radius), (x + radius, y + radius)), self.scaled(width)),
+                     RasterRenderer.circle, (x, y, radius, color, width))
+
+    def line(self, points: Points, color: Color, width: int) -> None:
+        self._record(self._bounds(points, self.scaled(width)), RasterRenderer.line, (points, color, width))
+
+    def sprite(self, path: Path, x: float, y: float, size: int) -> None:
+        image: Final[Image.Image] = sprites.SPRITES.get(path, self.scaled(size))
+        left, top = self.sprite_top_left(image, x, y)
+        self._record((left, top, left + image.size[0], top + image.size[1]), RasterRenderer.sprite,
+                     (path, x, y, size))
+
+    def text(self, x: float, y: float, text: str, size: int, color: Color) -> None:
+        from PIL import ImageDraw
+
+        left, top, right, bottom = ImageDraw.Draw(self.image).multiline_textbbox(
+            (float(x) * self.scale, float(y) * self.scale), text, font=load_font(self.scaled(size)))
+        self._record((left, top, right, bottom), RasterRenderer.text, (x, y, text, size, color))
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as write_file:
+            self.write(write_file)
+
+    def to_bytes(self) -> bytes:
+        png: Final[io.BytesIO] = io.BytesIO()
+        self.write(png)
+        return png.getvalue()
+
+    def write(self, write_file: BinaryIO) -> None:
+        with profiling.span("encode_png"):
+            writer: Final[PngWriter] = PngWriter(write_file, self.pixel_width, self.pixel_height)
+            for top in range(0, self.pixel_height, self.strip_height):
+                writer.write(self.draw_region(
+                    (0, top, self.pixel_width, min(top + self.strip_height, self.pixel_height))))
+            writer.close()
+
+    def draw_region(self, box: Tuple[int, int, int, int]) -> Image.Image:
+        """Image of the pixels inside box (left, top, right, bottom), only the calls intersecting it are replayed."""
+        from PIL import Image, ImageDraw
+
+        if self._index is None or len(self._index) != len(self.operations):
+            self._index = float_geometry.BoundsIndex(self.operations)
+
+        self.image = Image.new("RGBA", (box[2] - box[0], box[3] - box[1]), WHITE)
+        self._draw = ImageDraw.Draw(self.image)
+        self.offset_x = box[0]
+        self.offset_y = box[1]
+        # The index returns the operations in the order they were recorded.
+        for method, args in self._index.query(box):
+            method(self, *args)
+        return self.image
+
+    @staticmethod
+    def operation_key(operation: Tuple[Callable, tuple]) -> str:
+        """Text identifying a recorded drawing call, equal for calls drawing the same pixels."""
+        return repr((operation[0].__name__, operation[1]))
+
+    def _record(self, bounds: float_geometry.Bounds, method: Callable, args: tuple) -> None:
+        self.operations.append((bounds, (method, args)))
+
+    def _bounds(self, points: Points, margin: float) -> float_geometry.Bounds:
+        x_values: Final[List[float]] = [float(x) * self.scale for x, _ in points]
+        y_values: Final[List[float]] = [float(y) * self.scale for _, y in points]
+        return min(x_values) - margin, min(y_values) - margin, max(x_values) + margin, max(y_values) + margin
+
+
+class PngWriter:
+    """Write a RGBA PNG strip by strip, only the compressed data of the current chunk is kept in memory."""
+    SIGNATURE: Final[bytes] = b"\x89PNG\r\n\x1a\n"
+    CHUNK_SIZE: Final[int] = 1 << 16
+
+    def __init__(self, write_file: BinaryIO, width: int, height: int) -> None:
+        self.write_file: Final[BinaryIO] = write_file
+        self.width: Final[int] = width
+        self.height: Final[int] = height
+        self.n_rows: int = 0
+        self._compressor = zlib.compressobj(6)
+        self._data: bytearray = bytearray()
+        write_file.write(PngWriter.SIGNATURE)
+        # 8 bits per channel, RGBA, no interlace.
+        self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+
+    def write(self, image: Image.Image) -> None:
+        """Append the rows of the image, which has the width of the PNG."""
+        if image.size[0] != self.width or self.n_rows + image.size[1] > self.height:
+            raise ValueError(f"The strip {image.size} does not fit in the remaining rows of the image.")
+        raw: Final[bytes] = image.convert("RGBA").tobytes()
+        stride: Final[int] = self.width * 4
+        for i in range(image.size[1]):
+            # Each row starts with its filter type, 0 is none.
+            self._data += self._compressor.compress(b"\x00" + raw[i * stride:(i + 1) * stride])
+            if len(self._data) >= PngWriter.CHUNK_SIZE:
+                self._write_chunk(b"IDAT", bytes(self._data))
+                self._data = bytearray()
+        self.n_rows = self.n_rows + image.size[1]
+
+    def close(self) -> None:
+        if self.n_rows != self.height:
+            raise ValueError(f"Only {self.n_rows} of {self.height} rows were written.")
+        self._data += self._compressor.flush()
+        self._write_chunk(b"IDAT", bytes(self._data))
+        self._write_chunk(b"IEND", b"")
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes) -> None:
+        self.write_file.write(struct.pack(">I", len(data)))
+        self.write_file.write(chunk_type)
+        self.write_file.write(data)
+        self.write_file.write(struct.pack(">I", zlib.crc32(chunk_type + data)))
+
+
+class PdfRenderer(RasterRenderer):
+    """Raster image in a PDF document, for printing."""
+    extension = "pdf"
+
+    def save(self, path: str) -> None:
+        with profiling.span("encode_pdf"):
+            self.image.convert("RGB").save(path, "PDF")
+
+    def to_bytes(self) -> bytes:
+        pdf: Final[io.BytesIO] = io.BytesIO()
+        with profiling.span("encode_pdf"):
+            self.image.convert("RGB").save(pdf, "PDF")
+        return pdf.getvalue()
+
+
+class SvgRenderer(Renderer):
+    """Vector drawing, each sprite is embedded once and the seats reference it with <use>."""
+    extension = "svg"
+
+    def __init__(self, width: int, height: int, scale: float = 1.0) -> None:
+        super().__init__(width, height, scale)
+        self._definitions: Final[List[str]] = []
+        self._sprite_ids: Final[Dict[Tuple[Path, int], str]] = {}
+        self._elements: Final[List[str]] = []
+
+    def polygon(self, points: Points, outline: Optional[Color], fill: Optional[Color]) -> None:
+        self._elements.append(f'<polygon points="{SvgRenderer.points(points)}" '
+                              f'fill="{SvgRenderer.color(fill)}" stroke="{SvgRenderer.color(outline)}"/>')
+
+    def arc(self, bounds: Tuple[float, float, float, float], start_angle: float, end_angle: float, color: Color,
+            width: int) -> None:
+        center_x: Final[float] = (bounds[0] + bounds[2]) / 2
+        center_y: Final[float] = (bounds[1] + bounds[3]) / 2
+        radius_x: Final[float] = (bounds[2] - bounds[0]) / 2
+        radius_y: Final[float] = (bounds[3] - bounds[1]) / 2
+        sweep: Final[float] = (end_angle - start_angle) % 360
+        start: Final[float] = math.radians(start_angle)
+        end: Final[float] = math.radians(start_angle + sweep)
+        self._elements.append(
+            f'<path d="M {center_x + radius_x * math.cos(start):g} {center_y + radius_y * math.sin(start):g} '
+            f'A {radius_x:g} {radius_y:g} 0 {1 if sweep > 180 else 0} 1 '
+            f'{center_x + radius_x * math.cos(end):g} {center_y + radius_y * math.sin(end):g}" '
+            f'fill="none" stroke="{SvgRenderer.color(color)}" stroke-width="{width}"/>')
+
+    def circle(self, x: float, y: float, radius: float, color: Color, width: int) -> None:
+        self._elements.append(f'<circle cx="{x:g}" cy="{y:g}" r="{radius:g}" fill="none" '
+                              f'stroke="{SvgRenderer.color(color)}" stroke-width="{width}"/>')
+
+    def line(self, points: Points, color: Color, width: int) -> None:
+        self._elements.append(f'<polyline points="{SvgRenderer.points(points)}" fill="none" '
+                              f'stroke="{SvgRenderer.color(color)}" stroke-width="{width}"/>')
+
+    def sprite(self, path: Path, x: float, y: float, size: int) -> None:
+        # The sprite is embedded with the resolution it would have in a PNG of the same scale.
+        image: Final[Image.Image] = sprites.SPRITES.get(path, self.scaled(size))
+        sprite_id: Final[str] = self.define_sprite(path, image)
+        left, top = self.sprite_top_left(image, x, y)
+        self._elements.append(f'<use href="#{sprite_id}" x="{left / self.scale:g}" y="{top / self.scale:g}"/>')
+
+    def define_sprite(self, path: Path, image: Image.Image) -> str:
+        key: Final[Tuple[Path, int]] = (Path(path), max(image.size))
+        sprite_id: Optional[str] = self._sprite_ids.get(key)
+        if sprite_id is None:
+            sprite_id = f"sprite{len(self._sprite_ids)}"
+            self._sprite_ids[key] = sprite_id
+            png: Final[io.BytesIO] = io.BytesIO()
+            image.save(png, "PNG")
+            self._definitions.append(f'<image id="{sprite_id}" width="{image.size[0] / self.scale:g}" '
+                                     f'height="{image.size[1] / self.scale:g}" '
+                                     f'href="data:image/png;base64,{base64.b64encode(png.getvalue()).decode()}"/>')
+        return sprite_id
+
+    def text(self, x: float, y: float, text: str, size: int, color: Color) -> None:
+        x, y = float(x), float(y)
+        lines: Final[str] = "".join(f'<tspan x="{x:g}" dy="{LINE_HEIGHT if i > 0 else 1}em">'
+                                    f'{escape(line, quote=False)}</tspan>'
+                                    for i, line in enumerate(text.split("\n")))
+        self._elements.append(f'<text x="{x:g}" y="{y:g}" font-family="{escape(FONT_FAMILY)}" font-size="{size}" '
+                              f'fill="{SvgRenderer.color(color)}">{lines}</text>')
+
+    def to_string(self) -> str:
+        return "\n".join([f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.pixel_width}" '
+                          f'height="{self.pixel_height}" '
+                          f'viewBox="0 0 {self.width} {self.height}">',
+                          f'<rect width="{self.width}" height="{self.height}" fill="white"/>',
+                          "<defs>", *self._definitions, "</defs>",
+                          *self._elements, "</svg>", ""])
+
+    def save(self, path: str) -> None:
+        with profiling.span("encode_svg"):
+            with open(path, "w", encoding="utf-8") as write_file:
+                write_file.write(self.to_string())
+
+    def to_bytes(self) -> bytes:
+        return self.to_string().encode("utf-8")
+
+    @staticmethod
+    def color(color: Optional[Color]) -> str:
+        return "none" if color is None else f"rgb({color[0]},{color[1]},{color[2]})"
+
+    @staticmethod
+    def points(points: Points) -> str:
+        return " ".join(f"{float(x):g},{float(y):g}" for x, y in points)
+
+
+RENDERERS: Final[Dict[str, Type[Renderer]]] = {
+    RasterRenderer.extension: RasterRenderer,
+    SvgRenderer.extension: SvgRenderer,
+    PdfRenderer.extension: PdfRenderer,
+}
+
+
+class Options:
+    """How a hall is rendered: output format, pixels per centimeter and height in pixels of the PNG strips.
+
+    Without strip height, the whole PNG is drawn in memory.
+    """
+    def __init__(self, output_format: str = RasterRenderer.extension, scale: float = 1.0,
+                 strip_height: Optional[int] = None) -> None:
+        if output_format not in RENDERERS:
+            raise ValueError(f"Unknown output format {output_format}, only {list(RENDERERS)} are supported.")
+        if scale <= 0:
+            raise ValueError(f"The scale has to be positive ({scale}).")
+        if strip_height is not None and strip_height < 1:
+            raise ValueError(f"The strip height has to be positive ({strip_height}).")
+        self.output_format: Final[str] = output_format
+        self.scale: Final[float] = scale
+        self.strip_height: Final[Optional[int]] = strip_height
+
+    def create(self, width: int, height: int) -> Renderer:
+        """Renderer for a stage of width x height centimeters."""
+        if self.strip_height is not None and self.output_format == RasterRenderer.extension:
+            return TiledRasterRenderer(width, height, self.scale, self.strip_height)
+        return RENDERERS[self.output_format](width, height, self.scale)
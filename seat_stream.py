@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Final, List, Optional, Sequence, TextIO
+
+import batch
+import layout
+import layout_cache
+import stage
+
+logger = logging.getLogger(__name__)
+
+
+def seat_to_dict(hall: stage.Hall, seat: layout.Seat) -> dict:
+    return {"hall": hall.name, "distancing": hall.distancing, "row_distancing": hall.rows.n_distancing_row,
+            "row_index": seat.row_index, "arc_index": seat.arc_index, "x": seat.x, "y": seat.y, "angle": seat.angle,
+            "instrument": seat.instrument}
+
+
+def write_seats(hall: stage.Hall, write_file: TextIO, row_cache: Optional[layout_cache.RowCache] = None) -> int:
+    """Write the seats of the hall as newline delimited json, one line per seat, and return their number.
+
+    The lines of a row are flushed as soon as it is laid out, the plan of the hall is never built."""
+    n_seats: int = 0
+    for row in hall.iter_rows(row_cache=row_cache):
+        for arc in row.arcs:
+            for seat in arc.seats:
+                write_file.write(json.dumps(seat_to_dict(hall, seat)) + "\n")
+            n_seats = n_seats + len(arc.seats)
+        write_file.flush()
+
+    return n_seats
+
+
+def write_halls(files: batch.HallFiles, distancings: Sequence[int], row_distancings: Sequence[int],
+                write_file: TextIO) -> int:
+    """Write the seats of the halls for each combination of the distancing values (the ones of the hall if empty),
+    return the number of files which could not be read."""
+    row_cache: Final[layout_cache.RowCache] = layout_cache.RowCache()
+    for _, hall in files.halls():
+        for distancing in distancings if distancings else [hall.distancing]:
+            for row_distancing in row_distancings if row_distancings else [hall.rows.n_distancing_row]:
+                write_seats(hall.with_distancing(distancing, row_distancing, hall.rows.n_distancing_delta_first_row),
+                            write_file, row_cache)
+
+    return files.n_failed
+
+
+def main(arguments: Sequence[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write the seats of halls as newline delimited json, one line per "
+                                                 "seat, without drawing them. The lines are written as the rows are "
+                                                 "laid out, so that they can be piped to another process.")
+    parser.add_argument("halls", nargs="+", help="hall json files, directories or glob patterns")
+    parser.add_argument("--distancing", type=batch.parse_values, nargs="+", default=[],
+                        help="distancing values or ranges start:stop:step (default: the one of the hall)")
+    parser.add_argument("--row-distancing", type=batch.parse_values, nargs="+", default=[],
+                        help="row distancing values or ranges (default: the one of the hall)")
+    parser.add_argument("--output", type=Path, help="file of the seats (default: standard output)")
+    args = parser.parse_args(arguments)
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    start: Final[float] = time.perf_counter()
+    files: Final[batch.HallFiles] = batch.HallFiles(batch.collect_files(args.halls))
+    distancings: Final[List[int]] = [value for values in args.distancing for value in values]
+    row_distancings: Final[List[int]] = [value for values in args.row_distancing for value in values]
+    try:
+        if args.output is None:
+            n_failed: int = write_halls(files, distancings, row_distancings, sys.stdout)
+        else:
+            with open(args.output, "w", encoding="utf-8") as write_file:
+                n_failed = write_halls(files, distancings, row_distancings, write_file)
+    except BrokenPipeError:
+        # The reading process stopped, for example head, nothing more can be written to the standard output.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+
+    print(files.summary(time.perf_counter() - start), file=sys.stderr)
+    return 1 if n_failed > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
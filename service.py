@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Final, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import layout
+import layout_cache
+import render
+import seat_stream
+import sprites
+import stage
+import validator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST: Final[str] = "127.0.0.1"
+DEFAULT_PORT: Final[int] = 8080
+MAX_BODY_BYTES: Final[int] = 16 * 1024 * 1024
+JSON_FORMAT: Final[str] = "json"
+CONTENT_TYPES: Final[Dict[str, str]] = {
+    render.RasterRenderer.extension: "image/png",
+    render.SvgRenderer.extension: "image/svg+xml",
+    render.PdfRenderer.extension: "application/pdf",
+    JSON_FORMAT: "application/json",
+}
+REASONS: Final[Dict[int, str]] = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                                  413: "Payload Too Large", 500: "Internal Server Error"}
+
+# Caches of a worker process, they stay warm from one request to the next (see init_worker).
+_row_cache: Optional[layout_cache.RowCache] = None
+_cache: Optional[layout_cache.LayoutCache] = None
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status: Final[int] = status
+
+
+def init_worker(cache_path: Optional[Path] = None) -> None:
+    """Create the caches of the worker process and decode the sprites before the first request."""
+    global _row_cache, _cache
+    _row_cache = layout_cache.RowCache()
+    _cache = layout_cache.LayoutCache(cache_path) if cache_path is not None else None
+    sprites.SPRITES.preload([instrument.path for instrument in stage.INSTRUMENTS.values()
+                             if instrument.path is not None] + [stage.PERCUSSION_PATH], stage.SPRITE_SIZE)
+
+
+def create_executor(n_processes: Optional[int] = None, cache_path: Optional[Path] = None) -> ProcessPoolExecutor:
+    """Worker pool of the service, the layout cache is in cache_path if given.
+
+    The workers are started by a fork server, or spawned where there is none (Windows): a worker forked from the
+    service would keep the connections open at that time open, and their clients would wait for the end of the
+    response until the worker exits."""
+    start_method: Final[str] = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=n_processes, mp_context=multiprocessing.get_context(start_method),
+                               initializer=init_worker, initargs=(cache_path,))
+
+
+def render_hall(dct: dict, output_format: str, scale: float) -> bytes:
+    """Lay out the hall with the caches of the worker and encode it, the json format lists the seats."""
+    hall: Final[Optional[stage.Hall]] = stage.Hall.from_dict(dct)
+    if hall is None:
+        raise ValueError("invalid hall")
+
+    plan: Final[layout.SeatPlan] = hall.compute_layout(cache=_cache, row_cache=_row_cache)
+    if output_format == JSON_FORMAT:
+        return json.dumps({"hall": hall.name, "n_seats": plan.n_seats,
+                           "seats": [seat_stream.seat_to_dict(hall, seat) for seat in plan.seats]}).encode("utf-8")
+
+    return hall.render_plan(plan, render.Options(output_format, scale)).to_bytes()
+
+
+class RenderService:
+    """HTTP service drawing the hall posted to /render?format=png|svg|pdf|json&scale=1.
+
+    The layout and the drawing run in the worker pool, the event loop only parses and validates the requests.
+    Identical requests received while one of them is rendered share its result.
+    """
+    def __init__(self, executor: Executor) -> None:
+        self.executor: Final[Executor] = executor
+        self.n_renders: int = 0
+        self.n_coalesced: int = 0
+        self._pending: Final[Dict[Tuple[str, str, float], asyncio.Future]] = {}
+
+    async def render(self, dct: dict, output_format: str, scale: float) -> bytes:
+        key: Final[Tuple[str, str, float]] = (json.dumps(dct, sort_keys=True), output_format, scale)
+        future: Optional[asyncio.Future] = self._pending.get(key)
+        if future is not None:
+            self.n_coalesced = self.n_coalesced + 1
+            return await asyncio.shield(future)
+
+        self.n_renders = self.n_renders + 1
+        future = asyncio.get_running_loop().run_in_executor(self.executor, render_hall, dct, output_format, scale)
+        self._pending[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._pending.pop(key, None)
+
+    async def handle_request(self, method: str, target: str, body: bytes) -> Tuple[int, str, bytes]:
+        """Status, content type and content of the response."""
+        url: Final = urlsplit(target)
+        if url.path != "/render":
+            raise HttpError(404, f"unknown path {url.path}, only /render exists")
+        if method != "POST":
+            raise HttpError(405, "the hall has to be posted")
+
+        query: Final[Dict[str, List[str]]] = parse_qs(url.query)
+        output_format: Final[str] = query.get("format", [render.RasterRenderer.extension])[-1]
+        if output_format not in CONTENT_TYPES:
+            raise HttpError(400, f"unknown format {output_format}, only {list(CONTENT_TYPES)} are supported")
+        try:
+            scale: float = float(query.get("scale", ["1"])[-1])
+            dct: object = json.loads(body)
+        except ValueError as error:
+            raise HttpError(400, str(error))
+        if not 0 < scale <= 10:
+            raise HttpError(400, f"the scale has to be between 0 and 10 ({scale})")
+
+        # Without the arcs, the validation only walks the json values, like json.loads it stays on the event loop.
+        errors: Final[List[validator.ValidationError]] = validator.validate(dct, check_arcs=False)
+        # The validator accepts only an object, see validator.Validator.validate.
+        if len(errors) > 0 or not isinstance(dct, dict):
+            raise HttpError(400, "\n".join(str(error) for error in errors))
+
+        try:
+            content: bytes = await self.render(dct, output_format, scale)
+        except ValueError as error:
+            raise HttpError(400, str(error))
+        return 200, CONTENT_TYPES[output_format], content
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer one HTTP/1.1 request, then close the connection."""
+        status: int = 500
+        content_type: str = "text/plain; charset=utf-8"
+        content: bytes = b""
+        try:
+            method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+            headers: Dict[str, str] = {}
+            while (line := (await reader.readline()).decode("latin-1").strip()) != "":
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length: int = int(headers.get("content-length", "0"))
+            if length > MAX_BODY_BYTES:
+                raise HttpError(413, f"the hall is larger than {MAX_BODY_BYTES} bytes")
+            status, content_type, content = await self.handle_request(method, target,
+                                                                      await reader.readexactly(length))
+        except HttpError as error:
+            status, content = error.status, str(error).encode("utf-8")
+        except (ValueError, asyncio.IncompleteReadError) as error:
+            status, content = 400, f"invalid request: {error}".encode("utf-8")
+        except Exception as error:
+            logger.exception("The request could not be answered.")
+            content = f"{type(error).__name__}: {error}".encode("utf-8")
+
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(content)}\r\nConnection: close\r\n\r\n".encode("latin-1") + content)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.Server:
+        """Listen on host and port (any free port if 0), see the sockets of the server for the port."""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def serve(host: str, port: int, n_processes: Optional[int], cache_path: Optional[Path]) -> None:
+    with create_executor(n_processes, cache_path) as executor:
+        server: Final[asyncio.Server] = await RenderService(executor).start(host, port)
+        logger.info(f"Listening on http://{host}:{server.sockets[0].getsockname()[1]}/render")
+        async with server:
+            await server.serve_forever()
+
+
+def main(arguments: Sequence[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the stage plots of the halls posted as json to "
+                                                 "/render?format=png|svg|pdf|json&scale=1 over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--jobs", type=int, default=None, help="number of processes (default: number of cores)")
+    parser.add_argument("--cache-dir", type=Path, default=layout_cache.DEFAULT_PATH,
+                        help=f"directory of the layout cache (default: {layout_cache.DEFAULT_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="always compute the layout, bypassing the cache")
+    args = parser.parse_args(arguments)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port, args.jobs, None if args.no_cache else args.cache_dir))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,188 @@
+import copy
+import json
+import logging
+import math
+import sys
+import time
+from typing import Final, List, Optional, Sequence
+
+import float_geometry
+import geometry
+import stage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RADIUS_STEP: Final[int] = 5
+# The arcs are made a little longer than needed, so that rounding errors do not remove a seat.
+ANGLE_MARGIN: Final[float] = 1e-6
+FRONT_ANGLE: Final[float] = 270
+
+
+class RowSolution:
+    """Radius and arcs of a row, angles is None if the row does not have instruments to fit."""
+    def __init__(self, index: int, radius: int, angles: Optional[List[geometry.ArcAngles]],
+                 n_candidates: int) -> None:
+        self.index: Final[int] = index
+        self.radius: Final[int] = radius
+        self.angles: Final[Optional[List[geometry.ArcAngles]]] = angles
+        self.n_candidates: Final[int] = n_candidates
+
+
+class Solution:
+    def __init__(self, rows: List[RowSolution], seconds: float) -> None:
+        self.rows: Final[List[RowSolution]] = rows
+        self.seconds: Final[float] = seconds
+
+    @property
+    def n_candidates(self) -> int:
+        return sum(row.n_candidates for row in self.rows)
+
+    def apply(self, dct: dict) -> dict:
+        """Copy of the hall dictionary with the radius and the angles of the solved rows."""
+        new_dct: Final[dict] = copy.deepcopy(dct)
+        dct_rows: Final[List[Optional[dict]]] = new_dct["rows"]["list"]
+        for row in self.rows:
+            # A row with instruments is not null in the dictionary.
+            dct_row: Optional[dict] = dct_rows[row.index]
+            if row.angles is None or dct_row is None:
+                continue
+            dct_row["radius"] = row.radius
+            dct_row["angles"] = [{"start": angles.start_angle, "end": angles.end_angle} for angles in row.angles]
+
+        return new_dct
+
+
+def solve(hall: stage.Hall, radius_step: int = DEFAULT_RADIUS_STEP) -> Optional[Solution]:
+    """Find for each row with instruments the smallest radius and the narrowest arcs fitting all its instruments.
+
+    The rows are solved in order, as the smallest radius of a row depends on the radius of the previous one. Each
+    candidate radius only costs a clipping of the row circle with the float geometry. The angles of a row (the
+    default ones if none are given) bound the arcs which are searched. A null group of instruments is laid out with
+    as many seats as fit on its arc, so it only needs an arc for one seat.
+    """
+    start: Final[float] = time.perf_counter()
+    row_distancing: Final[int] = max(hall.distancing, hall.rows.n_distancing_row)
+
+    solutions: List[RowSolution] = []
+    radius: int = hall.rows.n_distancing_delta_first_row
+    for row_index, row in enumerate(hall.rows.rows):
+        min_radius: int = radius + row_distancing
+        if row is None or row.instruments is None:
+            radius = max(min_radius, row.radius if row is not None and row.radius is not None else min_radius)
+            solutions.append(RowSolution(row_index, radius, None, 0))
+            continue
+
+        center: float_geometry.Point = float_geometry.Point.from_any(
+            hall.rows.center if row.center is None else row.center)
+        n_seats: List[int] = [len(instruments) if instruments is not None else 1 for instruments in row.instruments]
+        # Beyond the farthest vertex of the stage, the circle does not intersect the stage anymore.
+        max_radius: float = max(center.distance(vertex) for vertex in hall.float_stage_for_seats.vertices)
+        n_candidates: int = 0
+        angles: Optional[List[geometry.ArcAngles]] = None
+        candidate: int = min_radius
+        while angles is None and candidate <= max_radius:
+            n_candidates = n_candidates + 1
+            angles = fit_row(hall.clip_row(row, float_geometry.Circle(center, candidate)), n_seats,
+                             hall.distancing, candidate)
+            if angles is None:
+                candidate = candidate + radius_step
+
+        if angles is None:
+            logger.warning(f"The instruments of the row {row_index} do not fit on the stage.")
+            return None
+
+        radius = candidate
+        solutions.append(RowSolution(row_index, radius, angles, n_candidates))
+
+    return Solution(solutions, time.perf_counter() - start)
+
+
+def fit_row(available_arcs: Sequence[geometry.ArcAngles], n_seats: Sequence[int], distancing: float,
+            radius: float) -> Optional[List[geometry.ArcAngles]]:
+    """Narrowest arcs, one per group of n_seats, inside the available arcs, as close to the front as possible.
+
+    Consecutive groups are kept at least distancing apart. None if the groups do not fit.
+    """
+    if len(n_seats) == 0 or radius <= 0:
+        return None
+
+    spans: Final[List[float]] = [math.degrees((n - 1) * distancing / radius) + ANGLE_MARGIN if n > 1 else 0
+                                 for n in n_seats]
+    gap: Final[float] = math.degrees(distancing / radius) + ANGLE_MARGIN
+    block: Final[float] = sum(spans) + gap * (len(spans) - 1)
+
+    # All groups in one arc, centered on the front if possible.
+    for arc in available_arcs:
+        if arc.end_angle - arc.start_angle >= block:
+            block_start: float = min(max(FRONT_ANGLE - block / 2, arc.start_angle), arc.end_angle - block)
+            return pack(block_start, spans, gap)
+
+    # Else the groups are spread over the arcs, each one in the first place it fits.
+    arcs: List[geometry.ArcAngles] = []
+    arc_index: int = 0
+    position: float = -math.inf
+    for span in spans:
+        while arc_index < len(available_arcs):
+            available_arc: geometry.ArcAngles = available_arcs[arc_index]
+            group_start: float = max(position, available_arc.start_angle)
+            if available_arc.end_angle - group_start >= span:
+                arcs.append(geometry.ArcAngles(group_start, group_start + span))
+                position = group_start + span + gap
+                break
+            arc_index = arc_index + 1
+        else:
+            return None
+
+    return arcs
+
+
+def pack(start_angle: float, spans: Sequence[float], gap: float) -> List[geometry.ArcAngles]:
+    arcs: List[geometry.ArcAngles] = []
+    position: float = start_angle
+    for span in spans:
+        arcs.append(geometry.ArcAngles(position, position + span))
+        position = position + span + gap
+
+    return arcs
+
+
+def main(arguments: Sequence[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compute the radius and the angles of each row of a hall so that "
+                                                 "its instruments fit as close to the center as possible.")
+    parser.add_argument("hall", help="hall json file, the instruments of its rows are the ones to fit")
+    parser.add_argument("--step", type=int, default=DEFAULT_RADIUS_STEP,
+                        help=f"radius step in cm between candidates (default: {DEFAULT_RADIUS_STEP})")
+    parser.add_argument("--output", help="json file to write the hall with the solved rows to (default: stdout)")
+    args = parser.parse_args(arguments)
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    with open(args.hall, "r") as read_file:
+        dct: dict = json.load(read_file)
+    hall: Optional[stage.Hall] = stage.Hall.from_dict(dct)
+    if hall is None:
+        return 1
+
+    solution: Optional[Solution] = solve(hall, max(1, args.step))
+    if solution is None:
+        return 1
+
+    for row in solution.rows:
+        if row.angles is not None:
+            s_angles: str = ", ".join(f"{angles.start_angle:.2f}-{angles.end_angle:.2f}" for angles in row.angles)
+            print(f"row {row.index}: radius {row.radius} cm, angles {s_angles}", file=sys.stderr)
+    print(f"{solution.n_candidates} candidates in {solution.seconds * 1000:.1f} ms.", file=sys.stderr)
+
+    s_hall: Final[str] = json.dumps(solution.apply(dct), indent=2)
+    if args.output is None:
+        print(s_hall)
+    else:
+        with open(args.output, "w") as write_file:
+            write_file.write(s_hall)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Final, Iterable, Tuple
+
+import profiling
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES: Final[int] = 64 * 1024 * 1024
+
+
+class SpriteCache:
+    """Decoded and scaled images, keyed by (path, target size) and evicted least recently used first."""
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes: Final[int] = max_bytes
+        self.n_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self._sprites: Final[OrderedDict[Tuple[Path, int], Image.Image]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sprites)
+
+    @staticmethod
+    def load(path: Path, target_size: int) -> Image.Image:
+        """Decode the image and reduce it so its biggest side is about target_size pixels."""
+        from PIL import Image
+
+        profiling.count("sprite_loads")
+        with Image.open(path) as image_original:
+            image_original.load()
+            n_max_size: Final[int] = max(image_original.size[0], image_original.size[1])
+            return image_original.convert("RGBA").reduce(max(1, int(n_max_size / target_size)))
+
+    def get(self, path: Path, target_size: int) -> Image.Image:
+        """Return the scaled image, the returned image is shared and must not be modified."""
+        key: Final[Tuple[Path, int]] = (Path(path), target_size)
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self.hits = self.hits + 1
+            self._sprites.move_to_end(key)
+            return sprite
+
+        self.misses = self.misses + 1
+        sprite = SpriteCache.load(key[0], target_size)
+        self._sprites[key] = sprite
+        self.n_bytes = self.n_bytes + SpriteCache._size_in_bytes(sprite)
+        self._evict()
+        return sprite
+
+    def preload(self, paths: Iterable[Path], target_size: int) -> None:
+        for path in paths:
+            try:
+                self.get(path, target_size)
+            except OSError as error:
+                logger.warning(f"The image {path} could not be preloaded ({error}).")
+
+    def clear(self) -> None:
+        self._sprites.clear()
+        self.n_bytes = 0
+
+    def _evict(self) -> None:
+        # Keep at least the newest sprite, even if it is bigger than the limit.
+        while self.n_bytes > self.max_bytes and len(self._sprites) > 1:
+            _, sprite = self._sprites.popitem(last=False)
+            self.n_bytes = self.n_bytes - SpriteCache._size_in_bytes(sprite)
+
+    @staticmethod
+    def _size_in_bytes(sprite: Image.Image) -> int:
+        return sprite.size[0] * sprite.size[1] * len(sprite.getbands())
+
+
+SPRITES: Final[SpriteCache] = SpriteCache()
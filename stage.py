@@ -1,20 +1,33 @@
+from __future__ import annotations
+
+import functools
+import logging
 import math
-import sympy
+import os
 from pathlib import Path
 
-from PIL import Image, ImageDraw, ImageFont
-
-from typing import Final, Dict, List, Optional
+from typing import TYPE_CHECKING, Final, Dict, Iterator, List, Optional, Union
+import float_geometry
 import geometry
+import layout
+import layout_cache
+import profiling
+import render
+import sprites
 
-n_seats = 0
+if TYPE_CHECKING:
+    import sympy
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_ANGLES: Final[geometry.ArcAngles] = geometry.ArcAngles(190, 350)
 RADIUS_SEAT: Final[int] = 25
+SPRITE_SIZE: Final[int] = 100
 
 
 class Instrument:
-    def __init__(self, path: Optional[Path]) -> None:
+    def __init__(self, name: Optional[str], path: Optional[Path]) -> None:
+        self.name: Final[Optional[str]] = name
         self.path: Final[Optional[Path]] = path
 
     @staticmethod
@@ -35,69 +48,67 @@ class Instrument:
                     if instrument is not None:
                         list_instruments.append(instrument)
                     else:
-                        print(f"The chosen instrument {s_instrument} does not exist, only the following are accepted: "
-                              f"{INSTRUMENTS.keys}.")
+                        logger.warning(f"The chosen instrument {s_instrument} does not exist, only the following are "
+                                       f"accepted: {list(INSTRUMENTS.keys())}.")
                         list_instruments.append(INSTRUMENTS[None])
 
                 if len(list_instruments) == 0:
-                    print(f"An empty list of instrument was specified, it is not valid (will be replaced by None).")
+                    logger.warning("An empty list of instrument was specified, it is not valid (will be replaced by "
+                                   "None).")
                     return None
 
                 list_instruments_per_part.append(list_instruments)
 
         return list_instruments_per_part
 
-    def draw(self, im: Image, center: sympy.Point) -> None:
-        global n_seats
-        n_seats = n_seats + 1
-
+    def draw(self, renderer: render.Renderer, center: Union[geometry.Point, float_geometry.Point, layout.Seat]) -> None:
         if self.path is None:
-            ImageDraw.Draw(im).ellipse((center.x - RADIUS_SEAT, center.y - RADIUS_SEAT,
-                                        center.x + RADIUS_SEAT, center.y + RADIUS_SEAT),
-                                       outline=(0, 0, 0), width=2)
+            renderer.circle(center.x, center.y, RADIUS_SEAT, (0, 0, 0), 2)
             return
 
-        instrument_image_original = Image.open(self.path)
-        n_max_size = max(instrument_image_original.size[0], instrument_image_original.size[1])
-        instrument_image = instrument_image_original.reduce(max(1, int(n_max_size / 100)))
-        im.alpha_composite(instrument_image, (max(0, int(center.x - instrument_image.size[0] / 2)),
-                                              max(0, int(center.y - instrument_image.size[1] / 2))))
+        renderer.sprite(self.path, center.x, center.y, SPRITE_SIZE)
 
 
 PATH: Final[str] = "Instruments/"
 INSTRUMENTS: Final[Dict[Optional[str], "Instrument"]] = {
-    None: Instrument(None),
-    "BassClarinet": Instrument(Path(PATH + "BKLARINETTE.png")),
-    "Bassoon": Instrument(Path(PATH + 'FAGOTTE.png')),
-    "Clarinet": Instrument(Path(PATH + "KLARINETTE.png")),
-    "Euphonium": Instrument(Path(PATH + "EUPHONIUM.png")),
-    "Flute": Instrument(Path(PATH + "FLOETE.png")),
-    "Horn": Instrument(Path(PATH + "HORN.png")),
-    "NoInstrument": Instrument(Path(PATH + 'NO_INSTRUMENT.png')),
-    "Oboe": Instrument(Path(PATH + 'OBOE.png')),
-    "Piccolo": Instrument(Path(PATH + "PICCOLO.png")),
-    "Trombone": Instrument(Path(PATH + "POSAUNE.png")),
-    "Sax": Instrument(Path(PATH + "SAX.png")),
-    "Trumpet": Instrument(Path(PATH + "TROMPETE.png")),
-    "Tuba": Instrument(Path(PATH + "TUBA.png"))
+    None: Instrument(None, None),
+    "BassClarinet": Instrument("BassClarinet", Path(PATH + "BKLARINETTE.png")),
+    "Bassoon": Instrument("Bassoon", Path(PATH + 'FAGOTTE.png')),
+    "Clarinet": Instrument("Clarinet", Path(PATH + "KLARINETTE.png")),
+    "Euphonium": Instrument("Euphonium", Path(PATH + "EUPHONIUM.png")),
+    "Flute": Instrument("Flute", Path(PATH + "FLOETE.png")),
+    "Horn": Instrument("Horn", Path(PATH + "HORN.png")),
+    "NoInstrument": Instrument("NoInstrument", Path(PATH + 'NO_INSTRUMENT.png')),
+    "Oboe": Instrument("Oboe", Path(PATH + 'OBOE.png')),
+    "Piccolo": Instrument("Piccolo", Path(PATH + "PICCOLO.png")),
+    "Trombone": Instrument("Trombone", Path(PATH + "POSAUNE.png")),
+    "Sax": Instrument("Sax", Path(PATH + "SAX.png")),
+    "Trumpet": Instrument("Trumpet", Path(PATH + "TROMPETE.png")),
+    "Tuba": Instrument("Tuba", Path(PATH + "TUBA.png"))
 }
+PERCUSSION_PATH: Final[Path] = Path(PATH + 'PAUKE.png')
+
+# Decode every sprite once at import, for long running processes rendering many halls.
+if os.environ.get("STAGE_PRELOAD_SPRITES"):
+    sprites.SPRITES.preload([instrument.path for instrument in INSTRUMENTS.values() if instrument.path is not None]
+                            + [PERCUSSION_PATH], SPRITE_SIZE)
 
 
 class Row:
     def __init__(self, angles: Optional[List[geometry.ArcAngles]],
                  instruments: Optional[List[Optional[List[Instrument]]]],
-                 radius: Optional[int], center: Optional[sympy.Point]) -> None:
+                 radius: Optional[int], center: Optional[geometry.Point]) -> None:
         self.angles: Final[List[geometry.ArcAngles]] = [DEFAULT_ANGLES] if angles is None else angles
         self.instruments: Final[Optional[List[Optional[List[Instrument]]]]] = instruments
         self.radius: Final[Optional[int]] = radius
-        self.center: Final[Optional[sympy.Point]] = center
+        self.center: Final[Optional[geometry.Point]] = center
 
     @staticmethod
     def from_dict(dct: dict) -> Optional["Row"]:
         angles: Optional[List[geometry.ArcAngles]] = geometry.ArcAngles.from_list(dct.get("angles"))
         instruments: Optional[List[Optional[List[Instrument]]]] = Instrument.from_dict(dct.get("instruments"))
         radius: Optional[int] = dct.get("radius")
-        center: Optional[sympy.Point] = geometry.Point.from_dict(dct.get("center")) if "center" in dct else None
+        center: Optional[geometry.Point] = geometry.Point.from_dict(dct.get("center")) if "center" in dct else None
 
         return Row(angles=angles, instruments=instruments, radius=radius, center=center)
 
@@ -109,7 +120,7 @@ class Row:
             return [INSTRUMENTS[None]] * n_max_number_of_instruments
 
         if len(instruments) > n_max_number_of_instruments:
-            print("A row has to many instruments for its length")
+            logger.warning("A row has to many instruments for its length")
             return [INSTRUMENTS[None]] * n_max_number_of_instruments
 
         return instruments
@@ -127,20 +138,21 @@ class Rows:
         self.podium: Final[geometry.Polygon] = podium
 
     @staticmethod
-    def from_dict(dct: dict, stage_dimension: geometry.Polygon) -> Optional["Rows"]:
-
+    def from_dict(dct: dict, stage_dimension: geometry.Polygon, parsed_rows: Optional[List[Optional[Row]]] = None) \
+            -> Optional["Rows"]:
+        """Rows of the dictionary, parsed_rows replaces its list if given (rows shared between halls)."""
         center_from_dict: Optional[geometry.Point] = geometry.Point.from_dict(dct.get("center"))
         center: Final[geometry.Point] = center_from_dict if center_from_dict is not None \
-            else sympy.Point(round(stage_dimension.polygon.bounds[2] / 2), stage_dimension.polygon.bounds[3])
+            else geometry.Point(round(stage_dimension.bounds[2] / 2), stage_dimension.bounds[3])
 
         podium_from_dct: Final[Optional[geometry.Polygon]] = geometry.Polygon.from_dict(dct.get("podium")) \
             if "podium" in dct else None
-        podium: Final[geometry.Point] = podium_from_dct if podium_from_dct is not None \
-            else geometry.Polygon(sympy.Point(center.x - 75, center.y - 150), sympy.Point(center.x - 75, center.y),
-                                  sympy.Point(center.x + 75, center.y), sympy.Point(center.x + 75, center.y - 150))
+        podium: Final[geometry.Polygon] = podium_from_dct if podium_from_dct is not None \
+            else geometry.Polygon((center.x - 75, center.y - 150), (center.x - 75, center.y),
+                                  (center.x + 75, center.y), (center.x + 75, center.y - 150))
 
-        list_rows: List[Optional[Row]] = list()
-        for dict_row in dct.get("list"):
+        list_rows: List[Optional[Row]] = list(parsed_rows) if parsed_rows is not None else list()
+        for dict_row in dct.get("list") if parsed_rows is None else []:
             if dict_row is None:
                 list_rows.append(None)
             else:
@@ -151,14 +163,14 @@ class Rows:
                 list_rows.append(new_row)
 
         if len(list_rows) == 0:
-            print(f"No valid row is found.")
+            logger.warning("No valid row is found.")
             return None
 
         distancing_row: Final[Optional[int]] = dct.get("distancing")
         distancing_first_row: Final[Optional[int]] = dct.get("distancingFirstRow")
             
         if distancing_row is None:
-            print(f"The distancing between rows should not be None")
+            logger.warning("The distancing between rows should not be None")
             return None
 
         return Rows(rows=list_rows,
@@ -166,175 +178,390 @@ class Rows:
                     n_distancing_row=distancing_row, center=center, podium=podium)
 
 
+def to_list(points) -> List[List[float]]:
+    return [[float(pos.x), float(pos.y)] for pos in points]
+
+
+class SeatAreas:
+    """The stage and the hidden areas for the seats in float, only computed when needed: a cached layout does not
+    need them."""
+    def __init__(self, stage: geometry.Polygon, hidden_areas: geometry.Areas) -> None:
+        self._stage: Final[geometry.Polygon] = stage
+        self._hidden_areas: Final[geometry.Areas] = hidden_areas
+
+    # The areas are enlarged in float, the sympy geometry is not needed by the default layout.
+    @functools.cached_property
+    @profiling.timed("enlarge_stage")
+    def stage(self) -> float_geometry.Polygon:
+        return float_geometry.Polygon.from_polygon(self._stage).enlarge(-RADIUS_SEAT)
+
+    @functools.cached_property
+    @profiling.timed("enlarge_hidden_areas")
+    def hidden_areas(self) -> List[float_geometry.Polygon]:
+        return [float_geometry.Polygon.from_polygon(area).enlarge(RADIUS_SEAT) if isinstance(area, geometry.Polygon)
+                else float_geometry.Polygon.around_arc(area, RADIUS_SEAT) for area in self._hidden_areas]
+
+    @functools.cached_property
+    def hidden_areas_index(self) -> float_geometry.BoundsIndex[float_geometry.Polygon]:
+        """Index of the hidden areas enlarged by the seat radius, see hidden_areas."""
+        return float_geometry.BoundsIndex.from_areas(self.hidden_areas)
+
+
 class Hall:
     def __init__(self, name: str, stage: geometry.Polygon, rows: Rows,
                  distancing: int, percussion_area: geometry.Areas,
                  hidden_areas: geometry.Areas,
-                 text_top_left: sympy.Point) -> None:
+                 text_top_left: geometry.Point, seat_areas: Optional[SeatAreas] = None) -> None:
         self.name: Final[str] = name
         self.stage: Final[geometry.Polygon] = stage
-        self.stage_for_seats: Final[geometry.Polygon] = stage.enlarge(-RADIUS_SEAT)
         self.rows: Final[Rows] = rows
         self.distancing: Final[int] = distancing
         self.percussion_areas: Final[geometry.Areas] = percussion_area
         self.hidden_areas: Final[geometry.Areas] = hidden_areas
-        self.hidden_areas_for_seats: Final[geometry.Areas] = self.hidden_areas.enlarge(RADIUS_SEAT)
-        self.text_top_left: Final[sympy.Point] = text_top_left
+        self.text_top_left: Final[geometry.Point] = text_top_left
+        # The float areas for the seats of the halls with the same stage and hidden areas (see with_rows).
+        self.seat_areas: Final[SeatAreas] = seat_areas if seat_areas is not None else SeatAreas(stage, hidden_areas)
+
+    # The areas available for the seats are only computed when needed, a cached layout does not need them.
+    @functools.cached_property
+    @profiling.timed("enlarge_stage")
+    def stage_for_seats(self) -> geometry.Polygon:
+        """The stage shrunk by the seat radius: the centers of the seats are inside."""
+        return self.stage.enlarge(-RADIUS_SEAT)
+
+    @functools.cached_property
+    @profiling.timed("enlarge_hidden_areas")
+    def hidden_areas_for_seats(self) -> geometry.Areas:
+        """The hidden areas enlarged by the seat radius, the arcs become polygons: the centers of the seats are
+        outside."""
+        return self.hidden_areas.enlarge(RADIUS_SEAT)
+
+    @property
+    def float_stage_for_seats(self) -> float_geometry.Polygon:
+        return self.seat_areas.stage
+
+    @property
+    def float_hidden_areas_for_seats(self) -> List[float_geometry.Polygon]:
+        return self.seat_areas.hidden_areas
+
+    @property
+    def hidden_areas_index(self) -> float_geometry.BoundsIndex[float_geometry.Polygon]:
+        return self.seat_areas.hidden_areas_index
+
+    @functools.cached_property
+    def percussion_areas_index(self) -> float_geometry.BoundsIndex[Union[geometry.Polygon, geometry.Arc]]:
+        return float_geometry.BoundsIndex.from_areas(self.percussion_areas)
+
+    def with_distancing(self, distancing: int, n_distancing_row: int, n_distancing_delta_first_row: int,
+                        instruments: bool = True) -> "Hall":
+        """Copy of the hall with other distancing values, without the instruments of the rows if instruments is False.
+
+        The float areas for the seats only depend on the seat radius, they are shared (see with_rows)."""
+        rows: Final[List[Optional[Row]]] = [
+            row if row is None or instruments else Row(row.angles, None, row.radius, row.center)
+            for row in self.rows.rows]
+        return self.with_rows(self.name, Rows(rows, n_distancing_delta_first_row, n_distancing_row, self.rows.center,
+                                              self.rows.podium), distancing)
+
+    def with_rows(self, name: str, rows: Rows, distancing: int) -> "Hall":
+        """Copy of the hall with other rows, the float areas for the seats of the hall are computed once and shared."""
+        return Hall(name, self.stage, rows, distancing, self.percussion_areas, self.hidden_areas, self.text_top_left,
+                    self.seat_areas)
 
     @staticmethod
-    def from_dict(dct: dict) -> Optional["Hall"]:
+    @profiling.timed("parse")
+    def from_dict(dct: dict, parsed_rows: Optional[List[Optional[Row]]] = None) -> Optional["Hall"]:
+        """Hall of the dictionary, parsed_rows replaces the list of its rows if given (see Rows.from_dict)."""
         name: Final[Optional[str]] = dct.get("name")
         if name is None:
-            print("The hall does not have a name.")
+            logger.warning("The hall does not have a name.")
             return None
 
         stage_dimension: Final[Optional[geometry.Polygon]] = geometry.Dimension.from_dict(dct.get("stage"))
         if stage_dimension is None:
-            print(f"The hall {name} does not have dimension.")
+            logger.warning(f"The hall {name} does not have dimension.")
             return None
 
-        rows: Final[Optional[Rows]] = Rows.from_dict(dct.get("rows"), stage_dimension)
+        rows: Final[Optional[Rows]] = Rows.from_dict(dct.get("rows"), stage_dimension, parsed_rows)
         if rows is None:
-            print(f"The hall {name} does not have any rows, or they are invalid {dct.get('rows')}")
+            logger.warning(f"The hall {name} does not have any rows, or they are invalid {dct.get('rows')}")
             return None
 
         distancing: Final[Optional[int]] = dct.get("distancing")
         if distancing is None:
-            print(f"There is no distancing {distancing}.")
+            logger.warning(f"There is no distancing {distancing}.")
             return None
 
         percussion_areas: Final[geometry.Areas] = geometry.Areas.from_dict(dct.get("percussion"), rows.center)
         hidden_areas: Final[geometry.Areas] = geometry.Areas.from_dict(dct.get("hidden"), rows.center)
 
-        legend_top_left: Final[Optional[sympy.Point]] = geometry.Point.from_dict(dct.get("legend"))
+        legend_top_left: Final[Optional[geometry.Point]] = geometry.Point.from_dict(dct.get("legend"))
 
         return Hall(name=name, stage=stage_dimension, rows=rows, distancing=distancing,
                     percussion_area=percussion_areas, hidden_areas=hidden_areas,
                     text_top_left=legend_top_left)
 
-    def draw_percussion_area(self, image: Image) -> None:
+    @profiling.timed("composite_percussion")
+    def draw_percussion_area(self, renderer: render.Renderer) -> None:
         for area in self.percussion_areas:
             if isinstance(area, geometry.Polygon):
-                ImageDraw.Draw(image).polygon(area.get_as_sequence(), outline="black", fill=(240, 240, 240))
+                renderer.polygon(area.get_as_sequence(), outline=(0, 0, 0), fill=(240, 240, 240))
 
-                center: sympy.Point = area.polygon.centroid
-                instrument_image_original = Image.open(Path(PATH + 'PAUKE.png'))
-                n_max_size = max(instrument_image_original.size[0], instrument_image_original.size[1])
-                instrument_image = instrument_image_original.reduce(max(1, int(n_max_size / 100)))
-                image.alpha_composite(instrument_image, (max(0, round(center.x - instrument_image.size[0] / 2)),
-                                                         max(0, round(center.y - instrument_image.size[1] / 2))))
+                center: float_geometry.Point = float_geometry.Polygon.from_polygon(area).centroid
+                renderer.sprite(PERCUSSION_PATH, center.x, center.y, SPRITE_SIZE)
 
-    def draw(self) -> None:
-        global n_seats
-        n_seats = 0
+    @profiling.timed("draw")
+    def draw(self, exact: bool = False, cache: Optional[layout_cache.LayoutCache] = None,
+             options: Optional[render.Options] = None, row_cache: Optional[layout_cache.RowCache] = None) -> None:
+        """Draw the hall, exact uses the sympy geometry instead of the float one (slow, for verification).
 
-        font = ImageFont.truetype("arial.ttf", 20)
+        By default a PNG with one pixel per centimeter is drawn, see render.Options."""
+        plan: Final[layout.SeatPlan] = self.compute_layout(exact, cache, row_cache)
+        render_options: Final[render.Options] = options if options is not None else render.Options()
 
-        stage_x: float = self.stage.polygon.bounds[2]
-        stage_y: float = self.stage.polygon.bounds[3]
+        logger.info("Hall " + self.name)
+        self.render_plan(plan, render_options).save(self.get_export_path(render_options.output_format))
 
-        im = Image.new("RGBA", (stage_x, stage_y),
-                       (255, 255, 255))
-        draw = ImageDraw.Draw(im)
+    def render_plan(self, plan: layout.SeatPlan, options: render.Options) -> render.Renderer:
+        """Renderer of the options with the plan drawn, to be saved or encoded."""
+        stage_x: float = self.stage.bounds[2]
+        stage_y: float = self.stage.bounds[3]
+        renderer: Final[render.Renderer] = options.create(int(stage_x), int(stage_y))
+        self.draw_plan(renderer, plan)
+        return renderer
 
-        draw.polygon(self.rows.podium.get_as_sequence(),
-                     fill=None, outline=(0, 0, 0))
+    def draw_plan(self, renderer: render.Renderer, plan: layout.SeatPlan) -> None:
+        """Draw the stage, the areas, the seats of the plan and the legend with the renderer."""
+        renderer.polygon(self.rows.podium.get_as_sequence(), outline=(0, 0, 0), fill=None)
 
         # Draw "Percussion line"
-        self.draw_percussion_area(im)
+        self.draw_percussion_area(renderer)
 
         for hidden_area in self.hidden_areas:
             if isinstance(hidden_area, geometry.Polygon):
-                draw.polygon(hidden_area.get_as_sequence(), fill=(160, 160, 160))
+                renderer.polygon(hidden_area.get_as_sequence(), outline=None, fill=(160, 160, 160))
             elif isinstance(hidden_area, geometry.Arc):
-                draw.arc(hidden_area.circle.bounds, start=hidden_area.angles.start_angle,
-                         end=hidden_area.angles.end_angle, fill=(160, 160, 160), width=5)
-
-        print("Hall " + self.name)
+                x_min, y_min, x_max, y_max = hidden_area.bounds
+                renderer.arc((float(x_min), float(y_min), float(x_max), float(y_max)),
+                             hidden_area.angles.start_angle, hidden_area.angles.end_angle, (160, 160, 160), 5)
+
+        self.draw_rows(renderer, plan)
+
+        with profiling.span("draw_text"):
+            renderer.text(self.text_top_left.x, self.text_top_left.y, str(self.name) + "\n" +
+                          "Number of seats " + str(plan.n_seats) + "\n" +
+                          "distancing: " + str(self.distancing) + " cm\n" +
+                          "row distancing: " + str(self.rows.n_distancing_row) + "cm\n" +
+                          "scale 1m", 20, (0, 0, 0))
+            n_top_line: Final[int] = 120
+            renderer.line(((self.text_top_left.x, self.text_top_left.y + n_top_line),
+                           (self.text_top_left.x + 100, self.text_top_left.y + n_top_line)), (0, 0, 0), 3)
+
+    def get_export_path(self, output_format: str = render.RasterRenderer.extension) -> str:
+        return 'export/' + self.name + '_distancing_' + str(self.distancing) + '_row_distancing_' \
+            + str(self.rows.n_distancing_row) + '.' + output_format
+
+    def get_layout_key(self) -> str:
+        """Hash of everything the geometry of the layout depends on, the instrument names are not part of it."""
+        rows: Final[List[Optional[dict]]] = [
+            None if row is None else
+            {"angles": [[angles.start_angle, angles.end_angle] for angles in row.angles],
+             "radius": row.radius,
+             "center": None if row.center is None else to_list([row.center])[0],
+             "instruments": None if row.instruments is None else
+             [None if instruments is None else len(instruments) for instruments in row.instruments]}
+            for row in self.rows.rows]
+
+        geometry_dct: Final[dict] = self.get_surroundings()
+        geometry_dct["rows"] = {"center": to_list([self.rows.center])[0], "distancing": self.rows.n_distancing_row,
+                                "distancing_first_row": self.rows.n_distancing_delta_first_row, "list": rows}
+        return layout_cache.create_key(geometry_dct)
+
+    def get_surroundings(self) -> dict:
+        """Everything but the rows the geometry of a row depends on."""
+        def arc_to_dict(arc: geometry.Arc) -> dict:
+            return {"center": to_list([arc.center])[0], "radius": float(arc.radius),
+                    "angles": [arc.angles.start_angle, arc.angles.end_angle]}
+
+        return {
+            "radius_seat": RADIUS_SEAT,
+            "stage": to_list(self.stage.get_points()),
+            "distancing": self.distancing,
+            "hidden": [{"polygon": to_list(area.get_points())} if isinstance(area, geometry.Polygon)
+                       else {"arc": arc_to_dict(area)} for area in self.hidden_areas]}
+
+    def get_row_key(self, surroundings_key: str, row_index: int, row: Optional[Row],
+                    circle: float_geometry.Circle) -> tuple:
+        """Key of the layout of a row in a layout_cache.RowCache."""
+        if row is None:
+            return surroundings_key, row_index, circle.center, circle.radius
+
+        return (surroundings_key, row_index, circle.center, circle.radius,
+                tuple(None if angles is None else (angles.start_angle, angles.end_angle) for angles in row.angles),
+                None if row.instruments is None else
+                tuple(None if instruments is None else tuple(instrument.name for instrument in instruments)
+                      for instruments in row.instruments))
+
+    @profiling.timed("layout")
+    def compute_layout(self, exact: bool = False, cache: Optional[layout_cache.LayoutCache] = None,
+                       row_cache: Optional[layout_cache.RowCache] = None) -> layout.SeatPlan:
+        """Compute the rows, arcs and seats of the hall, without drawing anything.
+
+        With a cache, the geometry is only computed if no hall with the same geometry was laid out before, the
+        instruments are then assigned to the cached seats. With a row cache, only the rows which are not in it are
+        computed. Exact layouts are never cached.
+        """
+        if cache is None or exact:
+            return self.compute_rows(exact, row_cache)
+
+        key: Final[str] = self.get_layout_key()
+        cached_plan: Final[Optional[layout.SeatPlan]] = cache.get(key)
+        if cached_plan is not None:
+            return self.assign_instruments(cached_plan)
+
+        plan: Final[layout.SeatPlan] = self.compute_rows(exact, row_cache)
+        cache.put(key, plan)
+        return plan
+
+    def assign_instruments(self, plan: layout.SeatPlan) -> layout.SeatPlan:
+        """Copy of the plan with the instruments of the rows of this hall placed on the seats."""
+        row_layouts: List[layout.RowLayout] = []
+        for row_layout in plan.rows:
+            row: Optional[Row] = self.rows.rows[row_layout.index]
+            circle: float_geometry.Circle = float_geometry.Circle(row_layout.center, row_layout.radius)
+            arc_layouts: List[layout.ArcLayout] = []
+            for arc_index, arc_layout in enumerate(row_layout.arcs):
+                instruments: List[Instrument] = Row.get_instruments_to_use(
+                    circle.perimeter(arc_layout.angles), self.distancing, self.get_arc_instruments(row, arc_index))
+                arc_layouts.append(layout.ArcLayout(arc_layout.angles, [
+                    layout.Seat(seat.x, seat.y, seat.angle, seat.row_index, seat.arc_index, instrument.name)
+                    for seat, instrument in zip(arc_layout.seats, instruments)]))
+
+            row_layouts.append(layout.RowLayout(row_layout.index, row_layout.center, row_layout.radius, arc_layouts))
+
+        return layout.SeatPlan(row_layouts)
 
-        self.draw_rows(im)
-
-        draw.text((self.text_top_left.x, self.text_top_left.y), str(self.name) + "\n" +
-                  "Number of seats " + str(n_seats) + "\n" +
-                  "distancing: " + str(self.distancing) + " cm\n" +
-                  "row distancing: " + str(self.rows.n_distancing_row) + "cm\n" +
-                  "scale 1m", fill=(0, 0, 0), font=font)
-        n_top_line: Final[int] = 120
-        draw.line(((self.text_top_left.x, self.text_top_left.y + n_top_line),
-                   (self.text_top_left.x + 100, self.text_top_left.y + n_top_line)), fill=(0, 0, 0),
-                  width=3)
-
-        im.save('export/' + self.name + '_distancing_' + str(self.distancing) + '_row_distancing_'
-                + str(self.rows.n_distancing_row) + '.png')
-
-    def draw_rows(self, im: Image) -> None:
+    @staticmethod
+    def get_arc_instruments(row: Optional[Row], arc_index: int) -> Optional[List[Instrument]]:
+        return row.instruments[arc_index] if row is not None and row.instruments is not None else None
+
+    def compute_rows(self, exact: bool, row_cache: Optional[layout_cache.RowCache] = None) -> layout.SeatPlan:
+        """Compute the layout of all rows, see compute_layout."""
+        return layout.SeatPlan(list(self.iter_rows(exact, row_cache)))
+
+    def iter_rows(self, exact: bool = False, row_cache: Optional[layout_cache.RowCache] = None) \
+            -> Iterator[layout.RowLayout]:
+        """Compute the layout of the rows one after the other, each one is yielded as soon as it is laid out."""
+        # The rows of the exact geometry are not cached.
+        cache: Final[Optional[layout_cache.RowCache]] = None if exact else row_cache
+        surroundings_key: Final[Optional[str]] = None if cache is None \
+            else layout_cache.create_key(self.get_surroundings())
+        for row_index, (row, radius) in enumerate(zip(self.rows.rows, self.get_row_radii())):
+            logger.debug(f"radius: {radius} cm.")
+            center: geometry.Point = self.get_row_center(row)
+            circle: Union[geometry.Circle, float_geometry.Circle] = geometry.Circle(center, radius) if exact \
+                else float_geometry.Circle(center, radius)
+
+            row_key: Optional[tuple] = None
+            if cache is not None and surroundings_key is not None:
+                row_key = self.get_row_key(surroundings_key, row_index, row, circle)
+                cached_row: Optional[layout.RowLayout] = cache.get(row_key)
+                if cached_row is not None:
+                    yield cached_row
+                    continue
+
+            arcs_on_stage: List[geometry.ArcAngles] = self.clip_row(row, circle)
+            if row is not None and row.instruments is not None and len(row.instruments) != len(arcs_on_stage):
+                logger.warning("The list of instruments does not fit the arcs on stage.")
+                break
+
+            arc_layouts: List[layout.ArcLayout] = []
+            for arc_index, arc in enumerate(arcs_on_stage):
+                arc_layouts.append(self.layout_arc(row_index, arc_index, arc, self.get_arc_instruments(row, arc_index),
+                                                   circle))
+
+            row_layout: layout.RowLayout = layout.RowLayout(row_index, float_geometry.Point.from_any(circle.center),
+                                                            radius, arc_layouts)
+            if cache is not None and row_key is not None:
+                cache.put(row_key, row_layout)
+            yield row_layout
+
+    def get_row_radii(self) -> List[int]:
+        """Radius of each row: the given one, but at least the row distancing (or distancing) after the previous."""
+        radii: List[int] = []
         radius: int = self.rows.n_distancing_delta_first_row
         for row in self.rows.rows:
-            min_radius = radius + max(self.distancing, self.rows.n_distancing_row)
+            min_radius: int = radius + max(self.distancing, self.rows.n_distancing_row)
             radius = max(min_radius, row.radius if row is not None and row.radius is not None else min_radius)
-            print(f"radius: {radius} cm.")
-            circle: geometry.Circle = geometry.Circle(
-                self.rows.center if row is None or row.center is None else row.center, radius)
+            radii.append(radius)
+
+        return radii
+
+    def get_row_center(self, row: Optional[Row]) -> geometry.Point:
+        return self.rows.center if row is None or row.center is None else row.center
 
-            arcs_on_stage: List[geometry.ArcAngles] = geometry.ArcAngles.reduce_to(
-                row.angles if row.angles is not None else [DEFAULT_ANGLES],
-                circle.intersection_arc_angles(self.stage_for_seats))
+    @profiling.timed("clip_row")
+    def clip_row(self, row: Optional[Row], circle: Union[geometry.Circle, float_geometry.Circle]) \
+            -> List[geometry.ArcAngles]:
+        """Arcs of the row circle on which seats can be placed: inside the stage and outside the hidden areas.
 
-            for hidden_area in self.hidden_areas_for_seats:
-                if isinstance(hidden_area, geometry.Polygon):
-                    arcs_on_stage = geometry.ArcAngles.exclude(
-                        arcs_on_stage,
-                        circle.intersection_arc_angles(hidden_area)
-                    )
+        The areas of the exact geometry are used for an exact circle, the float ones for a float circle."""
+        row_angles: Final[List[geometry.ArcAngles]] = row.angles if row is not None else [DEFAULT_ANGLES]
+        arcs_on_stage: Final[List[geometry.ArcAngles]] = self.clip_row_float(row_angles, circle) \
+            if isinstance(circle, float_geometry.Circle) else self.clip_row_exact(row_angles, circle)
 
+        if logger.isEnabledFor(logging.DEBUG):
             s_arcs_on_stage = "["
             for arc in arcs_on_stage:
                 s_arcs_on_stage += f"{{{arc.start_angle}, {arc.end_angle}}},"
             s_arcs_on_stage = s_arcs_on_stage[:-1]
             s_arcs_on_stage += "]"
-            print(f"The instruments are placed between the following angles: {s_arcs_on_stage}")
-            if row is not None and row.instruments is not None and len(row.instruments) != len(arcs_on_stage):
-                print("The list of instruments does not fit the arcs on stage.")
-                return
-
-            if row is None:
-                for arc in arcs_on_stage:
-                    self.draw_row(im, arc, None, circle)
-            else:
-                i: int = 0
-                while i < len(arcs_on_stage):
-                    arc_row: geometry.ArcAngles = arcs_on_stage[i]
-                    instruments: Optional[List[Instrument]] = row.instruments[i] if row.instruments is not None \
-                        else None
-                    self.draw_row(im, arc_row, instruments, circle)
-
-                    i = i + 1
-
-    def draw_row(self, im: Image, arc: geometry.ArcAngles, list_instruments: Optional[List[Instrument]],
-                 circle: geometry.Circle) -> None:
-        # ImageDraw.Draw(im).arc(create_xy(center, Dimension(radius*2, radius*2)),
-        #                        start=self.angles.start_angle, end=self.angles.end_angle, fill=(255, 255, 0))
-
+            logger.debug(f"The instruments are placed between the following angles: {s_arcs_on_stage}")
+
+        return arcs_on_stage
+
+    def clip_row_exact(self, row_angles: List[geometry.ArcAngles], circle: geometry.Circle) \
+            -> List[geometry.ArcAngles]:
+        arcs_on_stage: List[geometry.ArcAngles] = geometry.ArcAngles.reduce_to(
+            row_angles, circle.intersection_arc_angles(self.stage_for_seats))
+        for hidden_area in [area for area in self.hidden_areas_for_seats if isinstance(area, geometry.Polygon)]:
+            arcs_on_stage = geometry.ArcAngles.exclude(arcs_on_stage, circle.intersection_arc_angles(hidden_area))
+
+        return arcs_on_stage
+
+    def clip_row_float(self, row_angles: List[geometry.ArcAngles], circle: float_geometry.Circle) \
+            -> List[geometry.ArcAngles]:
+        arcs_on_stage: Final[List[geometry.ArcAngles]] = geometry.ArcAngles.reduce_to(
+            row_angles, circle.intersection_arc_angles(self.float_stage_for_seats))
+        # Only the hidden areas near the row are clipped, all in one pass, excluding their union.
+        hidden_areas_near_row: Final[List[float_geometry.Polygon]] = self.hidden_areas_index.query_ring(
+            circle.center, circle.radius - RADIUS_SEAT, circle.radius + RADIUS_SEAT)
+        if len(hidden_areas_near_row) == 0:
+            return arcs_on_stage
+
+        return geometry.ArcAngles.exclude(arcs_on_stage, circle.union_arc_angles(hidden_areas_near_row))
+
+    @profiling.timed("place_seats")
+    def layout_arc(self, row_index: int, arc_index: int, arc: geometry.ArcAngles,
+                   list_instruments: Optional[List[Instrument]],
+                   circle: Union[geometry.Circle, float_geometry.Circle]) -> layout.ArcLayout:
+        """Place the instruments evenly on the arc."""
         perimeter: Final[float] = circle.perimeter(arc)
 
         instruments: Final[List[Instrument]] = Row.get_instruments_to_use(perimeter, self.distancing, list_instruments)
 
-        current_point: sympy.Point = circle.point(arc.start_angle) if len(instruments) > 1 \
-            else circle.point((arc.start_angle + arc.end_angle) / 2)
+        angles: Final[List[float]] = arc.seat_angles(len(instruments))
+        seats: Final[List[Union[sympy.Point, float_geometry.Point]]] = circle.seat_positions(angles)
 
-        second_point: Final[sympy.Point] = circle.point(arc.start_angle
-                                                        + (abs(arc.end_angle - arc.start_angle)
-                                                           / (len(instruments) - 1))) \
-            if len(instruments) > 1 \
-            else current_point
+        distancing: Final[float] = seats[0].distance(seats[1]) if len(seats) > 1 else 0
 
-        distancing: Final[float] = current_point.distance(second_point)
+        logger.debug(f"distancing: {int(distancing)}cm for {len(instruments)} instruments.")
 
-        print(f"distancing: {int(distancing)}cm for {len(instruments)} instruments.")
+        return layout.ArcLayout(arc, [layout.Seat(float(seat.x), float(seat.y), angle, row_index, arc_index,
+                                                  instrument.name)
+                                      for instrument, seat, angle in zip(instruments, seats, angles)])
 
-        for instrument in instruments:
-            instrument.draw(im, current_point)
-            if distancing > 0:
-                current_point = circle.get_first_intersection(circle.intersection(geometry.Circle(current_point,
-                                                                                                  distancing)),
-                                                              True)
+    @profiling.timed("composite_sprites")
+    def draw_rows(self, renderer: render.Renderer, plan: layout.SeatPlan) -> None:
+        for seat in plan.seats:
+            INSTRUMENTS[seat.instrument].draw(renderer, seat)
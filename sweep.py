@@ -0,0 +1,163 @@
+import csv
+import functools
+import itertools
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Final, Iterable, List, Optional, Sequence, TextIO
+
+import batch
+import layout
+import layout_cache
+import stage
+
+logger = logging.getLogger(__name__)
+
+FORMATS: Final[List[str]] = ["csv", "json"]
+COLUMNS: Final[List[str]] = ["hall", "distancing", "row_distancing", "first_row_distancing", "n_seats", "n_rows",
+                             "seats_per_row"]
+
+
+class SweepPoint:
+    """Distancing values of one evaluation of a sweep, None keeps the value of the hall."""
+    def __init__(self, distancing: Optional[int], row_distancing: Optional[int],
+                 first_row_distancing: Optional[int]) -> None:
+        self.distancing: Final[Optional[int]] = distancing
+        self.row_distancing: Final[Optional[int]] = row_distancing
+        self.first_row_distancing: Final[Optional[int]] = first_row_distancing
+
+
+class SweepResult:
+    """Seat capacity of a hall for distancing values, with the number of seats of each row."""
+    def __init__(self, hall: str, distancing: int, row_distancing: int, first_row_distancing: int,
+                 seats_per_row: List[int]) -> None:
+        self.hall: Final[str] = hall
+        self.distancing: Final[int] = distancing
+        self.row_distancing: Final[int] = row_distancing
+        self.first_row_distancing: Final[int] = first_row_distancing
+        self.seats_per_row: Final[List[int]] = seats_per_row
+
+    @property
+    def n_seats(self) -> int:
+        return sum(self.seats_per_row)
+
+    @property
+    def n_rows(self) -> int:
+        """Number of rows with at least one seat."""
+        return sum(1 for n_seats in self.seats_per_row if n_seats > 0)
+
+    def to_dict(self) -> dict:
+        return {"hall": self.hall, "distancing": self.distancing, "row_distancing": self.row_distancing,
+                "first_row_distancing": self.first_row_distancing, "n_seats": self.n_seats, "n_rows": self.n_rows,
+                "seats_per_row": self.seats_per_row}
+
+
+def create_grid(distancings: Optional[Sequence[int]], row_distancings: Optional[Sequence[int]],
+                first_row_distancings: Optional[Sequence[int]]) -> List[SweepPoint]:
+    """Every combination of the values, the distancing varies the slowest (None or empty keeps the hall value)."""
+    return [SweepPoint(distancing, row_distancing, first_row_distancing)
+            for distancing, first_row_distancing, row_distancing in itertools.product(
+                distancings if distancings else [None], first_row_distancings if first_row_distancings else [None],
+                row_distancings if row_distancings else [None])]
+
+
+def evaluate(hall: stage.Hall, point: SweepPoint, row_cache: Optional[layout_cache.RowCache] = None) -> SweepResult:
+    """Maximum number of seats of the hall with the distancing values of the point, without drawing it.
+
+    The instruments of the rows are ignored: every row is filled with as many seats as fit."""
+    point_hall: Final[stage.Hall] = hall.with_distancing(
+        hall.distancing if point.distancing is None else point.distancing,
+        hall.rows.n_distancing_row if point.row_distancing is None else point.row_distancing,
+        hall.rows.n_distancing_delta_first_row if point.first_row_distancing is None
+        else point.first_row_distancing, instruments=False)
+    plan: Final[layout.SeatPlan] = point_hall.compute_layout(row_cache=row_cache)
+    seats_per_row: List[int] = [0] * len(hall.rows.rows)
+    for row_layout in plan.rows:
+        seats_per_row[row_layout.index] = sum(len(arc.seats) for arc in row_layout.arcs)
+
+    return SweepResult(hall.name, point_hall.distancing, point_hall.rows.n_distancing_row,
+                       point_hall.rows.n_distancing_delta_first_row, seats_per_row)
+
+
+def evaluate_points(dct: dict, points: Sequence[SweepPoint]) -> List[SweepResult]:
+    """Evaluate the points on one hall, the areas for the seats and the rows with the same radius are shared."""
+    hall: Final[Optional[stage.Hall]] = stage.Hall.from_dict(dct)
+    if hall is None:
+        raise ValueError("invalid hall")
+
+    row_cache: Final[layout_cache.RowCache] = layout_cache.RowCache()
+    return [evaluate(hall, point, row_cache) for point in points]
+
+
+def sweep(dct: dict, points: Sequence[SweepPoint], n_processes: Optional[int] = None,
+          min_parallel_points: int = batch.PARALLEL_MIN_ITEMS) -> List[SweepResult]:
+    """Evaluate the points on the hall dictionary in a process pool if there are at least min_parallel_points.
+
+    The points are split in contiguous chunks, one per process, so that each process reuses its geometry (see
+    batch.map_chunks). The results are in the order of the points. Raise ValueError if the hall is invalid."""
+    return batch.map_chunks(functools.partial(evaluate_points, dct), points, n_processes, min_parallel_points)
+
+
+def write_csv(results: Iterable[SweepResult], write_file: TextIO) -> None:
+    """One line per result, the seats of the rows are separated by spaces."""
+    writer: Final = csv.writer(write_file, lineterminator="\n")
+    writer.writerow(COLUMNS)
+    for result in results:
+        dct: dict = result.to_dict()
+        dct["seats_per_row"] = " ".join(str(n_seats) for n_seats in result.seats_per_row)
+        writer.writerow([dct[column] for column in COLUMNS])
+
+
+def write_json(results: Iterable[SweepResult], write_file: TextIO) -> None:
+    """A list with one line per result."""
+    write_file.write("[" + ",".join("\n" + json.dumps(result.to_dict()) for result in results) + "\n]\n")
+
+
+def main(arguments: Sequence[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compute the number of seats of halls for a grid of distancing "
+                                                 "values, without drawing them. The instruments of the rows are "
+                                                 "ignored, the rows are filled with seats.")
+    parser.add_argument("halls", nargs="+", help="hall json files, directories or glob patterns")
+    parser.add_argument("--distancing", type=batch.parse_values, nargs="+", default=[],
+                        help="distancing values or ranges start:stop:step (default: the one of the hall)")
+    parser.add_argument("--row-distancing", type=batch.parse_values, nargs="+", default=[],
+                        help="row distancing values or ranges (default: the one of the hall)")
+    parser.add_argument("--first-row-distancing", type=batch.parse_values, nargs="+", default=[],
+                        help="first row distancing values or ranges (default: the one of the hall)")
+    parser.add_argument("--format", choices=FORMATS, default=FORMATS[0], help="format of the table (default: csv)")
+    parser.add_argument("--output", type=Path, help="file of the table (default: standard output)")
+    parser.add_argument("--jobs", type=int, default=None, help="number of processes (default: number of cores)")
+    args = parser.parse_args(arguments)
+
+    # The rows are filled, the warnings about the instruments do not apply.
+    logging.basicConfig(level=logging.ERROR, format="%(levelname)s %(name)s: %(message)s")
+    points: Final[List[SweepPoint]] = create_grid([value for values in args.distancing for value in values],
+                                                  [value for values in args.row_distancing for value in values],
+                                                  [value for values in args.first_row_distancing for value in values])
+    start: Final[float] = time.perf_counter()
+    results: List[SweepResult] = []
+    files: Final[batch.HallFiles] = batch.HallFiles(batch.collect_files(args.halls))
+    for path, dct in files.dicts():
+        try:
+            results.extend(sweep(dct, points, args.jobs))
+        except ValueError as error:
+            files.fail(path, error)
+
+    write: Final = write_json if args.format == "json" else write_csv
+    if args.output is None:
+        write(results, sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as write_file:
+            write(results, write_file)
+
+    print(f"{len(results)} points ({files.n_failed} halls failed) in {(time.perf_counter() - start) * 1000:.1f} ms.",
+          file=sys.stderr)
+    return 1 if files.n_failed > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,77 @@
+from typing import Final, List, Optional, Sequence
+
+import sympy
+
+from geometry import ArcAngles, Point, Polygon
+
+
+class Circle(sympy.Circle):
+    """Representation of a circle."""
+    def sort_points(self, points: List[sympy.Point], clockwise: bool) -> List[sympy.Point]:
+        return sorted(points, key=self.angle, reverse=clockwise)
+    
+    def get_first_intersection(self, intersections: List[sympy.Point], clockwise: bool) -> Optional[sympy.Point]:
+        """Get the first intersection from the given points in clockwise direction."""
+        if len(intersections) == 0:
+            return None
+        elif len(intersections) == 1:
+            return Point.round_point(intersections[0])
+
+        sorted_intersections: Final[List[sympy.Point]] = self.sort_points(intersections, clockwise)
+        return Point.round_point(sorted_intersections[0])
+
+    def intersection_arc_angles(self, polygon: Polygon) -> List[ArcAngles]:
+        angles: List[ArcAngles] = []
+        intersections_with_stage = self.sort_points(self.intersection(polygon.polygon), False)
+        number_of_intersection: Final[int] = len(intersections_with_stage)
+        if number_of_intersection == 0:
+            return angles
+
+        i: int = 1
+        while i < number_of_intersection:
+            current_angle: float = self.angle(intersections_with_stage[i])
+            is_last: bool = i == number_of_intersection - 1
+            other_angle: float = self.angle(intersections_with_stage[i-1])  # start with i = 1
+            arc_middle: sympy.Point = self.point((other_angle + current_angle) / 2)
+            if polygon.polygon.encloses_point(arc_middle):
+                angles.append(ArcAngles(other_angle, current_angle))
+                i = i + 2
+            else:
+                i = i + 1
+
+            if is_last:
+                other_angle = 360
+                arc_middle = self.point((other_angle + current_angle) / 2)
+                if polygon.polygon.encloses_point(arc_middle):
+                    angles.append(ArcAngles(current_angle, 360))
+                break
+
+        return angles
+
+    def point(self, angle_in_degrees: float) -> sympy.Point:
+        """Calculate the point of the circle corresponding to the given angle."""
+        from math import cos, sin, pi
+        angle_in_radians = angle_in_degrees * pi / 180
+        x = self.center.x + (self.radius * cos(angle_in_radians))
+        y = self.center.y + (self.radius * sin(angle_in_radians))
+
+        return sympy.Point(round(x), round(y))
+
+    def seat_positions(self, angles_in_degrees: Sequence[float]) -> List[sympy.Point]:
+        """Calculate the points of the circle corresponding to all given angles."""
+        return [self.point(angle) for angle in angles_in_degrees]
+
+    def angle(self, pos: sympy.Point) -> float:
+        """Calculate the angle corresponding to the given point."""
+        from math import atan2, degrees
+        angle_in_radius = atan2(-(self.center.y - pos.y), pos.x - self.center.x)
+        angle_in_degrees = degrees(angle_in_radius)
+        if angle_in_degrees > 90:
+            return angle_in_degrees
+        else:
+            return 360 + angle_in_degrees
+
+    def perimeter(self, angles: ArcAngles) -> float:
+        percent: Final[float] = (abs(angles.end_angle - angles.start_angle)) / 360
+
+        return self.circumference * percent
@@ -0,0 +1,107 @@
+import contextlib
+import copy
+import io
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from typing import List
+
+import batch
+import render
+import test_stage
+
+
+def square(values: List[int]) -> List[int]:
+    return [value * value for value in values]
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.current_directory: str = os.getcwd()
+        os.chdir(self.directory.name)
+        self.dct: dict = copy.deepcopy(test_stage.HALL)
+        # The sprites of the instruments are not drawn, they are not part of the repository.
+        self.dct["rows"]["list"][0].pop("instruments")
+        self.path: Path = Path("hall.json")
+        self.path.write_text(json.dumps(self.dct))
+
+    def tearDown(self) -> None:
+        os.chdir(self.current_directory)
+        self.directory.cleanup()
+
+    def test_create_jobs(self):
+        jobs: List[batch.Job] = batch.create_jobs([Path("a.json"), Path("b.json")], [50, 75], [100])
+        self.assertEqual([("a.json", 50, 100), ("a.json", 75, 100), ("b.json", 50, 100), ("b.json", 75, 100)],
+                         [(str(job.path), job.distancing, job.row_distancing) for job in jobs])
+        self.assertEqual([(None, None)], [(job.distancing, job.row_distancing)
+                                          for job in batch.create_jobs([self.path], None, [])])
+
+    def test_apply(self):
+        dct: dict = batch.Job(self.path, 50, 100).apply(self.dct)
+        self.assertEqual((50, 100), (dct["distancing"], dct["rows"]["distancing"]))
+        # The dictionary of the file is not modified.
+        self.assertEqual(test_stage.HALL["distancing"], self.dct["distancing"])
+        self.assertEqual(self.dct, batch.Job(self.path, None, None).apply(self.dct))
+        # A hall without rows is left to the validation of the hall.
+        self.assertEqual({"distancing": 50}, batch.Job(self.path, 50, 100).apply({}))
+
+    def test_run(self):
+        Path("broken.json").write_text("{")
+        jobs: List[batch.Job] = batch.create_jobs([self.path, Path("broken.json"), Path("missing.json")], [50, 75],
+                                                  None)
+        options: render.Options = render.Options(render.SvgRenderer.extension)
+        results: List[batch.JobResult] = batch.run(jobs, 2, options=options)
+        self.assertEqual([(job.path, job.distancing) for job in jobs],
+                         [(result.job.path, result.job.distancing) for result in results])
+        self.assertEqual([f"export/Test_distancing_{distancing}_row_distancing_{test_stage.HALL['rows']['distancing']}"
+                          f".svg" for distancing in (50, 75)], [result.output for result in results[:2]])
+        self.assertTrue(all(os.path.isfile(result.output) for result in results[:2]))
+        self.assertEqual([None, None], [result.error for result in results[:2]])
+        self.assertTrue(results[2].error.startswith("JSONDecodeError"))
+        self.assertTrue(results[4].error.startswith("FileNotFoundError"))
+        self.assertEqual([None] * 4, [result.output for result in results[2:]])
+
+        self.path.write_text(json.dumps({"name": "Invalid"}))
+        result: batch.JobResult = batch.run([batch.Job(self.path, None, None)], options=options)[0]
+        self.assertEqual("invalid hall", result.error)
+
+        output: io.StringIO = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            batch.print_summary(results, 1.5)
+        lines: List[str] = output.getvalue().splitlines()
+        self.assertEqual(len(results) + 1, len(lines))
+        self.assertTrue(lines[0].endswith(f"hall.json distancing=50 row_distancing=None -> {results[0].output}"))
+        self.assertIn("broken.json distancing=50 row_distancing=None FAILED (JSONDecodeError", lines[2])
+        self.assertEqual("6 jobs (4 failed) in 1.500s.", lines[-1])
+
+    def test_hall_files(self):
+        Path("broken.json").write_text("{")
+        Path("list.json").write_text("[]")
+        Path("invalid.json").write_text(json.dumps({"name": "Invalid"}))
+        errors: List[str] = []
+        files: batch.HallFiles = batch.HallFiles(batch.collect_files(["*.json"]), errors.append)
+        self.assertEqual(["Test"], [hall.name for _, hall in files.halls()])
+        self.assertEqual(3, files.n_failed)
+        self.assertEqual(["broken.json", "invalid.json: invalid hall", "list.json: invalid hall"],
+                         [error.split(":")[0] if error.startswith("broken") else error for error in errors])
+        self.assertEqual("4 halls (3 failed) in 2.0 ms.", files.summary(0.002))
+
+    def test_parse_values(self):
+        self.assertEqual([50, 75, 100], batch.parse_values("50:100:25"))
+        self.assertEqual([3, 4], batch.parse_values("3:4"))
+        self.assertEqual([7], batch.parse_values("7"))
+        self.assertRaises(ValueError, batch.parse_values, "50:100:0")
+        self.assertRaises(ValueError, batch.parse_values, "1:2:3:4")
+
+    def test_map_chunks(self):
+        values: List[int] = list(range(10))
+        self.assertEqual(square(values), batch.map_chunks(square, values, 3))
+        self.assertEqual(square(values), batch.map_chunks(square, values, 3, min_parallel_items=2))
+        self.assertEqual([], batch.map_chunks(square, [], 3, min_parallel_items=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import copy
+import json
+import math
+import os
+import tempfile
+import unittest
+from typing import List
+
+import clearance
+import float_geometry
+import geometry
+import layout
+import stage
+import test_stage
+
+
+class TestClearance(unittest.TestCase):
+    def test_clear(self):
+        hall: stage.Hall = stage.Hall.from_dict(copy.deepcopy(test_stage.HALL))
+        self.assertTrue(clearance.check(hall).is_clear)
+
+        # The seats of an arc are closer than the distancing in straight line, but not along the arc.
+        circle: float_geometry.Circle = float_geometry.Circle((0, 0), 200)
+        angles: List[float] = [270, 270 + math.degrees(75 / 200)]
+        seats: List[layout.Seat] = [layout.Seat(pos.x, pos.y, angle, 0, 0, None)
+                                    for pos, angle in zip(circle.seat_positions(angles), angles)]
+        plan: layout.SeatPlan = layout.SeatPlan([layout.RowLayout(0, circle.center, 200, [
+            layout.ArcLayout(geometry.ArcAngles(*angles), seats)])])
+        self.assertLess(math.hypot(seats[0].x - seats[1].x, seats[0].y - seats[1].y), 75)
+        self.assertEqual([], clearance.find_conflicts(plan, 75))
+        self.assertEqual(1, len(clearance.find_conflicts(plan, 76)))
+
+        # In a straight line, the seats are closer than the distancing by less than a centimeter.
+        self.assertEqual(1, len(clearance.find_conflicts(plan, 75, arc_tolerance=0)))
+        self.assertEqual([], clearance.find_conflicts(plan, 75, arc_tolerance=1))
+        with self.assertRaises(ValueError):
+            clearance.find_conflicts(plan, 0)
+        with self.assertRaises(ValueError):
+            clearance.SeatGrid(0)
+
+    def test_check(self):
+        dct: dict = copy.deepcopy(test_stage.HALL)
+        # The second row is moved towards the third one, and crosses the percussion area.
+        dct["rows"]["list"][1] = {"center": {"x": 675, "y": 900}}
+        dct["percussion"] = [{"polygon": [{"x": 600, "y": 500}, {"x": 750, "y": 500}, {"x": 750, "y": 600},
+                                          {"x": 600, "y": 600}]}]
+        hall: stage.Hall = stage.Hall.from_dict(dct)
+        plan: layout.SeatPlan = hall.compute_layout()
+        report: clearance.ClearanceReport = clearance.check(hall, plan)
+        self.assertFalse(report.is_clear)
+
+        seats: List[layout.Seat] = plan.seats
+        expected: List[tuple] = sorted(
+            (id(first), id(second)) for i, second in enumerate(seats) for first in seats[:i]
+            if first.row_index != second.row_index and math.hypot(first.x - second.x, first.y - second.y) < 75)
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(expected, sorted((id(conflict.first), id(conflict.second)) for conflict in report.conflicts))
+        self.assertEqual({1, 2}, {conflict.second.row_index for conflict in report.conflicts}
+                         | {conflict.first.row_index for conflict in report.conflicts})
+
+        self.assertEqual(2, len(report.overlaps))
+        for overlap in report.overlaps:
+            self.assertEqual("percussion area 0", overlap.area)
+            self.assertEqual(0, overlap.distance)
+            self.assertTrue(600 <= overlap.seat.x <= 750 and 500 <= overlap.seat.y <= 600)
+
+    def test_area_distance(self):
+        arc: geometry.Arc = geometry.Arc(geometry.Point(0, 0), 100, geometry.ArcAngles(350, 370))
+        self.assertAlmostEqual(10, clearance.area_distance(arc, float_geometry.Point(110, 0)))
+        # Outside of the angles of the arc, the distance is the one to its nearest end.
+        end: float_geometry.Point = float_geometry.Circle((0, 0), 100).seat_positions([10])[0]
+        self.assertAlmostEqual(end.distance(float_geometry.Point(50, 50)),
+                               clearance.area_distance(arc, float_geometry.Point(50, 50)))
+        self.assertAlmostEqual(100, clearance.area_distance(arc, float_geometry.Point(0, 0)))
+        square: float_geometry.Polygon = float_geometry.Polygon((0, 0), (0, 10), (10, 10), (10, 0))
+        self.assertEqual(0, clearance.area_distance(square, float_geometry.Point(5, 5)))
+        self.assertAlmostEqual(5, clearance.area_distance(square, float_geometry.Point(15, 5)))
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            dct: dict = copy.deepcopy(test_stage.HALL)
+            with open(os.path.join(directory, "clear.json"), "w") as write_file:
+                json.dump(dct, write_file)
+            self.assertEqual(0, clearance.main([directory]))
+
+            dct["rows"]["list"][1] = {"center": {"x": 675, "y": 900}}
+            with open(os.path.join(directory, "conflicts.json"), "w") as write_file:
+                json.dump(dct, write_file)
+            self.assertEqual(1, clearance.main([directory]))
+            self.assertEqual(1, clearance.main([directory, "--arc-tolerance", "5"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
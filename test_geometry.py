@@ -1,8 +1,11 @@
 import math
+import random
 import unittest
+from typing import List
 
 import sympy
 
+import float_geometry
 import geometry
 
 
@@ -56,5 +59,206 @@ class TestCircle(unittest.TestCase):
         self.assertAlmostEqual(original_angle, circle.angle(point), 2)
 
 
+class TestFloatGeometry(unittest.TestCase):
+    def test_circle_intersection(self):
+        c1: float_geometry.Circle = float_geometry.Circle((0, 0), 100)
+        c2: float_geometry.Circle = float_geometry.Circle((0, 100), math.sqrt(2) * 100)
+        intersections = sorted(c1.intersection(c2))
+        self.assertEqual(2, len(intersections))
+        self.assertAlmostEqual(-100, intersections[0].x, 6)
+        self.assertAlmostEqual(0, intersections[0].y, 6)
+        self.assertAlmostEqual(100, intersections[1].x, 6)
+        self.assertAlmostEqual(0, intersections[1].y, 6)
+
+    def test_polygon_intersection_matches_sympy(self):
+        vertices = [(0, 0), (0, 1000), (1350, 1000), (1350, 0)]
+        circle: float_geometry.Circle = float_geometry.Circle((675, 1000), 440)
+        exact: geometry.Circle = geometry.Circle(sympy.Point(675, 1000), 440)
+        intersections = circle.sort_points(circle.intersection(float_geometry.Polygon(*vertices)), False)
+        exact_intersections = exact.sort_points(exact.intersection(sympy.Polygon(*vertices)), False)
+        self.assertEqual(len(exact_intersections), len(intersections))
+        for pos, exact_pos in zip(intersections, exact_intersections):
+            self.assertAlmostEqual(float(exact_pos.x), pos.x, 6)
+            self.assertAlmostEqual(float(exact_pos.y), pos.y, 6)
+
+    def test_intersection_arc_angles_matches_sympy(self):
+        vertices = [(100, 300), (600, 300), (600, 900), (100, 900)]
+        circle: float_geometry.Circle = float_geometry.Circle((675, 1000), 440)
+        exact: geometry.Circle = geometry.Circle(sympy.Point(675, 1000), 440)
+        arcs = circle.intersection_arc_angles(float_geometry.Polygon(*vertices))
+        exact_arcs = exact.intersection_arc_angles(geometry.Polygon(*vertices))
+        self.assertEqual(len(exact_arcs), len(arcs))
+        for arc, exact_arc in zip(arcs, exact_arcs):
+            self.assertAlmostEqual(exact_arc.start_angle, arc.start_angle, 6)
+            self.assertAlmostEqual(exact_arc.end_angle, arc.end_angle, 6)
+
+    def test_polygon(self):
+        polygon: float_geometry.Polygon = float_geometry.Polygon((0, 0), (0, 100), (200, 100), (200, 0))
+        self.assertEqual((0, 0, 200, 100), polygon.bounds)
+        self.assertEqual(float_geometry.Point(100, 50), polygon.centroid)
+        self.assertTrue(polygon.encloses_point(float_geometry.Point(10, 10)))
+        self.assertFalse(polygon.encloses_point(float_geometry.Point(0, 10)))
+        self.assertFalse(polygon.encloses_point(float_geometry.Point(300, 10)))
+        self.assertAlmostEqual(10, polygon.distance(float_geometry.Point(10, 50)))
+        self.assertAlmostEqual(100, polygon.distance(float_geometry.Point(300, 50)))
+
+    def test_enlarge(self):
+        rectangle: float_geometry.Polygon = float_geometry.Polygon((0, 0), (0, 100), (200, 100), (200, 0))
+        self.assertEqual([(25, 25), (25, 75), (175, 75), (175, 25)], list(rectangle.enlarge(-25).vertices))
+        self.assertEqual([(-25, -25), (-25, 125), (225, 125), (225, -25)], list(rectangle.enlarge(25).vertices))
+        # The integer coordinates of the exact polygon stay integers.
+        exact: geometry.Polygon = geometry.Polygon((0, 0), (0, 100), (200, 100), (200, 0)).enlarge(-25)
+        self.assertEqual([(25, 25), (25, 75), (175, 75), (175, 25)], exact.get_points())
+        self.assertIsInstance(exact.get_points()[0].x, int)
+
+        diamond: float_geometry.Polygon = float_geometry.Polygon((100, 0), (200, 100), (100, 200), (0, 100))
+        self.assertAlmostEqual(-25 * math.sqrt(2), diamond.enlarge(25).bounds[1])
+        self.assertEqual((-5, -5, 15, 5), float_geometry.Polygon((0, 0), (10, 0)).enlarge(5).bounds)
+
+        # Non convex and sharp corners: the points closer than extra to the polygon are inside the enlarged polygon,
+        # the points of the shrunk polygon are farther than extra from the sides.
+        generator: random.Random = random.Random(0)
+        for vertices in [[(0, 0), (0, 600), (290, 600), (290, 200), (540, 0), (1040, 0), (1290, 200), (1290, 600),
+                          (1580, 600), (1580, 0), (0, 0)],
+                         [(0, 300), (0, 0), (300, 0), (320, -250), (340, 0), (600, 0), (600, 300)]]:
+            polygon: float_geometry.Polygon = float_geometry.Polygon(*vertices)
+            enlarged: float_geometry.Polygon = polygon.enlarge(25)
+            shrunk: float_geometry.Polygon = polygon.enlarge(-25)
+            for _ in range(2000):
+                pos: float_geometry.Point = float_geometry.Point(generator.uniform(-50, 1650),
+                                                                 generator.uniform(-300, 650))
+                if polygon.encloses_point(pos) or polygon.distance(pos) < 25:
+                    self.assertTrue(enlarged.encloses_point(pos))
+                if shrunk.encloses_point(pos):
+                    self.assertTrue(polygon.encloses_point(pos))
+                    self.assertGreater(polygon.distance(pos), 25 - 1e-6)
+                if polygon.encloses_point(pos) and polygon.distance(pos) > 25 + 1e-6:
+                    self.assertTrue(shrunk.encloses_point(pos))
+            # A sharp corner is cut at twice the offset.
+            self.assertGreater(enlarged.bounds[1], polygon.bounds[1] - 2 * 25 - 1e-6)
+
+    def test_around_arc(self):
+        arc: geometry.Arc = geometry.Arc(geometry.Point(0, 0), 100, geometry.ArcAngles(0, 90))
+        polygon: float_geometry.Polygon = float_geometry.Polygon.around_arc(arc, 25)
+        circle: float_geometry.Circle = float_geometry.Circle((0, 0), 100)
+        for angle in range(-30, 121, 3):
+            for radius in range(60, 141, 4):
+                pos: float_geometry.Point = float_geometry.Circle((0, 0), radius).seat_positions([angle])[0]
+                nearest: float_geometry.Point = circle.seat_positions([min(90, max(0, angle))])[0]
+                if pos.distance(nearest) < 25:
+                    self.assertTrue(polygon.encloses_point(pos))
+                elif radius < 70 or radius > 130:
+                    self.assertFalse(polygon.encloses_point(pos))
+        self.assertEqual(list(polygon.vertices), geometry.Arc(geometry.Point(0, 0), 100, geometry.ArcAngles(0, 90))
+                         .enlarge(25).get_points())
+
+        # The polygon around a small arc is a disk.
+        small: float_geometry.Polygon = float_geometry.Polygon.around_arc(
+            geometry.Arc(geometry.Point(0, 0), 10, geometry.ArcAngles(0, 90)), 25)
+        self.assertTrue(small.encloses_point(float_geometry.Point(-20, -1)))
+        self.assertIn(float_geometry.Point(0, 0), small.vertices)
+
+    def test_reduce_vertices(self):
+        polygon: geometry.Polygon = geometry.Polygon((0, 0), (0, 50), (0, 100), (200, 100), (200, 0), (0, 0))
+        self.assertEqual([(0, 0), (0, 100), (200, 100), (200, 0)], polygon.get_points())
+        self.assertEqual(polygon.get_points(), [(int(pos.x), int(pos.y)) for pos in polygon.polygon.vertices])
+        self.assertEqual((0, 0, 200, 100), polygon.bounds)
+
+    def test_arc_array_matches_arc_angles(self):
+        generator: random.Random = random.Random(0)
+        for _ in range(500):
+            arcs: List[List[geometry.ArcAngles]] = []
+            for _ in range(2):
+                # Rounded angles, so that arcs touch and some are empty.
+                n_arcs: int = generator.randint(0, 6)
+                bounds: List[int] = sorted(round(generator.uniform(90, 450)) for _ in range(2 * n_arcs))
+                arcs.append([geometry.ArcAngles(bounds[i], bounds[i + 1]) for i in range(0, len(bounds), 2)])
+
+            array_arcs: geometry.ArcArray = geometry.ArcArray.from_arcs(arcs[0])
+            other_array_arcs: geometry.ArcArray = geometry.ArcArray.from_arcs(arcs[1])
+            for expected, result in [(geometry.ArcAngles.reduce_to(arcs[0], arcs[1]),
+                                      array_arcs.reduce_to(other_array_arcs)),
+                                     (geometry.ArcAngles.exclude(arcs[0], arcs[1]),
+                                      array_arcs.exclude(other_array_arcs))]:
+                self.assertEqual([(arc.start_angle, arc.end_angle) for arc in expected],
+                                 [(arc.start_angle, arc.end_angle) for arc in result.to_arcs()])
+
+    def test_seat_positions(self):
+        circle: float_geometry.Circle = float_geometry.Circle((0, 0), 100)
+        arc: geometry.ArcAngles = geometry.ArcAngles(180, 360)
+        self.assertEqual([180, 225, 270, 315, 360], arc.seat_angles(5))
+        self.assertEqual([270], arc.seat_angles(1))
+        seats = circle.seat_positions(arc.seat_angles(5))
+        for seat, next_seat in zip(seats, seats[1:]):
+            self.assertAlmostEqual(seats[0].distance(seats[1]), seat.distance(next_seat), 9)
+        self.assertAlmostEqual(-100, seats[0].x, 9)
+        self.assertAlmostEqual(-100, seats[2].y, 9)
+        self.assertAlmostEqual(100, seats[4].x, 9)
+
+    def test_intersection_arc_angles_cache(self):
+        float_geometry.ARC_ANGLES_CACHE.clear()
+        polygon: float_geometry.Polygon = float_geometry.Polygon((100, 300), (600, 300), (600, 900), (100, 900))
+        same_polygon: float_geometry.Polygon = float_geometry.Polygon((100, 300), (600, 300), (600, 900), (100, 900))
+        circle: float_geometry.Circle = float_geometry.Circle((675, 1000), 440)
+        arcs = circle.intersection_arc_angles(polygon)
+        self.assertEqual(1, float_geometry.ARC_ANGLES_CACHE.misses)
+        cached_arcs = float_geometry.Circle((675, 1000), 440).intersection_arc_angles(same_polygon)
+        self.assertEqual(1, float_geometry.ARC_ANGLES_CACHE.hits)
+        self.assertEqual([(arc.start_angle, arc.end_angle) for arc in arcs],
+                         [(arc.start_angle, arc.end_angle) for arc in cached_arcs])
+        float_geometry.Circle((675, 1000), 441).intersection_arc_angles(polygon)
+        self.assertEqual(2, float_geometry.ARC_ANGLES_CACHE.misses)
+
+    def test_union_arc_angles(self):
+        circle: float_geometry.Circle = float_geometry.Circle((0, 0), 100)
+        # Concave polygon, with a notch cutting the circle twice between 180 and 360 degrees.
+        notched: float_geometry.Polygon = float_geometry.Polygon((-200, -200), (200, -200), (200, 0), (10, 0),
+                                                                 (10, -150), (-10, -150), (-10, 0), (-200, 0))
+        arcs = circle.compute_union_arc_angles([notched])
+        self.assertEqual(2, len(arcs))
+        self.assertAlmostEqual(180, arcs[0].start_angle, 6)
+        self.assertAlmostEqual(270 - math.degrees(math.asin(0.1)), arcs[0].end_angle, 6)
+        self.assertAlmostEqual(270 + math.degrees(math.asin(0.1)), arcs[1].start_angle, 6)
+        self.assertAlmostEqual(360, arcs[1].end_angle, 6)
+
+        pillar: float_geometry.Polygon = float_geometry.Polygon((-60, -120), (-40, -120), (-40, -80), (-60, -80))
+        union = circle.compute_union_arc_angles([pillar, notched])
+        self.assertEqual([(arc.start_angle, arc.end_angle) for arc in arcs],
+                         [(arc.start_angle, arc.end_angle) for arc in union])
+
+        inside: float_geometry.Polygon = float_geometry.Polygon((-500, -500), (500, -500), (500, 500), (-500, 500))
+        self.assertEqual([(90, 450)], [(arc.start_angle, arc.end_angle)
+                                       for arc in circle.compute_union_arc_angles([inside])])
+        self.assertEqual([], circle.compute_union_arc_angles([float_geometry.Polygon((300, 300), (400, 300),
+                                                                                     (400, 400))]))
+
+    def test_union_arc_angles_through_vertex(self):
+        circle: float_geometry.Circle = float_geometry.Circle((0, 0), 100)
+        diamond: float_geometry.Polygon = float_geometry.Polygon((0, -100), (50, -150), (0, -200), (-50, -150))
+        self.assertEqual([], circle.compute_union_arc_angles([diamond]))
+        rectangle: float_geometry.Polygon = float_geometry.Polygon((-60, -80), (-60, -300), (300, -300), (300, -80))
+        arcs = circle.compute_union_arc_angles([rectangle])
+        self.assertEqual(1, len(arcs))
+        self.assertAlmostEqual(180 + math.degrees(math.atan2(80, 60)), arcs[0].start_angle, 6)
+        self.assertAlmostEqual(360 - math.degrees(math.atan2(80, 60)), arcs[0].end_angle, 6)
+
+    def test_bounds_index(self):
+        squares = [float_geometry.Polygon((x, y), (x + 10, y), (x + 10, y + 10), (x, y + 10))
+                   for x in range(0, 1000, 50) for y in range(0, 1000, 50)]
+        index: float_geometry.BoundsIndex = float_geometry.BoundsIndex.from_areas(squares)
+        self.assertEqual(len(squares), len(index))
+        self.assertEqual([squares[0], squares[1], squares[20], squares[21]], index.query((0, 0, 55, 55)))
+
+        center: float_geometry.Point = float_geometry.Point(500, 500)
+        in_ring = index.query_ring(center, 200, 260)
+        expected = [square for square in squares
+                    if any(200 <= center.distance(vertex) <= 260 for vertex in square.vertices)]
+        for square in expected:
+            self.assertIn(square, in_ring)
+        for square in in_ring:
+            self.assertTrue(center.distance(square.centroid) < 260 + 10 and center.distance(square.centroid) > 200 - 10)
+        self.assertEqual([], float_geometry.BoundsIndex([]).query((0, 0, 10, 10)))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,74 @@
+import copy
+import unittest
+from typing import List, Tuple
+
+import incremental
+import layout_cache
+import render
+import stage
+import test_stage
+
+
+class TestIncrementalDrawing(unittest.TestCase):
+    @staticmethod
+    def hall_without_instruments(dct: dict) -> stage.Hall:
+        dct["rows"]["list"][0].pop("instruments", None)
+        return stage.Hall.from_dict(dct)
+
+    def assert_image_is_complete(self, drawing: incremental.IncrementalDrawing, hall: stage.Hall) -> None:
+        renderer: render.RasterRenderer = render.RasterRenderer(int(hall.stage.bounds[2]),
+                                                                int(hall.stage.bounds[3]), drawing.scale)
+        hall.draw_plan(renderer, hall.compute_layout())
+        assert drawing.image is not None
+        self.assertEqual(renderer.image.tobytes(), drawing.image.tobytes())
+
+    def test_update(self):
+        dct: dict = copy.deepcopy(test_stage.HALL)
+        hall: stage.Hall = self.hall_without_instruments(dct)
+        drawing: incremental.IncrementalDrawing = incremental.IncrementalDrawing(0.5)
+        self.assertEqual([(0, 0, 675, 500)], drawing.update(hall))
+        self.assertEqual(3, drawing.row_cache.misses)
+        self.assert_image_is_complete(drawing, hall)
+
+        self.assertEqual([], drawing.update(self.hall_without_instruments(copy.deepcopy(dct))))
+        self.assertEqual(3, drawing.row_cache.hits)
+
+        # Only the last row moves, the first ones are kept: the seats and the legend are drawn again.
+        dct["rows"]["list"][2]["radius"] = 600
+        moved_hall: stage.Hall = self.hall_without_instruments(copy.deepcopy(dct))
+        boxes: List[Tuple[int, int, int, int]] = drawing.update(moved_hall)
+        self.assertEqual(5, drawing.row_cache.hits)
+        self.assertEqual(4, drawing.row_cache.misses)
+        self.assertLess(sum((box[2] - box[0]) * (box[3] - box[1]) for box in boxes), 675 * 500 / 2)
+        self.assert_image_is_complete(drawing, moved_hall)
+
+        # The first row moves the following ones.
+        dct["rows"]["list"][0]["radius"] = 300
+        dct["rows"]["list"][2].pop("radius")
+        moved_hall = self.hall_without_instruments(copy.deepcopy(dct))
+        drawing.update(moved_hall)
+        self.assertEqual(7, drawing.row_cache.misses)
+        self.assert_image_is_complete(drawing, moved_hall)
+
+    def test_row_cache(self):
+        cache: layout_cache.RowCache = layout_cache.RowCache(max_entries=2)
+        hall: stage.Hall = stage.Hall.from_dict(copy.deepcopy(test_stage.HALL))
+        plan = hall.compute_layout(row_cache=cache)
+        self.assertEqual(2, len(cache))
+        self.assertEqual(3, cache.misses)
+        self.assertEqual([(seat.x, seat.y, seat.instrument) for seat in hall.compute_layout().seats],
+                         [(seat.x, seat.y, seat.instrument) for seat in plan.seats])
+        # The least recently used row is evicted before being looked up again, and so on.
+        hall.compute_layout(row_cache=cache)
+        self.assertEqual(0, cache.hits)
+        self.assertEqual(6, cache.misses)
+
+        cache = layout_cache.RowCache()
+        hall.compute_layout(row_cache=cache)
+        hall.compute_layout(row_cache=cache)
+        self.assertEqual(3, cache.hits)
+        self.assertEqual(3, len(cache))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import copy
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from typing import List
+
+from PIL import Image
+
+import layout
+import render
+import stage
+import test_stage
+
+
+class TestRender(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths: List[Path] = []
+        for i in range(2):
+            path: Path = Path(self.directory.name) / f"sprite_{i}.png"
+            Image.new("RGBA", (200, 200), (i, 0, 0, 255)).save(path)
+            self.paths.append(path)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_svg_defines_sprites_once(self):
+        renderer: render.SvgRenderer = render.SvgRenderer(400, 300)
+        for i in range(10):
+            renderer.sprite(self.paths[i % 2], 50 + 30 * i, 100, 50)
+        renderer.circle(10, 10, 5, (0, 0, 0), 2)
+        renderer.arc((0, 0, 100, 100), 180, 270, (160, 160, 160), 5)
+        renderer.text(10, 10, "Hall & <stage>\nsecond line", 20, (0, 0, 0))
+        svg: str = renderer.to_string()
+        self.assertEqual(2, svg.count("<image "))
+        self.assertEqual(10, svg.count("<use "))
+        self.assertIn('x="25" y="75"', svg)
+        self.assertIn("Hall &amp; &lt;stage&gt;", svg)
+        self.assertIn('d="M 0 50 A 50 50 0 0 1 50 0"', svg)
+
+    def test_raster_sprite_position(self):
+        renderer: render.RasterRenderer = render.RasterRenderer(100, 100)
+        renderer.sprite(self.paths[1], 50, 50, 20)
+        self.assertEqual((1, 0, 0, 255), renderer.image.getpixel((45, 45)))
+        self.assertEqual((255, 255, 255, 255), renderer.image.getpixel((35, 35)))
+        renderer.text(0, 0, "legend", 20, (0, 0, 0))
+
+    def test_options(self):
+        self.assertIsInstance(render.Options("svg").create(10, 10), render.SvgRenderer)
+        self.assertIsInstance(render.Options("pdf").create(10, 10), render.PdfRenderer)
+        self.assertIsInstance(render.Options("png", 0.5, 4).create(10, 10), render.TiledRasterRenderer)
+        with self.assertRaises(ValueError):
+            render.Options("gif")
+        with self.assertRaises(ValueError):
+            render.Options("png", 0)
+        # A renderer implements all the drawing primitives.
+        with self.assertRaises(TypeError):
+            render.Renderer(10, 10)
+
+    def test_scale(self):
+        renderer: render.RasterRenderer = render.RasterRenderer(200, 100, 0.5)
+        self.assertEqual((100, 50), renderer.image.size)
+        renderer.sprite(self.paths[1], 100, 50, 40)
+        self.assertEqual((1, 0, 0, 255), renderer.image.getpixel((50, 25)))
+        self.assertEqual((255, 255, 255, 255), renderer.image.getpixel((38, 25)))
+        svg: render.SvgRenderer = render.SvgRenderer(200, 100, 0.5)
+        svg.sprite(self.paths[1], 100, 50, 40)
+        self.assertIn('width="100" height="50" viewBox="0 0 200 100"', svg.to_string())
+        self.assertIn('<image id="sprite0" width="40" height="40"', svg.to_string())
+
+    def test_tiled_equals_whole_image(self):
+        def draw(renderer: render.Renderer) -> None:
+            renderer.polygon(((10, 10), (180, 30), (100, 190)), (0, 0, 0), (160, 160, 160))
+            renderer.arc((20, 20, 120, 120), 180, 300, (0, 0, 255), 5)
+            renderer.circle(150, 150, 25, (0, 0, 0), 2)
+            renderer.line(((0, 199), (199, 0)), (255, 0, 0), 3)
+            for i in range(6):
+                renderer.sprite(self.paths[i % 2], 30 * i + 15, 35 * i, 30)
+            renderer.text(10, 120, "legend\nsecond line", 20, (0, 0, 0))
+
+        whole: render.RasterRenderer = render.RasterRenderer(200, 200, 1.5)
+        draw(whole)
+        tiled: render.TiledRasterRenderer = render.TiledRasterRenderer(200, 200, 1.5, 7)
+        draw(tiled)
+        path: str = os.path.join(self.directory.name, "tiled.png")
+        tiled.save(path)
+        with Image.open(path) as image:
+            self.assertEqual(whole.image.size, image.size)
+            self.assertEqual(whole.image.tobytes(), image.convert("RGBA").tobytes())
+
+    def test_hall_draw(self):
+        dct: dict = copy.deepcopy(test_stage.HALL)
+        dct["rows"]["list"][0].pop("instruments")
+        hall: stage.Hall = stage.Hall.from_dict(dct)
+        plan: layout.SeatPlan = hall.compute_layout()
+        current_directory: str = os.getcwd()
+        os.chdir(self.directory.name)
+        try:
+            os.mkdir("export")
+            for output_format in render.RENDERERS:
+                hall.draw(options=render.Options(output_format))
+                self.assertTrue(os.path.getsize(hall.get_export_path(output_format)) > 0)
+            with open(hall.get_export_path("svg"), "r") as read_file:
+                self.assertEqual(plan.n_seats, read_file.read().count("<circle "))
+        finally:
+            os.chdir(current_directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
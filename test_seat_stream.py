@@ -0,0 +1,52 @@
+import copy
+import io
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from typing import List
+
+import batch
+import layout
+import seat_stream
+import stage
+import test_stage
+
+
+class TestSeatStream(unittest.TestCase):
+    def test_write_seats(self):
+        hall: stage.Hall = stage.Hall.from_dict(copy.deepcopy(test_stage.HALL))
+        stream: io.StringIO = io.StringIO()
+        n_seats: int = seat_stream.write_seats(hall, stream)
+        records: List[dict] = [json.loads(line) for line in stream.getvalue().splitlines()]
+        plan: layout.SeatPlan = hall.compute_layout()
+        self.assertEqual(plan.n_seats, n_seats)
+        self.assertEqual([(seat.row_index, seat.arc_index, seat.x, seat.y, seat.angle, seat.instrument)
+                          for seat in plan.seats],
+                         [(record["row_index"], record["arc_index"], record["x"], record["y"], record["angle"],
+                           record["instrument"]) for record in records])
+        self.assertEqual({"Test"}, {record["hall"] for record in records})
+
+    def test_write_halls(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path: Path = Path(directory) / "hall.json"
+            with open(path, "w") as write_file:
+                json.dump(test_stage.HALL, write_file)
+            stream: io.StringIO = io.StringIO()
+            self.assertEqual(0, seat_stream.write_halls(batch.HallFiles([path]), [75, 100], [], stream))
+            records: List[dict] = [json.loads(line) for line in stream.getvalue().splitlines()]
+            self.assertEqual([75, 100], sorted({record["distancing"] for record in records}))
+
+            invalid: Path = Path(directory) / "invalid.json"
+            with open(invalid, "w") as write_file:
+                json.dump({"name": "Invalid"}, write_file)
+            output: str = os.path.join(directory, "seats.ndjson")
+            self.assertEqual(1, seat_stream.main([str(path), str(invalid),
+                                                  "--distancing", "75:100:25", "--output", output]))
+            with open(output, "r") as read_file:
+                self.assertEqual(stream.getvalue(), read_file.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
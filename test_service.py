@@ -0,0 +1,97 @@
+import asyncio
+import copy
+import json
+import unittest
+import unittest.mock
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple
+
+import service
+import stage
+import test_stage
+
+
+async def post(port: int, target: str, body: bytes) -> Tuple[int, bytes]:
+    """Status and content of the response to a request to the service on localhost."""
+    reader, writer = await asyncio.open_connection(service.DEFAULT_HOST, port)
+    writer.write(f"POST {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1")
+                 + body)
+    await writer.drain()
+    response: bytes = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), content
+
+
+class TestService(unittest.TestCase):
+    executor: ProcessPoolExecutor
+
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = service.create_executor(1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.shutdown()
+
+    def run_service(self, scenario) -> service.RenderService:
+        """Run the scenario with the port of a service listening on localhost."""
+        render_service: service.RenderService = service.RenderService(self.executor)
+
+        async def run():
+            server = await render_service.start(port=0)
+            async with server:
+                await scenario(server.sockets[0].getsockname()[1])
+
+        asyncio.run(run())
+        return render_service
+
+    def test_render(self):
+        dct: dict = copy.deepcopy(test_stage.HALL)
+        # The sprites of the instruments are not drawn, they are not part of the repository.
+        dct["rows"]["list"][0].pop("instruments")
+        body: bytes = json.dumps(dct).encode("utf-8")
+
+        async def scenario(port: int):
+            status, content = await post(port, "/render?format=json", body)
+            self.assertEqual(200, status)
+            self.assertEqual(stage.Hall.from_dict(dct).compute_layout().n_seats, json.loads(content)["n_seats"])
+            self.assertEqual({"Test"}, {seat["hall"] for seat in json.loads(content)["seats"]})
+
+            status, content = await post(port, "/render?format=svg&scale=0.5", body)
+            self.assertEqual(200, status)
+            self.assertTrue(content.startswith(b"<svg"))
+
+            # Identical requests received together are rendered once.
+            responses = await asyncio.gather(*[post(port, "/render", body) for _ in range(4)])
+            self.assertEqual({200}, {status for status, _ in responses})
+            self.assertEqual(1, len({content for _, content in responses}))
+            self.assertTrue(responses[0][1].startswith(b"\x89PNG"))
+
+        render_service: service.RenderService = self.run_service(scenario)
+        self.assertEqual(3, render_service.n_renders)
+        self.assertEqual(3, render_service.n_coalesced)
+
+    def test_errors(self):
+        async def scenario(port: int):
+            self.assertEqual(404, (await post(port, "/draw", b"{}"))[0])
+            self.assertEqual(400, (await post(port, "/render", b"{"))[0])
+            self.assertEqual(400, (await post(port, "/render?format=bmp", b"{}"))[0])
+            dct: dict = copy.deepcopy(test_stage.HALL)
+            del dct["stage"]
+            status, content = await post(port, "/render", json.dumps(dct).encode("utf-8"))
+            self.assertEqual(400, status)
+            self.assertIn(b"stage", content)
+
+        self.assertEqual(0, self.run_service(scenario).n_renders)
+
+    def test_start_method(self):
+        # Without a fork server (Windows), the workers are spawned.
+        with unittest.mock.patch.object(service.multiprocessing, "get_all_start_methods", return_value=["spawn"]):
+            executor: ProcessPoolExecutor = service.create_executor(1)
+        executor.shutdown()
+        self.assertEqual("spawn", executor._mp_context.get_start_method())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import copy
+import math
+import unittest
+from typing import List, Optional
+
+import float_geometry
+import geometry
+import layout
+import solver
+import stage
+import test_stage
+
+
+class TestSolver(unittest.TestCase):
+    def test_fit_row(self):
+        arcs: Optional[List[geometry.ArcAngles]] = solver.fit_row([geometry.ArcAngles(190, 350)], [3], 100, 300)
+        self.assertEqual(1, len(arcs))
+        self.assertAlmostEqual(270, (arcs[0].start_angle + arcs[0].end_angle) / 2)
+        self.assertAlmostEqual(2 * 100 / 300, math.radians(arcs[0].end_angle - arcs[0].start_angle))
+
+        arcs = solver.fit_row([geometry.ArcAngles(190, 200)], [1], 100, 300)
+        self.assertEqual(200, arcs[0].end_angle)
+
+        arcs = solver.fit_row([geometry.ArcAngles(190, 230), geometry.ArcAngles(310, 350)], [3, 3], 100, 300)
+        self.assertEqual(2, len(arcs))
+        self.assertEqual(190, arcs[0].start_angle)
+        self.assertEqual(310, arcs[1].start_angle)
+
+        self.assertIsNone(solver.fit_row([geometry.ArcAngles(190, 230)], [3, 3], 100, 300))
+        self.assertIsNone(solver.fit_row([], [1], 100, 300))
+
+    def test_solve(self):
+        dct: dict = copy.deepcopy(test_stage.HALL)
+        dct["rows"]["list"][0]["instruments"] = [["Clarinet"] * 12]
+        dct["rows"]["list"][1] = {"instruments": [["Flute"] * 6, ["Tuba"] * 4]}
+        hall: Optional[stage.Hall] = stage.Hall.from_dict(dct)
+        solution: Optional[solver.Solution] = solver.solve(hall)
+        self.assertIsNotNone(solution)
+        self.assertGreater(solution.rows[0].n_candidates, 1)
+        self.assertIsNone(solution.rows[2].angles)
+
+        solved_dct: dict = solution.apply(dct)
+        self.assertNotIn("radius", dct["rows"]["list"][1])
+        plan: layout.SeatPlan = stage.Hall.from_dict(solved_dct).compute_layout()
+        min_radius: int = hall.rows.n_distancing_delta_first_row + hall.rows.n_distancing_row
+        for row_solution in solution.rows[:2]:
+            row_layout: layout.RowLayout = plan.rows[row_solution.index]
+            self.assertEqual(row_solution.radius, row_layout.radius)
+            self.assertEqual(solved_dct["rows"]["list"][row_solution.index]["instruments"],
+                             [[seat.instrument for seat in arc.seats] for arc in row_layout.arcs])
+
+            # The previous candidate radius is too small.
+            smaller: int = row_solution.radius - solver.DEFAULT_RADIUS_STEP
+            if smaller >= min_radius:
+                row: stage.Row = hall.rows.rows[row_solution.index]
+                self.assertIsNone(solver.fit_row(
+                    hall.clip_row(row, float_geometry.Circle(row_layout.center, smaller)),
+                    [len(instruments) for instruments in row.instruments], hall.distancing, smaller))
+            min_radius = row_solution.radius + hall.rows.n_distancing_row
+
+    def test_solve_null_group(self):
+        # A null group only needs an arc for one seat, the layout fills it with as many seats as fit.
+        dct: dict = copy.deepcopy(test_stage.HALL)
+        dct["rows"]["list"][0]["instruments"] = [None, ["Flute"] * 3]
+        solution: Optional[solver.Solution] = solver.solve(stage.Hall.from_dict(dct))
+        self.assertIsNotNone(solution)
+        self.assertEqual(2, len(solution.rows[0].angles))
+        self.assertEqual(0, solution.rows[0].angles[0].end_angle - solution.rows[0].angles[0].start_angle)
+
+    def test_solve_impossible(self):
+        dct: dict = copy.deepcopy(test_stage.HALL)
+        dct["rows"]["list"][0]["instruments"] = [["Flute"] * 100]
+        self.assertIsNone(solver.solve(stage.Hall.from_dict(dct)))
+
+
+if __name__ == '__main__':
+    unittest.main()
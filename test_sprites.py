@@ -0,0 +1,42 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from PIL import Image
+
+import sprites
+
+
+class TestSpriteCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(3):
+            path: Path = Path(self.directory.name) / f"sprite_{i}.png"
+            Image.new("RGBA", (400, 200), (i, 0, 0, 255)).save(path)
+            self.paths.append(path)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_get_decodes_once(self):
+        cache: sprites.SpriteCache = sprites.SpriteCache()
+        sprite: Image.Image = cache.get(self.paths[0], 100)
+        self.assertEqual((100, 50), sprite.size)
+        self.assertIs(sprite, cache.get(self.paths[0], 100))
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(1, cache.hits)
+        self.assertIsNot(sprite, cache.get(self.paths[0], 200))
+
+    def test_eviction(self):
+        cache: sprites.SpriteCache = sprites.SpriteCache(max_bytes=2 * 100 * 50 * 4)
+        for path in self.paths:
+            cache.get(path, 100)
+        self.assertEqual(2, len(cache))
+        self.assertLessEqual(cache.n_bytes, cache.max_bytes)
+        cache.get(self.paths[0], 100)
+        self.assertEqual(4, cache.misses)
+
+
+if __name__ == '__main__':
+    unittest.main()
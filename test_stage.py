@@ -0,0 +1,131 @@
+import copy
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import float_geometry
+import layout
+import layout_cache
+import profiling
+import stage
+
+HALL: dict = {
+    "name": "Test",
+    "stage": {"x": 1350, "y": 1000},
+    "rows": {
+        "list": [
+            {"radius": 200, "instruments": [["Clarinet", "Clarinet", "Oboe"]]},
+            None,
+            {"angles": [{"start": 200, "end": 235}, {"start": 305, "end": 340}]}
+        ],
+        "distancing": 120,
+        "distancingFirstRow": 40,
+        "center": {"x": 675, "y": 1000}
+    },
+    "distancing": 75,
+    "percussion": [],
+    "hidden": [],
+    "legend": {"x": 10, "y": 10}
+}
+
+
+class TestHall(unittest.TestCase):
+    def test_compute_layout(self):
+        hall: Optional[stage.Hall] = stage.Hall.from_dict(copy.deepcopy(HALL))
+        self.assertIsNotNone(hall)
+        plan: layout.SeatPlan = hall.compute_layout()
+        self.assertEqual(3, len(plan.rows))
+        self.assertEqual([200, 320, 440], [row.radius for row in plan.rows])
+        self.assertEqual(["Clarinet", "Clarinet", "Oboe"], [seat.instrument for seat in plan.rows[0].seats])
+        self.assertEqual(2, len(plan.rows[2].arcs))
+        self.assertEqual(len(plan.seats), plan.n_seats)
+        for seat in plan.seats:
+            row: layout.RowLayout = plan.rows[seat.row_index]
+            self.assertAlmostEqual(row.radius, row.center.distance(seat), 6)
+
+    def test_seat_margins(self):
+        dct: dict = copy.deepcopy(HALL)
+        dct["rows"]["list"] = [{"radius": 450, "angles": [{"start": 181, "end": 359}]}]
+        dct["hidden"] = [{"arc": {"radius": 450, "angles": {"start": 260, "end": 280}}}]
+        hall: Optional[stage.Hall] = stage.Hall.from_dict(dct)
+        seats = hall.compute_layout().seats
+        self.assertGreater(len(seats), 0)
+        for seat in seats:
+            # Inside the stage and away from the hidden arc, by the seat radius.
+            self.assertTrue(stage.RADIUS_SEAT <= seat.x <= 1350 - stage.RADIUS_SEAT)
+            self.assertTrue(seat.angle < 260 - 3 or seat.angle > 280 + 3)
+        self.assertEqual(len(seats), hall.compute_layout(exact=True).n_seats)
+
+    def test_compute_layout_in_threads(self):
+        hall: Optional[stage.Hall] = stage.Hall.from_dict(copy.deepcopy(HALL))
+        expected: int = hall.compute_layout().n_seats
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            n_seats = list(executor.map(lambda _: hall.compute_layout().n_seats, range(8)))
+        self.assertEqual([expected] * 8, n_seats)
+
+    def test_layout_cache(self):
+        dct: dict = copy.deepcopy(HALL)
+        hall: Optional[stage.Hall] = stage.Hall.from_dict(dct)
+        with tempfile.TemporaryDirectory() as directory:
+            cache: layout_cache.LayoutCache = layout_cache.LayoutCache(directory, max_entries=1)
+            plan: layout.SeatPlan = hall.compute_layout(cache=cache)
+            self.assertEqual(1, cache.misses)
+
+            dct["rows"]["list"][0]["instruments"] = [["Flute", "Flute", "Tuba"]]
+            dct["name"] = "Renamed"
+            renamed_hall: Optional[stage.Hall] = stage.Hall.from_dict(dct)
+            self.assertEqual(hall.get_layout_key(), renamed_hall.get_layout_key())
+            cached_plan: layout.SeatPlan = renamed_hall.compute_layout(cache=cache)
+            self.assertEqual(1, cache.hits)
+            self.assertEqual(["Flute", "Flute", "Tuba"], [seat.instrument for seat in cached_plan.rows[0].seats])
+            self.assertEqual([(seat.x, seat.y) for seat in plan.seats],
+                             [(seat.x, seat.y) for seat in cached_plan.seats])
+
+            dct["distancing"] = 80
+            moved_hall: Optional[stage.Hall] = stage.Hall.from_dict(dct)
+            self.assertNotEqual(hall.get_layout_key(), moved_hall.get_layout_key())
+            moved_hall.compute_layout(cache=cache)
+            self.assertEqual(2, cache.misses)
+            self.assertIsNone(cache.get(hall.get_layout_key()))
+
+    def test_seat_array(self):
+        plan: layout.SeatPlan = stage.Hall.from_dict(copy.deepcopy(HALL)).compute_layout()
+        seats: layout.SeatArray = plan.to_array()
+        self.assertEqual(plan.n_seats, len(seats))
+        self.assertEqual(["Clarinet", "Oboe", None], seats.instruments)
+        self.assertEqual([(seat.x, seat.y, seat.angle, seat.row_index, seat.arc_index, seat.instrument)
+                          for seat in plan.seats],
+                         [(seat.x, seat.y, seat.angle, seat.row_index, seat.arc_index, seat.instrument)
+                          for seat in seats])
+        self.assertEqual(34 * len(seats), seats.n_bytes)
+
+    def test_profile(self):
+        with profiling.profile() as profiler:
+            hall: Optional[stage.Hall] = stage.Hall.from_dict(copy.deepcopy(HALL))
+            hall.compute_layout()
+        summary: dict = profiler.summary()
+        self.assertEqual(1, summary["parse"]["calls"])
+        self.assertEqual(3, summary["clip_row"]["calls"])
+        self.assertIn("place_seats", summary)
+        trace: dict = profiling.merge([profiler.to_dict(0), profiler.to_dict(1)])
+        self.assertEqual(2 * len(profiler.spans), len(trace["traceEvents"]))
+        self.assertEqual(2 * summary["clip_row"]["calls"], trace["otherData"]["summary"]["clip_row"]["calls"])
+
+        hall.compute_layout()
+        self.assertEqual(summary["clip_row"]["calls"], profiler.summary()["clip_row"]["calls"])
+
+    def test_profile_intersections(self):
+        # Every clip of a row is counted, the intersections computed again only when they are not memoized.
+        float_geometry.ARC_ANGLES_CACHE.clear()
+        hall: Optional[stage.Hall] = stage.Hall.from_dict(copy.deepcopy(HALL))
+        with profiling.profile() as profiler:
+            hall.compute_layout()
+            hall.with_distancing(hall.distancing, hall.rows.n_distancing_row,
+                                 hall.rows.n_distancing_delta_first_row).compute_layout()
+        self.assertEqual(2 * float_geometry.ARC_ANGLES_CACHE.misses, profiler.counters["intersection_calls"])
+        self.assertEqual(float_geometry.ARC_ANGLES_CACHE.misses, profiler.counters["intersection_misses"])
+
+
+if __name__ == '__main__':
+    unittest.main()
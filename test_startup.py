@@ -0,0 +1,22 @@
+import unittest
+from typing import Dict, Final
+
+import benchmark
+
+# Time a new interpreter may take to import stage, more than the bare interpreter. Importing sympy alone takes
+# longer than that.
+IMPORT_BUDGET_SECONDS: Final[float] = 0.35
+
+
+class TestStartup(unittest.TestCase):
+    def test_import_budget(self):
+        results: Dict[str, Dict[str, float]] = benchmark.run_startup(3)
+        for name in ["import_stage", "import_cli", "layout"]:
+            self.assertNotIn("error", results[name])
+            self.assertEqual([], results[name]["heavy_modules"], name)
+        self.assertEqual(["sympy"], results["import_exact_geometry"]["heavy_modules"])
+        self.assertLess(results["import_stage"]["seconds"] - results["python"]["seconds"], IMPORT_BUDGET_SECONDS)
+
+
+if __name__ == '__main__':
+    unittest.main()
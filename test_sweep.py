@@ -0,0 +1,76 @@
+import copy
+import io
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock
+from pathlib import Path
+from typing import List
+
+import batch
+import stage
+import sweep
+import test_stage
+
+
+class TestSweep(unittest.TestCase):
+    def test_evaluate(self):
+        points: List[sweep.SweepPoint] = sweep.create_grid([50, 100], [100, 150], None)
+        self.assertEqual([(50, 100), (50, 150), (100, 100), (100, 150)],
+                         [(point.distancing, point.row_distancing) for point in points])
+
+        results: List[sweep.SweepResult] = sweep.sweep(copy.deepcopy(test_stage.HALL), points)
+        for point, result in zip(points, results):
+            # The same hall file without instruments, laid out on its own.
+            dct: dict = copy.deepcopy(test_stage.HALL)
+            dct["distancing"] = point.distancing
+            dct["rows"]["distancing"] = point.row_distancing
+            dct["rows"]["list"][0].pop("instruments")
+            self.assertEqual(stage.Hall.from_dict(dct).compute_layout().n_seats, result.n_seats)
+            self.assertEqual(test_stage.HALL["rows"]["distancingFirstRow"], result.first_row_distancing)
+            self.assertEqual(len(test_stage.HALL["rows"]["list"]), len(result.seats_per_row))
+
+        self.assertGreater(results[0].n_seats, results[2].n_seats)
+        self.assertGreater(results[1].seats_per_row[-1], results[0].seats_per_row[-1])
+        with unittest.mock.patch.object(batch, "ProcessPoolExecutor", side_effect=AssertionError):
+            self.assertEqual(len(points), len(sweep.sweep(copy.deepcopy(test_stage.HALL), points, 2)))
+
+        # 3 processes on 400 points, below the default threshold: the last chunk is shorter than the others.
+        parallel_results: List[sweep.SweepResult] = sweep.sweep(
+            copy.deepcopy(test_stage.HALL), sweep.create_grid(list(range(50, 150)), [100, 150], [0, 40]), 3,
+            min_parallel_points=2)
+        self.assertEqual(400, len(parallel_results))
+        self.assertEqual([(distancing, first_row_distancing, row_distancing) for distancing in range(50, 150)
+                          for first_row_distancing in (0, 40) for row_distancing in (100, 150)],
+                         [(result.distancing, result.first_row_distancing, result.row_distancing)
+                          for result in parallel_results])
+        self.assertEqual([result.to_dict() for result in results],
+                         [result.to_dict() for result in parallel_results
+                          if result.distancing in (50, 100) and result.first_row_distancing == 40])
+
+    def test_write(self):
+        results: List[sweep.SweepResult] = [sweep.SweepResult("Hall", 75, 120, 40, [8, 0, 12])]
+        csv_file: io.StringIO = io.StringIO()
+        sweep.write_csv(results, csv_file)
+        self.assertEqual("hall,distancing,row_distancing,first_row_distancing,n_seats,n_rows,seats_per_row\n"
+                         "Hall,75,120,40,20,2,8 0 12\n", csv_file.getvalue())
+
+        json_file: io.StringIO = io.StringIO()
+        sweep.write_json(results, json_file)
+        self.assertEqual([results[0].to_dict()], json.loads(json_file.getvalue()))
+        self.assertEqual(20, json.loads(json_file.getvalue())[0]["n_seats"])
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            Path(directory, "hall.json").write_text(json.dumps(test_stage.HALL))
+            Path(directory, "broken.json").write_text("{")
+            output: str = os.path.join(directory, "sweep.json")
+            self.assertEqual(1, sweep.main([os.path.join(directory, "*.json"), "--distancing", "50:70:10", "--format",
+                                            "json", "--output", output]))
+            with open(output, "r") as read_file:
+                self.assertEqual([50, 60, 70], [result["distancing"] for result in json.load(read_file)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import contextlib
+import copy
+import io
+import json
+import os
+import tempfile
+import unittest
+from typing import List, Optional, Tuple
+
+import render
+import stage
+import test_stage
+import tour
+
+VENUE: dict = {key: value for key, value in test_stage.HALL.items() if key != "name"}
+VENUE["rows"] = {**VENUE["rows"], "list": [{"radius": 200}, None, {
+    "angles": [{"start": 200, "end": 235}, {"start": 305, "end": 340}]}]}
+
+TOUR: dict = {
+    "name": "Spring",
+    "venues": {"Large": VENUE, "Small": {**VENUE, "stage": {"x": 1000, "y": 800}}},
+    "ensembles": {
+        "Winds": {"rows": [{"instruments": [["Clarinet", "Clarinet", "Oboe"]]}]},
+        "Brass": {"rows": [{"instruments": [["Trumpet", "Trumpet"]]}, {"instruments": [["Trumpet", "Trumpet"]]}]}
+    }
+}
+
+
+class TestTour(unittest.TestCase):
+    def test_create_halls(self):
+        parsed_tour: Optional[tour.Tour] = tour.Tour.from_dict(copy.deepcopy(TOUR))
+        self.assertEqual([("Large", "Winds"), ("Large", "Brass"), ("Small", "Winds"), ("Small", "Brass")],
+                         [(stop.venue, stop.ensemble) for stop in parsed_tour.stops])
+        interner: tour.Interner = tour.Interner()
+        halls: List[Tuple[tour.Stop, Optional[stage.Hall]]] = parsed_tour.create_halls(interner)
+        self.assertEqual(["Large_Winds", "Large_Brass", "Small_Winds", "Small_Brass"],
+                         [hall.name for _, hall in halls])
+
+        # The hall of the venue and ensemble of the test hall is laid out as it.
+        expected: stage.Hall = stage.Hall.from_dict(copy.deepcopy(test_stage.HALL))
+        self.assertEqual([(seat.x, seat.y, seat.instrument) for seat in expected.compute_layout().seats],
+                         [(seat.x, seat.y, seat.instrument) for seat in halls[0][1].compute_layout().seats])
+
+        large_winds, large_brass, small_winds, small_brass = (hall for _, hall in halls)
+        # The rows, the instruments and the areas equal between halls are the same objects.
+        self.assertIs(large_winds.rows.rows[2], small_brass.rows.rows[2])
+        self.assertIs(large_brass.rows.rows[0].instruments[0], large_brass.rows.rows[1].instruments[0])
+        self.assertIs(large_winds.rows.podium, small_winds.rows.podium)
+        self.assertIsNot(large_winds.stage, small_winds.stage)
+        self.assertIs(large_winds.float_hidden_areas_for_seats, large_brass.float_hidden_areas_for_seats)
+        self.assertGreater(interner.hits, 0)
+
+    def test_invalid_stop(self):
+        dct: dict = copy.deepcopy(TOUR)
+        for venue in dct["venues"].values():
+            venue["rows"] = {key: value for key, value in venue["rows"].items() if key != "list"}
+        dct["ensembles"] = {"Empty": {"rows": []}, "Winds": TOUR["ensembles"]["Winds"]}
+        # Only the stops of the ensemble without rows are invalid, whatever the order of the stops.
+        with self.assertLogs(tour.logger, "WARNING"):
+            halls: List[Tuple[tour.Stop, Optional[stage.Hall]]] = tour.Tour.from_dict(dct).create_halls()
+        self.assertEqual({"Large_Empty": False, "Large_Winds": True, "Small_Empty": False, "Small_Winds": True},
+                         {stop.name: hall is not None for stop, hall in halls})
+        self.assertEqual(["Clarinet", "Clarinet", "Oboe"],
+                         [seat.instrument for seat in halls[1][1].compute_layout().seats])
+
+    def test_from_dict(self):
+        dct: dict = copy.deepcopy(TOUR)
+        dct["stops"] = [{"venue": "Small", "ensemble": "Winds"}]
+        self.assertEqual(["Small_Winds"], [stop.name for stop in tour.Tour.from_dict(dct).stops])
+        dct["stops"].append({"venue": "Unknown", "ensemble": "Winds"})
+        with self.assertLogs(tour.logger, "WARNING"):
+            self.assertIsNone(tour.Tour.from_dict(dct))
+        for stops in (["Large"], "Large", [{"venue": ["Large"], "ensemble": "Winds"}]):
+            dct["stops"] = stops
+            with self.assertLogs(tour.logger, "WARNING"):
+                self.assertIsNone(tour.Tour.from_dict(dct))
+        with self.assertLogs(tour.logger, "WARNING"):
+            self.assertIsNone(tour.Tour.from_dict([TOUR]))
+
+    def test_invalid_venue_rows(self):
+        dct: dict = copy.deepcopy(TOUR)
+        # A venue whose rows are not an object with a list of rows is skipped, with the stops in it.
+        for rows in ([1], {"list": {"radius": 200}}, {"list": [1]}):
+            dct["venues"]["Small"]["rows"] = rows
+            with self.assertLogs(tour.logger, "WARNING"):
+                parsed_tour: Optional[tour.Tour] = tour.Tour.from_dict(dct)
+            self.assertEqual(["Large_Winds", "Large_Brass"], [stop.name for stop in parsed_tour.stops])
+            self.assertEqual(2, len([hall for _, hall in parsed_tour.create_halls() if hall is not None]))
+        dct["stops"] = [{"venue": "Small", "ensemble": "Winds"}]
+        with self.assertLogs(tour.logger, "WARNING"):
+            self.assertIsNone(tour.Tour.from_dict(dct))
+        dct["venues"]["Large"]["rows"] = [1]
+        with self.assertLogs(tour.logger, "WARNING"):
+            self.assertIsNone(tour.Tour.from_dict(dct))
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, "tour.json")
+            dct: dict = copy.deepcopy(TOUR)
+            # The sprites of the instruments are relative to the repository.
+            dct["ensembles"] = {"Empty": {"rows": []}, "Wide": {"rows": [None, {"radius": 400}]}}
+            with open(path, "w") as write_file:
+                json.dump(dct, write_file)
+            cwd: str = os.getcwd()
+            os.chdir(directory)
+            try:
+                self.assertEqual(0, tour.main([path, "--no-cache", "--format", render.SvgRenderer.extension]))
+                self.assertEqual(4, len(os.listdir("export")))
+            finally:
+                os.chdir(cwd)
+
+            # Files which cannot be read or are not tours are reported, without a traceback.
+            with open(path, "w") as write_file:
+                write_file.write("{")
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(1, tour.main([path]))
+                self.assertEqual(1, tour.main([os.path.join(directory, "missing.json")]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import copy
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from typing import List
+
+import test_stage
+import validator
+
+
+class TestValidator(unittest.TestCase):
+    def test_valid(self):
+        self.assertEqual([], validator.validate(copy.deepcopy(test_stage.HALL)))
+        with open("example.json", "r") as read_file:
+            self.assertEqual([], validator.validate(json.load(read_file)))
+
+    def test_all_errors(self):
+        dct: dict = copy.deepcopy(test_stage.HALL)
+        dct["stage"]["x"] = -1
+        dct["hiden"] = []
+        dct["_comment"] = "ignored"
+        dct["rows"]["list"][0]["instruments"] = [["Clarinett", 3, None], []]
+        dct["rows"]["list"][2]["angles"][1] = {"start": 350, "end": 305}
+        dct["percussion"] = [{"polygon": [{"x": 0}]}, {}]
+        del dct["legend"]
+        errors: List[validator.ValidationError] = validator.validate(dct)
+        self.assertEqual(["$.hiden", "$.stage.x", "$.rows.list[0].instruments[0][0]",
+                          "$.rows.list[0].instruments[0][1]", "$.rows.list[0].instruments[1]",
+                          "$.rows.list[2].angles[1]", "$.percussion[0].polygon", "$.percussion[0].polygon[0]",
+                          "$.percussion[1]", "$.legend"],
+                         [error.path for error in errors])
+        self.assertIn("did you mean 'hidden'", errors[0].message)
+        self.assertIn("did you mean 'Clarinet'", errors[2].message)
+
+        self.assertEqual(["$"], [error.path for error in validator.validate([])])
+
+    def test_arc_counts(self):
+        dct: dict = copy.deepcopy(test_stage.HALL)
+        dct["rows"]["list"][2]["instruments"] = [["Flute"], ["Tuba"], ["Tuba"]]
+        errors: List[validator.ValidationError] = validator.validate(dct)
+        self.assertEqual(["$.rows.list[2].instruments"], [error.path for error in errors])
+        self.assertEqual([], validator.validate(dct, check_arcs=False))
+
+        # A hidden area splits the only arc of the first row in two.
+        dct["rows"]["list"][2]["instruments"] = [["Flute"], ["Tuba"]]
+        dct["rows"]["list"][0]["instruments"] = [["Flute"], ["Tuba"]]
+        dct["hidden"] = [{"polygon": [{"x": 650, "y": 700}, {"x": 700, "y": 700}, {"x": 700, "y": 850},
+                                      {"x": 650, "y": 850}]}]
+        self.assertEqual([], validator.validate(dct))
+
+    def test_validate_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths: List[Path] = []
+            for i in range(3):
+                paths.append(Path(directory) / f"hall_{i}.json")
+                dct: dict = copy.deepcopy(test_stage.HALL)
+                dct["distancing"] = "75" if i == 1 else 75
+                paths[-1].write_text(json.dumps(dct))
+            paths.append(Path(directory) / "broken.json")
+            paths[-1].write_text("{\n\"name\": ")
+
+            results: List[validator.FileResult] = validator.validate_files(paths)
+            self.assertEqual([0, 1, 0, 1], [len(result.errors) for result in results])
+            self.assertEqual("$.distancing", results[1].errors[0].path)
+            self.assertIn("line 2", results[3].errors[0].message)
+
+            parallel_results: List[validator.FileResult] = validator.validate_files(paths * 70, 2)
+            self.assertEqual([0, 1, 0, 1] * 70, [len(result.errors) for result in parallel_results])
+            self.assertEqual(1, validator.main([os.path.join(directory, "*.json")]))
+
+
+if __name__ == '__main__':
+    unittest.main()
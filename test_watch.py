@@ -0,0 +1,76 @@
+import copy
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from typing import List
+
+import batch
+import render
+import stage
+import watch
+import test_stage
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.current_directory: str = os.getcwd()
+        os.chdir(self.directory.name)
+        self.dct: dict = copy.deepcopy(test_stage.HALL)
+        self.dct["rows"]["list"][0].pop("instruments")
+        self.path: Path = Path("hall.json")
+        self.write()
+
+    def tearDown(self) -> None:
+        os.chdir(self.current_directory)
+        self.directory.cleanup()
+
+    def write(self) -> None:
+        with open(self.path, "w") as write_file:
+            json.dump(self.dct, write_file)
+
+    def test_check(self):
+        watcher: watch.Watcher = watch.Watcher([batch.Job(self.path, None, None), batch.Job(self.path, 80, None)])
+        results: List[batch.JobResult] = watcher.check()
+        self.assertEqual([None, None], [result.error for result in results])
+        self.assertTrue(os.path.isfile(results[1].output))
+        self.assertEqual([], watcher.check())
+
+        # Only the moved row is computed again, for both jobs.
+        misses: int = watcher.row_cache.misses
+        self.dct["rows"]["list"][2]["radius"] = 600
+        self.write()
+        os.utime(self.path, ns=(0, 1))
+        seat_areas: stage.SeatAreas = watcher._seat_areas[self.path][1]
+        self.assertEqual(2, len(watcher.check()))
+        self.assertEqual(misses + 2, watcher.row_cache.misses)
+        # The areas for the seats are enlarged again only when the stage or the hidden areas change.
+        self.assertIs(seat_areas, watcher._seat_areas[self.path][1])
+        self.dct["hidden"] = [{"polygon": [{"x": 0, "y": 0}, {"x": 40, "y": 0}, {"x": 40, "y": 40}]}]
+        self.write()
+        os.utime(self.path, ns=(0, 3))
+        self.assertEqual(2, len(watcher.check()))
+        self.assertIsNot(seat_areas, watcher._seat_areas[self.path][1])
+
+        self.path.write_text("{")
+        os.utime(self.path, ns=(0, 4))
+        self.assertIsNotNone(watcher.check()[0].error)
+
+        self.path.unlink()
+        self.assertEqual([], watcher.check())
+
+    def test_options(self):
+        # A PNG drawn in strips is not kept in memory, the layout is written in the layout cache.
+        watcher: watch.Watcher = watch.Watcher([batch.Job(self.path, None, None)],
+                                               render.Options(strip_height=100), cache_path=Path("cache"))
+        results: List[batch.JobResult] = watcher.check()
+        self.assertEqual([None], [result.error for result in results])
+        self.assertTrue(os.path.isfile(results[0].output))
+        self.assertEqual({}, watcher._drawings)
+        self.assertGreater(len(os.listdir("cache")), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
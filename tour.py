@@ -0,0 +1,269 @@
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Final, Hashable, List, Optional, Sequence, Tuple, TypeVar, Union
+
+import batch
+import geometry
+import layout_cache
+import render
+import stage
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Stop:
+    """Concert of an ensemble in a venue, the hall is named after both."""
+    def __init__(self, venue: str, ensemble: str) -> None:
+        self.venue: Final[str] = venue
+        self.ensemble: Final[str] = ensemble
+
+    @property
+    def name(self) -> str:
+        return f"{self.venue}_{self.ensemble}"
+
+
+class Interner:
+    """Single instance of each distinct row, instrument list and area of the halls of a tour.
+
+    A row is parsed once for all the halls it is in, equal areas of different venues are the same object.
+    """
+    def __init__(self) -> None:
+        self.hits: int = 0
+        self.misses: int = 0
+        self._rows: Final[Dict[Hashable, Optional[stage.Row]]] = {}
+        self._instruments: Final[Dict[Hashable, List[stage.Instrument]]] = {}
+        self._polygons: Final[Dict[Hashable, geometry.Polygon]] = {}
+        self._arcs: Final[Dict[Hashable, geometry.Arc]] = {}
+
+    def intern(self, table: Dict[Hashable, T], key: Hashable, create: Callable[[], T]) -> T:
+        """Value of the key in the table, created on the first lookup."""
+        if key in table:
+            self.hits = self.hits + 1
+            return table[key]
+
+        self.misses = self.misses + 1
+        value: Final[T] = create()
+        table[key] = value
+        return value
+
+    def row(self, dct: Optional[dict]) -> Optional[stage.Row]:
+        if dct is None:
+            return None
+
+        # An invalid row is interned too, it is parsed (and reported) once.
+        return self.intern(self._rows, json.dumps(dct, sort_keys=True), lambda: self.parse_row(dct))
+
+    def parse_row(self, dct: dict) -> Optional[stage.Row]:
+        parsed: Final[Optional[stage.Row]] = stage.Row.from_dict(dct)
+        if parsed is None:
+            return None
+
+        instruments: Final[Optional[List[Optional[List[stage.Instrument]]]]] = None if parsed.instruments is None \
+            else [None if group is None else self.intern(self._instruments, tuple(i.name for i in group),
+                                                         lambda: group)
+                  for group in parsed.instruments]
+        return stage.Row(parsed.angles, instruments, parsed.radius, parsed.center)
+
+    def polygon(self, polygon: geometry.Polygon) -> geometry.Polygon:
+        return self.intern(self._polygons, polygon.vertices, lambda: polygon)
+
+    def area(self, area: Union[geometry.Polygon, geometry.Arc]) -> Union[geometry.Polygon, geometry.Arc]:
+        if isinstance(area, geometry.Polygon):
+            return self.polygon(area)
+
+        return self.intern(self._arcs, (area.center, area.radius, area.angles.start_angle, area.angles.end_angle),
+                           lambda: area)
+
+    def areas(self, areas: geometry.Areas) -> geometry.Areas:
+        return geometry.Areas([self.area(area) for area in areas])
+
+
+class Tour:
+    """Ensembles and venues defined once and combined in stops.
+
+    An ensemble is a list of rows (usually only their instruments), a venue is a hall without name whose rows
+    have no list, or a list of the geometry of the rows (angles, radius, center) completed by the ones of the
+    ensemble. Without stops, every ensemble plays in every venue.
+    """
+    def __init__(self, name: str, venues: Dict[str, dict], ensembles: Dict[str, List[Optional[dict]]],
+                 stops: List[Stop]) -> None:
+        self.name: Final[str] = name
+        self.venues: Final[Dict[str, dict]] = venues
+        self.ensembles: Final[Dict[str, List[Optional[dict]]]] = ensembles
+        self.stops: Final[List[Stop]] = stops
+
+    @staticmethod
+    def from_dict(dct: object) -> Optional["Tour"]:
+        if not isinstance(dct, dict):
+            logger.warning("A tour is an object with a name, venues and ensembles.")
+            return None
+
+        name: Final[Optional[str]] = dct.get("name")
+        venues: Final[object] = dct.get("venues")
+        ensembles: Final[object] = dct.get("ensembles")
+        if name is None or not isinstance(venues, dict) or not isinstance(ensembles, dict) or not venues \
+                or not ensembles:
+            logger.warning("A tour needs a name, venues and ensembles.")
+            return None
+        valid_venues: Final[Dict[str, dict]] = {}
+        for venue_name, venue in venues.items():
+            if not isinstance(venue, dict):
+                logger.warning(f"The venue {venue_name} is not an object.")
+                return None
+            venue_rows: object = venue.get("rows", {})
+            if not isinstance(venue_rows, dict) or not isinstance(venue_rows.get("list", []), list) \
+                    or not all(row is None or isinstance(row, dict) for row in venue_rows.get("list", [])):
+                logger.warning(f"The rows of the venue {venue_name} are not an object with a list of rows, "
+                               f"the venue is skipped.")
+                continue
+            valid_venues[venue_name] = venue
+        if not valid_venues:
+            logger.warning("The tour does not have any valid venue.")
+            return None
+
+        ensemble_rows: Final[Dict[str, List[Optional[dict]]]] = {}
+        for ensemble_name, ensemble in ensembles.items():
+            if not isinstance(ensemble, dict) or not isinstance(ensemble.get("rows"), list):
+                logger.warning(f"The ensemble {ensemble_name} does not have a list of rows.")
+                return None
+            ensemble_rows[ensemble_name] = ensemble["rows"]
+
+        dct_stops: Final[object] = dct.get("stops", [{"venue": venue, "ensemble": ensemble} for venue in valid_venues
+                                                      for ensemble in ensembles])
+        if not isinstance(dct_stops, list):
+            logger.warning("The stops of the tour are not a list.")
+            return None
+
+        stops: List[Stop] = []
+        for dct_stop in dct_stops:
+            if not isinstance(dct_stop, dict):
+                logger.warning(f"The stop {dct_stop} is not an object with a venue and an ensemble.")
+                return None
+            stop_venue: object = dct_stop.get("venue")
+            stop_ensemble: object = dct_stop.get("ensemble")
+            if not isinstance(stop_venue, str) or not isinstance(stop_ensemble, str) or stop_venue not in valid_venues \
+                    or stop_ensemble not in ensembles:
+                logger.warning(f"The stop {dct_stop} does not refer to a venue and an ensemble of the tour.")
+                return None
+            stops.append(Stop(stop_venue, stop_ensemble))
+
+        return Tour(name, valid_venues, ensemble_rows, stops)
+
+    def get_rows(self, stop: Stop) -> List[Optional[dict]]:
+        """Rows of the ensemble completed by the geometry of the rows of the venue, if any."""
+        venue_rows: Final[List[Optional[dict]]] = self.venues[stop.venue].get("rows", {}).get("list", [])
+        ensemble_rows: Final[List[Optional[dict]]] = self.ensembles[stop.ensemble]
+        rows: List[Optional[dict]] = []
+        for i in range(max(len(venue_rows), len(ensemble_rows))):
+            venue_row: Optional[dict] = venue_rows[i] if i < len(venue_rows) else None
+            ensemble_row: Optional[dict] = ensemble_rows[i] if i < len(ensemble_rows) else None
+            rows.append(None if venue_row is None and ensemble_row is None else {**(venue_row or {}),
+                                                                                 **(ensemble_row or {})})
+
+        return rows
+
+    def create_venue(self, venue: str, pieces: Interner) -> Optional[stage.Hall]:
+        """Hall of the venue with its areas interned, parsed with a single default row replaced by the rows of each
+        stop (see create_halls)."""
+        hall: Final[Optional[stage.Hall]] = stage.Hall.from_dict({**self.venues[venue], "name": venue}, [None])
+        if hall is None:
+            logger.warning(f"The venue {venue} is invalid.")
+            return None
+
+        return stage.Hall(hall.name, pieces.polygon(hall.stage),
+                          stage.Rows(hall.rows.rows, hall.rows.n_distancing_delta_first_row, hall.rows.n_distancing_row,
+                                     hall.rows.center, pieces.polygon(hall.rows.podium)),
+                          hall.distancing, pieces.areas(hall.percussion_areas), pieces.areas(hall.hidden_areas),
+                          hall.text_top_left)
+
+    def create_halls(self, interner: Optional[Interner] = None) -> List[Tuple[Stop, Optional[stage.Hall]]]:
+        """Hall of each stop, None if it is invalid.
+
+        Each venue and each row is parsed once, the halls of a venue share its areas for the seats."""
+        pieces: Final[Interner] = interner if interner is not None else Interner()
+        venue_halls: Final[Dict[str, Optional[stage.Hall]]] = {
+            venue: self.create_venue(venue, pieces) for venue in dict.fromkeys(stop.venue for stop in self.stops)}
+        halls: List[Tuple[Stop, Optional[stage.Hall]]] = []
+        for stop in self.stops:
+            venue_hall: Optional[stage.Hall] = venue_halls[stop.venue]
+            parsed_rows: List[Optional[stage.Row]] = [pieces.row(row) for row in self.get_rows(stop)]
+            if len(parsed_rows) == 0:
+                logger.warning(f"The stop {stop.name} does not have any rows.")
+            if venue_hall is None or len(parsed_rows) == 0:
+                halls.append((stop, None))
+                continue
+
+            halls.append((stop, venue_hall.with_rows(
+                stop.name, stage.Rows(parsed_rows, venue_hall.rows.n_distancing_delta_first_row,
+                                      venue_hall.rows.n_distancing_row, venue_hall.rows.center,
+                                      venue_hall.rows.podium), venue_hall.distancing)))
+
+        return halls
+
+
+def run(tour: Tour, path: Path, options: Optional[render.Options] = None,
+        cache_path: Optional[Path] = None) -> List[batch.JobResult]:
+    """Render the halls of all stops in this process, the rows laid out once are shared by all of them."""
+    render_options: Final[render.Options] = options if options is not None else render.Options()
+    cache: Final[Optional[layout_cache.LayoutCache]] = layout_cache.LayoutCache(cache_path) \
+        if cache_path is not None else None
+    row_cache: Final[layout_cache.RowCache] = layout_cache.RowCache()
+    results: List[batch.JobResult] = []
+    for stop, hall in tour.create_halls():
+        start: float = time.perf_counter()
+        if hall is None:
+            results.append(batch.JobResult(batch.Job(path, None, None), None, 0, f"invalid hall {stop.name}"))
+            continue
+
+        job: batch.Job = batch.Job(path, hall.distancing, hall.rows.n_distancing_row)
+        try:
+            batch.EXPORT_PATH.mkdir(exist_ok=True)
+            hall.draw(cache=cache, options=render_options, row_cache=row_cache)
+            results.append(batch.JobResult(job, hall.get_export_path(render_options.output_format),
+                                           time.perf_counter() - start, None))
+        except Exception as error:
+            results.append(batch.JobResult(job, None, time.perf_counter() - start,
+                                           f"{type(error).__name__}: {error}"))
+
+    return results
+
+
+def main(arguments: Sequence[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Draw the stage plot of every stop of a tour, whose ensembles and "
+                                                 "venues are described once in a json file.")
+    parser.add_argument("tour", type=Path, help="tour json file")
+    parser.add_argument("--cache-dir", type=Path, default=layout_cache.DEFAULT_PATH,
+                        help=f"directory of the layout cache (default: {layout_cache.DEFAULT_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="always compute the layout, bypassing the cache")
+    parser.add_argument("--format", choices=list(render.RENDERERS), default=render.RasterRenderer.extension,
+                        help="output format (default: png)")
+    parser.add_argument("--scale", type=float, default=1.0, help="pixels per centimeter of the stage (default: 1)")
+    args = parser.parse_args(arguments)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    start: Final[float] = time.perf_counter()
+    try:
+        with open(args.tour, "r", encoding="utf-8") as read_file:
+            tour: Optional[Tour] = Tour.from_dict(json.load(read_file))
+    except (OSError, ValueError) as error:
+        print(f"{args.tour}: {error}")
+        return 1
+    if tour is None:
+        print(f"{args.tour}: invalid tour")
+        return 1
+
+    results: Final[List[batch.JobResult]] = run(tour, args.tour, render.Options(args.format, args.scale),
+                                                None if args.no_cache else args.cache_dir)
+    batch.print_summary(results, time.perf_counter() - start)
+    return 1 if any(result.error is not None for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,298 @@
+import difflib
+import functools
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Final, List, Optional, Sequence, TypeGuard, Union
+
+import batch
+import float_geometry
+import stage
+
+logger = logging.getLogger(__name__)
+
+# Keys starting with this prefix are comments, for example "_instruments" to disable the instruments of a row.
+COMMENT_PREFIX: Final[str] = "_"
+
+HALL_KEYS: Final[List[str]] = ["name", "stage", "rows", "distancing", "percussion", "hidden", "legend"]
+ROWS_KEYS: Final[List[str]] = ["list", "distancing", "distancingFirstRow", "center", "podium"]
+ROW_KEYS: Final[List[str]] = ["angles", "instruments", "radius", "center"]
+ARC_KEYS: Final[List[str]] = ["radius", "angles", "center"]
+
+
+class ValidationError:
+    """Error at a JSON path of a hall file, for example $.rows.list[2].instruments[0][1]."""
+    def __init__(self, path: str, message: str) -> None:
+        self.path: Final[str] = path
+        self.message: Final[str] = message
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}"
+
+
+class FileResult:
+    def __init__(self, path: Path, errors: List[ValidationError], seconds: float) -> None:
+        self.path: Final[Path] = path
+        self.errors: Final[List[ValidationError]] = errors
+        self.seconds: Final[float] = seconds
+
+
+class Validator:
+    """Check a hall dictionary against what stage.Hall.from_dict expects, collecting every error.
+
+    Only plain Python values are checked, no geometry is built. If the hall is valid and check_arcs is set, the
+    number of instrument groups of each row is compared with the number of arcs of the row on the stage, which is
+    computed with the float geometry (sympy is not needed).
+    """
+    def __init__(self, check_arcs: bool = True) -> None:
+        self.check_arcs: Final[bool] = check_arcs
+        self.errors: Final[List[ValidationError]] = []
+
+    def error(self, path: str, message: str) -> None:
+        self.errors.append(ValidationError(path, message))
+
+    def validate(self, dct: object) -> List[ValidationError]:
+        if not self.check_object(dct, "$", HALL_KEYS):
+            return self.errors
+
+        self.check_string(dct, "name", "$")
+        if self.check_object(dct.get("stage"), "$.stage", ["x", "y"], "stage"):
+            self.check_number(dct["stage"], "x", "$.stage", positive=True)
+            self.check_number(dct["stage"], "y", "$.stage", positive=True)
+        self.check_rows(dct.get("rows"), "$.rows")
+        self.check_number(dct, "distancing", "$", positive=True)
+        self.check_areas(dct.get("percussion"), "$.percussion", "percussion")
+        self.check_areas(dct.get("hidden"), "$.hidden", "hidden")
+        self.check_point(dct.get("legend"), "$.legend", "legend")
+
+        if self.check_arcs and len(self.errors) == 0:
+            self.check_arc_counts(dct)
+        return self.errors
+
+    def check_object(self, value: object, path: str, keys: Sequence[str], name: Optional[str] = None) \
+            -> TypeGuard[dict]:
+        """Check that the value is an object without unknown keys, name is the key of a required value."""
+        if value is None and name is not None:
+            self.error(path, f"{name} is required")
+            return False
+        if not isinstance(value, dict):
+            self.error(path, f"expected an object, got {Validator.type_name(value)}")
+            return False
+
+        for key in value:
+            if key not in keys and not str(key).startswith(COMMENT_PREFIX):
+                close_keys: List[str] = difflib.get_close_matches(key, keys, 1)
+                self.error(f"{path}.{key}", f"unknown key{f', did you mean {close_keys[0]!r}' if close_keys else ''}"
+                                            f" (keys starting with {COMMENT_PREFIX!r} are comments)")
+        return True
+
+    def check_list(self, value: object, path: str, name: Optional[str] = None) -> TypeGuard[list]:
+        if value is None and name is not None:
+            self.error(path, f"{name} is required")
+            return False
+        if not isinstance(value, list):
+            self.error(path, f"expected a list, got {Validator.type_name(value)}")
+            return False
+        return True
+
+    def check_string(self, dct: dict, key: str, path: str) -> None:
+        if key not in dct:
+            self.error(path, f"{key} is required")
+        elif not isinstance(dct[key], str):
+            self.error(f"{path}.{key}", f"expected a string, got {Validator.type_name(dct[key])}")
+
+    def check_number(self, dct: dict, key: str, path: str, required: bool = True, positive: bool = False) -> None:
+        if key not in dct or (dct[key] is None and not required):
+            if required:
+                self.error(path, f"{key} is required")
+            return
+
+        value: Final[object] = dct[key]
+        if not Validator.is_number(value):
+            self.error(f"{path}.{key}", f"expected a number, got {Validator.type_name(value)}")
+        elif positive and value <= 0:
+            self.error(f"{path}.{key}", f"expected a positive number, got {value}")
+
+    def check_point(self, value: object, path: str, name: Optional[str] = None) -> None:
+        if self.check_object(value, path, ["x", "y"], name):
+            self.check_number(value, "x", path)
+            self.check_number(value, "y", path)
+
+    def check_angles(self, value: object, path: str) -> None:
+        if not self.check_object(value, path, ["start", "end"], "angles"):
+            return
+
+        self.check_number(value, "start", path)
+        self.check_number(value, "end", path)
+        if Validator.is_number(value.get("start")) and Validator.is_number(value.get("end")) \
+                and value["start"] > value["end"]:
+            self.error(path, f"the start angle {value['start']} is after the end angle {value['end']}")
+
+    def check_polygon(self, value: object, path: str) -> None:
+        if not self.check_list(value, path, "polygon"):
+            return
+
+        if len(value) < 2:
+            self.error(path, f"a polygon needs at least 2 points, got {len(value)}")
+        for i, point in enumerate(value):
+            self.check_point(point, f"{path}[{i}]")
+
+    def check_areas(self, value: object, path: str, name: str) -> None:
+        if not self.check_list(value, path, name):
+            return
+
+        for i, area in enumerate(value):
+            area_path: str = f"{path}[{i}]"
+            if not self.check_object(area, area_path, ["polygon", "arc"]):
+                continue
+            if "polygon" in area:
+                self.check_polygon(area["polygon"], f"{area_path}.polygon")
+            elif "arc" in area:
+                if self.check_object(area["arc"], f"{area_path}.arc", ARC_KEYS):
+                    self.check_number(area["arc"], "radius", f"{area_path}.arc", positive=True)
+                    self.check_angles(area["arc"].get("angles"), f"{area_path}.arc.angles")
+                    if "center" in area["arc"]:
+                        self.check_point(area["arc"]["center"], f"{area_path}.arc.center")
+            else:
+                self.error(area_path, "an area needs a polygon or an arc")
+
+    def check_rows(self, value: object, path: str) -> None:
+        if not self.check_object(value, path, ROWS_KEYS, "rows"):
+            return
+
+        self.check_number(value, "distancing", path)
+        self.check_number(value, "distancingFirstRow", path, required=False)
+        if "center" in value:
+            self.check_point(value["center"], f"{path}.center")
+        if "podium" in value and self.check_object(value["podium"], f"{path}.podium", ["polygon"]):
+            self.check_polygon(value["podium"].get("polygon"), f"{path}.podium.polygon")
+
+        if not self.check_list(value.get("list"), f"{path}.list", "list"):
+            return
+        if len(value["list"]) == 0:
+            self.error(f"{path}.list", "at least one row is needed")
+        for i, row in enumerate(value["list"]):
+            if row is not None:
+                self.check_row(row, f"{path}.list[{i}]")
+
+    def check_row(self, value: object, path: str) -> None:
+        if not self.check_object(value, path, ROW_KEYS):
+            return
+
+        self.check_number(value, "radius", path, required=False, positive=True)
+        if "center" in value:
+            self.check_point(value["center"], f"{path}.center")
+        if value.get("angles") is not None and self.check_list(value["angles"], f"{path}.angles"):
+            for i, angles in enumerate(value["angles"]):
+                self.check_angles(angles, f"{path}.angles[{i}]")
+
+        if value.get("instruments") is None or not self.check_list(value["instruments"], f"{path}.instruments"):
+            return
+        for i, instruments in enumerate(value["instruments"]):
+            group_path: str = f"{path}.instruments[{i}]"
+            if instruments is None or not self.check_list(instruments, group_path):
+                continue
+            if len(instruments) == 0:
+                self.error(group_path, "an empty group of instruments is not valid, use null instead")
+            for j, name in enumerate(instruments):
+                if name is not None and not isinstance(name, str):
+                    self.error(f"{group_path}[{j}]", f"expected an instrument name, got {Validator.type_name(name)}")
+                elif name is not None and name not in stage.INSTRUMENTS:
+                    close_names: List[str] = difflib.get_close_matches(
+                        name, [key for key in stage.INSTRUMENTS if key is not None], 1)
+                    self.error(f"{group_path}[{j}]", f"unknown instrument {name!r}"
+                                                     f"{f', did you mean {close_names[0]!r}' if close_names else ''}")
+
+    def check_arc_counts(self, dct: dict) -> None:
+        """Compare the instrument groups of each row with its arcs on the stage, as Hall.compute_layout does."""
+        hall: Final[Optional[stage.Hall]] = stage.Hall.from_dict(dct)
+        if hall is None:
+            self.error("$", "the hall is not valid")
+            return
+
+        for row_index, (row, radius) in enumerate(zip(hall.rows.rows, hall.get_row_radii())):
+            if row is None or row.instruments is None:
+                continue
+            circle: float_geometry.Circle = float_geometry.Circle(hall.get_row_center(row), radius)
+            n_arcs: int = len(hall.clip_row(row, circle))
+            if n_arcs != len(row.instruments):
+                self.error(f"$.rows.list[{row_index}].instruments",
+                           f"{len(row.instruments)} groups of instruments but the row has {n_arcs} arc(s) on the "
+                           f"stage (radius {radius} cm)")
+
+    @staticmethod
+    def is_number(value: object) -> TypeGuard[Union[int, float]]:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    @staticmethod
+    def type_name(value: object) -> str:
+        if value is None:
+            return "null"
+        elif Validator.is_number(value):
+            return f"the number {value}"
+        return {dict: "an object", list: "a list", str: f"the string {value!r}", bool: f"{str(value).lower()}"} \
+            .get(type(value), type(value).__name__)
+
+
+def validate(dct: object, check_arcs: bool = True) -> List[ValidationError]:
+    """Every error of the hall dictionary, empty if stage.Hall.from_dict accepts it."""
+    return Validator(check_arcs).validate(dct)
+
+
+def validate_file(path: Path, check_arcs: bool = True) -> FileResult:
+    start: Final[float] = time.perf_counter()
+    try:
+        with open(path, "r", encoding="utf-8") as read_file:
+            dct: object = json.load(read_file)
+    except json.JSONDecodeError as error:
+        return FileResult(path, [ValidationError("$", f"invalid JSON at line {error.lineno} column {error.colno}: "
+                                                      f"{error.msg}")], time.perf_counter() - start)
+    except OSError as error:
+        return FileResult(path, [ValidationError("$", f"the file cannot be read ({error})")],
+                          time.perf_counter() - start)
+
+    return FileResult(path, validate(dct, check_arcs), time.perf_counter() - start)
+
+
+def validate_paths(paths: Sequence[Path], check_arcs: bool = True) -> List[FileResult]:
+    return [validate_file(path, check_arcs) for path in paths]
+
+
+def validate_files(paths: Sequence[Path], n_processes: Optional[int] = None, check_arcs: bool = True) \
+        -> List[FileResult]:
+    """Validate the files in a process pool if there are many of them (see batch.map_chunks), the results are in the
+    order of the paths."""
+    return batch.map_chunks(functools.partial(validate_paths, check_arcs=check_arcs), paths, n_processes)
+
+
+def main(arguments: Sequence[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check hall json files and report every error with its JSON path, "
+                                                 "without drawing them.")
+    parser.add_argument("halls", nargs="+", help="hall json files, directories or glob patterns")
+    parser.add_argument("--jobs", type=int, default=None, help="number of processes (default: number of cores)")
+    parser.add_argument("--no-arcs", action="store_true",
+                        help="do not compare the instrument groups of the rows with their arcs on the stage")
+    args = parser.parse_args(arguments)
+
+    # The arc check builds the halls, their warnings would repeat the errors.
+    logging.basicConfig(level=logging.ERROR, format="%(levelname)s %(name)s: %(message)s")
+    start: Final[float] = time.perf_counter()
+    results: Final[List[FileResult]] = validate_files(batch.collect_files(args.halls), args.jobs, not args.no_arcs)
+    n_errors: int = 0
+    for result in results:
+        for error in result.errors:
+            print(f"{result.path}: {error}")
+        n_errors = n_errors + len(result.errors)
+
+    n_invalid: Final[int] = sum(1 for result in results if len(result.errors) > 0)
+    print(f"{len(results)} files ({n_invalid} invalid, {n_errors} errors) in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms.", file=sys.stderr)
+    return 1 if n_invalid > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
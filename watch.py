@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Final, List, Optional, Sequence, Tuple
+
+import batch
+import incremental
+import layout_cache
+import render
+import stage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL: Final[float] = 0.2
+
+# Modification time in nanoseconds and size of a file, None if the file does not exist.
+FileState = Optional[Tuple[int, int]]
+
+
+class Watcher:
+    """Render the jobs again each time their hall file is saved, in a process which stays warm.
+
+    The files are polled, which works on every platform and file system. The sprites stay in sprites.SPRITES, the
+    rows in a row cache shared by all jobs, the areas for the seats of each file until its stage or hidden areas
+    change (see get_seat_areas), and each PNG is kept in memory so that only its changed regions are
+    drawn again (see incremental.IncrementalDrawing). A PNG drawn in strips is drawn again as a whole, to bound the
+    memory used. The layouts are also cached in cache_path if given.
+    """
+    def __init__(self, jobs: Sequence[batch.Job], options: Optional[render.Options] = None,
+                 interval: float = DEFAULT_INTERVAL, cache_path: Optional[Path] = None) -> None:
+        self.jobs: Final[Sequence[batch.Job]] = jobs
+        self.options: Final[render.Options] = options if options is not None else render.Options()
+        self.interval: Final[float] = interval
+        self.row_cache: Final[layout_cache.RowCache] = layout_cache.RowCache()
+        self.cache: Final[Optional[layout_cache.LayoutCache]] = layout_cache.LayoutCache(cache_path) \
+            if cache_path is not None else None
+        self._drawings: Final[Dict[int, incremental.IncrementalDrawing]] = {}
+        # Key of the stage and hidden areas of each file, and their areas for the seats.
+        self._seat_areas: Final[Dict[Path, Tuple[str, stage.SeatAreas]]] = {}
+        self._states: Final[Dict[Path, FileState]] = {}
+
+    @staticmethod
+    def get_state(path: Path) -> FileState:
+        try:
+            stat: Final[os.stat_result] = path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self) -> List[Path]:
+        """Return the files which changed since the last poll, all the existing files the first time."""
+        changed: List[Path] = []
+        for path in dict.fromkeys(job.path for job in self.jobs):
+            state: FileState = Watcher.get_state(path)
+            if path in self._states and self._states[path] == state:
+                continue
+
+            if state is None:
+                logger.warning(f"The hall file {path} does not exist.")
+            else:
+                changed.append(path)
+            self._states[path] = state
+
+        return changed
+
+    def check(self) -> List[batch.JobResult]:
+        """Render the jobs whose file changed since the last check."""
+        changed: Final[List[Path]] = self.poll()
+        return [self.run_job(job_index, job) for job_index, job in enumerate(self.jobs) if job.path in changed]
+
+    def get_seat_areas(self, path: Path, hall: stage.Hall) -> stage.SeatAreas:
+        """Areas for the seats of the previous hall of the file if the stage and the hidden areas are the same, the
+        ones of the hall otherwise. They do not depend on the distancing, the jobs of a file share them."""
+        surroundings: Final[dict] = hall.get_surroundings()
+        key: Final[str] = layout_cache.create_key({"stage": surroundings["stage"], "hidden": surroundings["hidden"]})
+        previous: Final[Optional[Tuple[str, stage.SeatAreas]]] = self._seat_areas.get(path)
+        if previous is not None and previous[0] == key:
+            return previous[1]
+
+        self._seat_areas[path] = key, hall.seat_areas
+        return hall.seat_areas
+
+    def run_job(self, job_index: int, job: batch.Job) -> batch.JobResult:
+        start: Final[float] = time.perf_counter()
+        try:
+            with open(job.path, "r") as read_file:
+                parsed: Optional[stage.Hall] = stage.Hall.from_dict(job.apply(json.load(read_file)))
+            if parsed is None:
+                return batch.JobResult(job, None, time.perf_counter() - start, "invalid hall")
+
+            hall: Final[stage.Hall] = stage.Hall(parsed.name, parsed.stage, parsed.rows, parsed.distancing,
+                                                 parsed.percussion_areas, parsed.hidden_areas, parsed.text_top_left,
+                                                 self.get_seat_areas(job.path, parsed))
+
+            batch.EXPORT_PATH.mkdir(exist_ok=True)
+            output: Final[str] = hall.get_export_path(self.options.output_format)
+            if self.options.output_format == render.RasterRenderer.extension and self.options.strip_height is None:
+                drawing: incremental.IncrementalDrawing = self._drawings.setdefault(
+                    job_index, incremental.IncrementalDrawing(self.options.scale, self.row_cache, self.cache))
+                boxes: Final[List[incremental.Box]] = drawing.update(hall)
+                logger.debug(f"{len(boxes)} regions drawn again for {job.path}")
+                drawing.save(output)
+            else:
+                hall.draw(cache=self.cache, options=self.options, row_cache=self.row_cache)
+            return batch.JobResult(job, output, time.perf_counter() - start, None)
+        except Exception as error:
+            # The file may be read while it is being saved, the next save renders it again.
+            return batch.JobResult(job, None, time.perf_counter() - start, f"{type(error).__name__}: {error}")
+
+    def run(self, on_results: Callable[[List[batch.JobResult]], None],
+            should_stop: Callable[[], bool] = lambda: False) -> None:
+        """Check the files every interval seconds until should_stop returns True, on_results gets the results."""
+        while not should_stop():
+            results: List[batch.JobResult] = self.check()
+            if len(results) > 0:
+                on_results(results)
+            time.sleep(self.interval)